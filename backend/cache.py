@@ -0,0 +1,467 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+# Хранилище кэша: memory - свой кэш в каждом воркере, redis - общий для всех воркеров
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "trendpulse")
+# Максимальное число записей в кэше memory
+CACHE_MEMORY_SIZE = int(os.getenv("CACHE_MEMORY_SIZE", "4096"))
+# Сколько секунд воркер ждет, пока холодный ключ загружает другой воркер, прежде чем идти в базу сам
+CACHE_LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT", "5"))
+
+# Время жизни записей (секунды) по видам данных
+CONTRACTOR_CACHE_TTL = float(os.getenv("CONTRACTOR_CACHE_TTL", "300"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "3600"))
+# Размер кэша telegram_id -> users.id в каждом воркере
+USER_ID_CACHE_SIZE = int(os.getenv("USER_ID_CACHE_SIZE", "10000"))
+
+_MISSING = object()
+
+# Удаление ключа, только если в нем все еще ожидаемое значение: сравнение и удаление атомарны
+DELETE_IF_EQUAL = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+
+class TTLCache:
+    """
+    Ограниченный in-process кэш: LRU-вытеснение по размеру и TTL на запись.
+
+    Рассчитан на один event loop, поэтому обходится без блокировок.
+    Значения отдаются как есть: кэшировать стоит только неизменяемые ответы.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] <= time.monotonic():
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Сбросить все записи (после изменения исходных данных)"""
+        self._data.clear()
+        self.invalidations += 1
+
+    def discard_soon(self, keys: Iterable[Hashable]):
+        for key in keys:
+            self.pop(key)
+        self.invalidations += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "process",
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class MemoryBackend:
+    """Хранилище внутри процесса: у каждого воркера свой холодный кэш"""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = CACHE_MEMORY_SIZE):
+        self._data = TTLCache("memory", maxsize, ttl=float("inf"))
+        # Записи без TTL (токены поколений) не вытесняются вместе с данными
+        self._persistent: Dict[str, bytes] = {}
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self._persistent[key] if key in self._persistent else self._data.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if ttl is None:
+            self._persistent[key] = value
+        else:
+            self._data.set(key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        if (await self.get_many([key]))[0] is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._persistent.pop(key, None)
+            self._data.pop(key)
+
+    async def delete_if(self, key: str, value: bytes) -> bool:
+        if (await self.get_many([key]))[0] != value:
+            return False
+        await self.delete(key)
+        return True
+
+
+class RedisBackend:
+    """Хранилище в Redis (или любом сервере с протоколом Redis), общее для всех воркеров"""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL) -> "RedisBackend":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url))
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000) if ttl else None, nx=True))
+
+    async def delete(self, *keys: str):
+        await self.client.delete(*keys)
+
+    async def delete_if(self, key: str, value: bytes) -> bool:
+        return bool(await self.client.eval(DELETE_IF_EQUAL, 1, key, value))
+
+
+def create_backend(kind: str = CACHE_BACKEND):
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return RedisBackend.from_url(REDIS_URL)
+    raise ValueError(f"Неизвестный CACHE_BACKEND: {kind}")
+
+
+_backend = None
+
+
+def get_backend():
+    """Хранилище кэша процесса (создается при первом обращении)"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+# Все кэши процесса для /stats/cache
+CACHES: Dict[str, Any] = {}
+
+
+class SharedCache:
+    """
+    Пространство ключей в общем хранилище (memory или redis) для одного вида данных.
+
+    Значения - байты. Каждая запись помечена токеном поколения пространства: сброс
+    всего пространства - это запись нового токена, без перебора ключей; токен
+    и значение читаются одним MGET.
+
+    Защита от лавины промахов: в воркере холодный ключ грузит одна корутина, остальные
+    ждут ее результат; между воркерами грузит тот, кто взял блокировку SET NX,
+    остальные ждут появления значения. Ошибки хранилища не ломают запрос:
+    данные просто читаются из базы.
+
+    Загрузчик должен читать с primary: промах сразу после сброса, заполненный
+    с отстающей реплики, вернул бы старые данные всем воркерам на весь TTL.
+    """
+
+    def __init__(self, name: str, ttl: float, backend=None):
+        self.name = name
+        self.ttl = ttl
+        self._backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.lock_waits = 0
+        self.errors = 0
+        self.invalidations = 0
+        CACHES[name] = self
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _key(self, key: str) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:{key}"
+
+    @property
+    def _token_key(self) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:~token"
+
+    async def _lookup(self, key: str) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """Значение ключа текущего поколения и токен поколения"""
+        token, entry = await self.backend.get_many([self._token_key, self._key(key)])
+        if token and entry and entry.startswith(token + b"\n"):
+            return entry[len(token) + 1:], token
+        return None, token
+
+    async def _store(self, key: str, token: Optional[bytes], payload: bytes):
+        if token is None:
+            token = os.urandom(8).hex().encode()
+            if not await self.backend.add(self._token_key, token):
+                token = (await self.backend.get_many([self._token_key]))[0]
+        # Токен прочитан до загрузки: если пространство сбросили, пока шла загрузка, запись сразу устарела
+        await self.backend.set(self._key(key), token + b"\n" + payload, self.ttl)
+
+    async def _settle(self):
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Значение из кэша или из loader (один вызов loader на холодный ключ)"""
+        await self._settle()
+        try:
+            payload, token = await self._lookup(key)
+        except Exception as e:
+            self._backend_error(e)
+            return await loader()
+        if payload is not None:
+            self.hits += 1
+            return payload
+        self.misses += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            payload = await self._load_locked(key, token, loader)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # ожидающих может не быть: помечаем исключение полученным
+            raise
+        else:
+            future.set_result(payload)
+            return payload
+        finally:
+            del self._inflight[key]
+
+    async def _load_locked(self, key: str, token: Optional[bytes], loader) -> bytes:
+        lock_key = self._key(key) + ":~lock"
+        try:
+            locked = await self.backend.add(lock_key, b"1", CACHE_LOCK_TIMEOUT)
+        except Exception as e:
+            self._backend_error(e)
+            return await loader()
+
+        if not locked:
+            # Ключ уже грузит другой воркер: ждем его результат, но не дольше таймаута блокировки
+            self.lock_waits += 1
+            deadline = time.monotonic() + CACHE_LOCK_TIMEOUT
+            delay = 0.01
+            while time.monotonic() < deadline:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.2)
+                try:
+                    payload, token = await self._lookup(key)
+                except Exception as e:
+                    self._backend_error(e)
+                    break
+                if payload is not None:
+                    return payload
+
+        try:
+            payload = await loader()
+            self.loads += 1
+            try:
+                await self._store(key, token, payload)
+            except Exception as e:
+                self._backend_error(e)
+            return payload
+        finally:
+            if locked:
+                try:
+                    await self.backend.delete(lock_key)
+                except Exception as e:
+                    self._backend_error(e)
+
+    async def get_or_load_model(self, key: str, loader: Callable[[], Awaitable[Any]], adapter: TypeAdapter) -> Any:
+        """get_or_load для значений, которые сериализуются через TypeAdapter"""
+        loaded = _MISSING
+
+        async def load_bytes() -> bytes:
+            nonlocal loaded
+            loaded = await loader()
+            return adapter.dump_json(loaded)
+
+        payload = await self.get_or_load(key, load_bytes)
+        return adapter.validate_json(payload) if loaded is _MISSING else loaded
+
+    async def invalidate(self):
+        """Сбросить все пространство ключей (во всех воркерах сразу)"""
+        self.invalidations += 1
+        try:
+            await self.backend.set(self._token_key, os.urandom(8).hex().encode())
+        except Exception as e:
+            self._backend_error(e)
+
+    async def discard(self, *keys: str):
+        """Удалить отдельные ключи"""
+        self.invalidations += 1
+        try:
+            await self.backend.delete(*(self._key(key) for key in keys))
+        except Exception as e:
+            self._backend_error(e)
+
+    def _schedule(self, coro):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Синхронная сессия вне event loop: сбрасываем сразу
+            asyncio.run(coro)
+            return
+        task = loop.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def clear(self):
+        """Сброс из синхронного кода (хуки сессии); следующее чтение в процессе его дождется"""
+        self._schedule(self.invalidate())
+
+    def discard_soon(self, keys: Iterable[str]):
+        self._schedule(self.discard(*keys))
+
+    def _backend_error(self, error: Exception):
+        self.errors += 1
+        logger.warning("Кэш %s недоступен (%s): читаем из базы", self.name, error)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "loads": self.loads,
+            "lock_waits": self.lock_waits,
+            "errors": self.errors,
+            "invalidations": self.invalidations,
+        }
+
+
+contractor_cache = SharedCache("contractors", CONTRACTOR_CACHE_TTL)
+user_cache = SharedCache("users", USER_CACHE_TTL)
+# telegram_id -> users.id не меняется, поэтому держится в памяти воркера: теплый поиск без обращений к сети
+user_id_cache = TTLCache("user_ids", USER_ID_CACHE_SIZE, USER_CACHE_TTL)
+CACHES[user_id_cache.name] = user_id_cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def _invalidation_flag(cache) -> str:
+    return f"invalidate_cache:{cache.name}"
+
+
+def mark_changed(session, cache, key: Optional[Hashable] = None):
+    """
+    Отметить изменение для кэша, подключенного через invalidate_on_commit, из записи
+    мимо ORM (Core INSERT/UPDATE). Сброс произойдет после коммита сессии.
+    """
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault(_invalidation_flag(cache), set()).add(key)
+
+
+def set_after_commit(session, cache, key: Hashable, value: Any):
+    """Положить значение в кэш только после коммита: при откате транзакции его не будет"""
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault("cache_after_commit", []).append((cache, key, value))
+
+
+@event.listens_for(Session, "after_commit")
+def _fill_after_commit(session):
+    for cache, key, value in session.info.pop("cache_after_commit", ()):
+        cache.set(key, value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(session):
+    session.info.pop("cache_after_commit", None)
+
+
+def invalidate_on_commit(model, cache, key: Optional[Callable[[Any], str]] = None):
+    """
+    Сбрасывать кэш после коммита сессии, в которой вставлялись, менялись
+    или удалялись строки модели. Ловит любой путь записи через ORM,
+    а не только известные методы CRUD; при откате кэш не трогается.
+
+    Без key сбрасывается все пространство (cache.clear()), с key - только
+    ключи измененных строк (cache.discard_soon()).
+    """
+    flag = _invalidation_flag(cache)
+
+    def mark(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            mark_changed(session, cache, key(target) if key else None)
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, name, mark)
+
+    @event.listens_for(Session, "after_commit")
+    def _after_commit(session):
+        keys = session.info.pop(flag, None)
+        if not keys:
+            return
+        if None in keys:
+            cache.clear()
+        else:
+            cache.discard_soon(keys)
+
+    @event.listens_for(Session, "after_rollback")
+    def _after_rollback(session):
+        session.info.pop(flag, None)
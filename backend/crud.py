@@ -1,9 +1,20 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, func
 from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects import postgresql, sqlite
 from typing import List, Optional, Dict, Any
 from .models import User, Project, Scenario, Contractor, LandPlot, Report, UserSession, MarketData
 from .schemas import UserCreate, ProjectCreate, ScenarioCreate, ContractorCreate
+from .pagination import keyset_order, keyset_page
+from .cache import mark_changed, set_after_commit, user_cache, user_id_cache
+
+async def _save(db: AsyncSession, obj, commit: bool = True):
+    """Сохранить объект сразу или оставить его во внешней транзакции вызывающего кода"""
+    db.add(obj)
+    if commit:
+        await db.commit()
+        await db.refresh(obj)
+    return obj
 
 class UserCRUD:
     """CRUD операции для пользователей"""
@@ -17,44 +28,77 @@ class UserCRUD:
         return result.scalar_one_or_none()
     
     @staticmethod
-    async def create_user(db: AsyncSession, **kwargs) -> User:
+    async def create_user(db: AsyncSession, commit: bool = True, **kwargs) -> User:
         """Создать нового пользователя"""
-        user = User(**kwargs)
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        return user
+        return await _save(db, User(**kwargs), commit)
     
     @staticmethod
-    async def get_or_create_user(db: AsyncSession, telegram_id: int) -> User:
+    async def get_or_create_user(db: AsyncSession, telegram_id: int, commit: bool = True) -> User:
         """Получить существующего или создать нового пользователя"""
         user = await UserCRUD.get_by_telegram_id(db, telegram_id)
         if not user:
-            user = await UserCRUD.create_user(db, telegram_id=telegram_id)
+            user = await UserCRUD.create_user(db, commit=commit, telegram_id=telegram_id)
         return user
+    
+    @staticmethod
+    async def get_user_id(db: AsyncSession, telegram_id: int) -> Optional[int]:
+        """ID пользователя по Telegram ID; известные ID берутся из памяти без запроса"""
+        user_id = user_id_cache.get(telegram_id)
+        if user_id is None:
+            result = await db.execute(select(User.id).where(User.telegram_id == telegram_id))
+            user_id = result.scalar_one_or_none()
+            if user_id is not None:
+                user_id_cache.set(telegram_id, user_id)
+        return user_id
+    
+    @staticmethod
+    async def get_or_create_user_id(db: AsyncSession, telegram_id: int, commit: bool = True) -> int:
+        """
+        ID пользователя, при необходимости созданного.
+        
+        Теплый кэш - ноль запросов; иначе один INSERT ... ON CONFLICT (telegram_id) DO UPDATE ... RETURNING id,
+        без гонки между параллельными первыми сообщениями. В кэш ID попадает только после коммита.
+        """
+        user_id = user_id_cache.get(telegram_id)
+        if user_id is not None:
+            return user_id
+        
+        dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+        stmt = dialect_insert(User).values(telegram_id=telegram_id, is_active=True)
+        # DO UPDATE вместо DO NOTHING: RETURNING отдает id и для уже существующей строки
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={"telegram_id": stmt.excluded.telegram_id}
+        ).returning(User.id)
+        user_id = (await db.execute(stmt)).scalar_one()
+        
+        # Запись мимо ORM: карточку пользователя в общем кэше сбрасываем явно
+        mark_changed(db, user_cache, str(telegram_id))
+        set_after_commit(db, user_id_cache, telegram_id, user_id)
+        if commit:
+            await db.commit()
+        return user_id
 
 class LandPlotCRUD:
     """CRUD операции для земельных участков"""
     
     @staticmethod
-    async def create_land_plot(db: AsyncSession, user_id: int, land_plot_data: Project) -> Project:
-        """Создать новый земельный участок"""
+    async def create_land_plot(db: AsyncSession, user_id: int, land_plot_data, 
+                               investment_budget: Optional[float] = None,
+                               commit: bool = True) -> Project:
+        """Создать новый земельный участок (участки хранятся как проекты пользователя)"""
+        plot = LandPlot.model_validate(land_plot_data)
+        location = land_plot_data.get("location") if isinstance(land_plot_data, dict) else None
         land_plot = Project(
             user_id=user_id,
-            area=land_plot_data.area,
-            zone_type=land_plot_data.zone_type.value,
-            infrastructure=[infra.value for infra in land_plot_data.infrastructure],
-            electricity_power=land_plot_data.electricity_power,
-            gas_pressure=land_plot_data.gas_pressure,
-            water_flow=land_plot_data.water_flow,
-            road_access=land_plot_data.road_access,
-            internet_available=land_plot_data.internet_available,
-            location=land_plot_data.location if hasattr(land_plot_data, 'location') else None
+            name=f"Участок {plot.area} га",
+            description="Инфраструктура: " + ", ".join(infra.value for infra in plot.infrastructure),
+            project_type=plot.zone_type.value,
+            location=location,
+            budget=investment_budget,
+            area=plot.area
         )
-        db.add(land_plot)
-        await db.commit()
-        await db.refresh(land_plot)
-        return land_plot
+        return await _save(db, land_plot, commit)
     
     @staticmethod
     async def get_user_land_plots(db: AsyncSession, user_id: int) -> List[LandPlot]:
@@ -68,13 +112,9 @@ class ScenarioCRUD:
     """CRUD операции для сценариев"""
     
     @staticmethod
-    async def create_scenario(db: AsyncSession, **kwargs) -> Scenario:
+    async def create_scenario(db: AsyncSession, commit: bool = True, **kwargs) -> Scenario:
         """Создать новый сценарий"""
-        scenario = Scenario(**kwargs)
-        db.add(scenario)
-        await db.commit()
-        await db.refresh(scenario)
-        return scenario
+        return await _save(db, Scenario(**kwargs), commit)
     
     @staticmethod
     async def get_scenario_by_id(db: AsyncSession, scenario_id: int) -> Optional[Scenario]:
@@ -85,26 +125,28 @@ class ScenarioCRUD:
         return result.scalar_one_or_none()
     
     @staticmethod
-    async def get_user_scenarios(db: AsyncSession, user_id: int) -> List[Scenario]:
-        """Получить все сценарии пользователя"""
-        result = await db.execute(
+    async def get_user_scenarios(db: AsyncSession, user_id: int, skip: int = 0, limit: Optional[int] = 100,
+                                 cursor: Optional[str] = None) -> List[Scenario]:
+        """Получить сценарии пользователя, новые первыми (keyset-пагинация по курсору; limit=None - все)"""
+        query = (
             select(Scenario)
             .join(Project)
             .where(Project.user_id == user_id)
         )
+        if cursor is None and skip:
+            query = keyset_order(query, Scenario).offset(skip).limit(limit)
+        else:
+            query = keyset_page(query, Scenario, cursor, limit)
+        result = await db.execute(query)
         return result.scalars().all()
 
 class ContractorCRUD:
     """CRUD операции для подрядчиков"""
     
     @staticmethod
-    async def create_contractor(db: AsyncSession, **kwargs) -> Contractor:
+    async def create_contractor(db: AsyncSession, commit: bool = True, **kwargs) -> Contractor:
         """Создать нового подрядчика"""
-        contractor = Contractor(**kwargs)
-        db.add(contractor)
-        await db.commit()
-        await db.refresh(contractor)
-        return contractor
+        return await _save(db, Contractor(**kwargs), commit)
     
     @staticmethod
     async def get_all_active_contractors(db: AsyncSession) -> List[Contractor]:
@@ -131,18 +173,31 @@ class ReportCRUD:
     
     @staticmethod
     async def create_report(db: AsyncSession, scenario_id: int, report_type: str, 
-                          file_path: str, file_size: Optional[int] = None) -> Report:
+                          file_path: str, file_size: Optional[int] = None,
+                          content_hash: Optional[str] = None,
+                          commit: bool = True) -> Report:
         """Создать новый отчет"""
         report = Report(
             scenario_id=scenario_id,
             report_type=report_type,
             file_path=file_path,
-            file_size=file_size
+            file_size=file_size,
+            content_hash=content_hash
         )
-        db.add(report)
-        await db.commit()
-        await db.refresh(report)
-        return report
+        return await _save(db, report, commit)
+    
+    @staticmethod
+    async def get_report(db: AsyncSession, report_id: int) -> Optional[Report]:
+        """Получить отчет по ID"""
+        return await db.get(Report, report_id)
+    
+    @staticmethod
+    async def get_by_content_hash(db: AsyncSession, content_hash: str) -> Optional[Report]:
+        """Получить отчет с таким же содержимым"""
+        result = await db.execute(
+            select(Report).where(Report.content_hash == content_hash)
+        )
+        return result.scalar_one_or_none()
     
     @staticmethod
     async def get_scenario_reports(db: AsyncSession, scenario_id: int) -> List[Report]:
@@ -236,13 +291,9 @@ class ProjectCRUD:
     """CRUD операции для проектов"""
     
     @staticmethod
-    async def create_project(db: AsyncSession, **kwargs) -> Project:
+    async def create_project(db: AsyncSession, commit: bool = True, **kwargs) -> Project:
         """Создать новый проект"""
-        project = Project(**kwargs)
-        db.add(project)
-        await db.commit()
-        await db.refresh(project)
-        return project
+        return await _save(db, Project(**kwargs), commit)
     
     @staticmethod
     async def get_project_by_id(db: AsyncSession, project_id: int) -> Optional[Project]:
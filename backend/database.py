@@ -1,19 +1,78 @@
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
 import os
 from dotenv import load_dotenv
 
+from .db_pool import InstrumentedQueuePool, pool_status
+from .db_routing import ReadRouter, make_read_only, request_consistency_keys
+from .sql_metrics import instrument_engine
+
 load_dotenv()
 
 # Получение URL базы данных из переменных окружения
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://trendpulse:[ВАШ_ПАРОЛЬ_БАЗЫ]@db:5432/trendpulse_db")
 
+# URL реплики для читающих запросов (если не задан, чтение идет в primary)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# Окно read-your-writes после записи пользователя и пауза перед повторной попыткой реплики, секунды
+DB_READ_CONSISTENCY_WINDOW = float(os.getenv("DB_READ_CONSISTENCY_WINDOW", "5"))
+DB_REPLICA_RETRY_INTERVAL = float(os.getenv("DB_REPLICA_RETRY_INTERVAL", "30"))
+
+# Настройки пула соединений
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # секунды
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # ожидание соединения, секунды
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # кэш prepared statements asyncpg
+
+def engine_options(url: str) -> dict:
+    """Параметры create_async_engine для указанного URL"""
+    options = {"echo": DB_ECHO}
+    parsed_url = make_url(url)
+
+    # SQLite (тесты, локальный запуск) использует собственный пул SQLAlchemy
+    if parsed_url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if parsed_url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return options
+
 # Создаем async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine)
 
 # Создаем session factory
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Реплика только для чтения
+replica_engine = None
+ReplicaSessionLocal = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL))
+    make_read_only(replica_engine)
+    instrument_engine(replica_engine)
+    ReplicaSessionLocal = async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+
+read_router = ReadRouter(
+    AsyncSessionLocal,
+    ReplicaSessionLocal,
+    consistency_window=DB_READ_CONSISTENCY_WINDOW,
+    retry_interval=DB_REPLICA_RETRY_INTERVAL,
+)
+
 # Базовый класс для моделей
 Base = declarative_base()
 
@@ -25,6 +84,25 @@ async def get_db():
         finally:
             await session.close()
 
+async def get_read_db(request: Request):
+    """Dependency для читающих эндпоинтов: реплика с откатом на primary"""
+    session = await read_router.open_session(request_consistency_keys(request))
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def mark_write(*keys: str):
+    """Отметить запись, чтобы последующие чтения этого пользователя шли в primary (во всех воркерах)"""
+    await read_router.mark_write(*keys)
+
+def get_pool_stats() -> dict:
+    """Статистика пулов соединений по именам движков"""
+    stats = {"primary": pool_status(engine.pool)}
+    if replica_engine is not None:
+        stats["replica"] = pool_status(replica_engine.pool)
+    return stats
+
 async def init_db():
     """Инициализация базы данных - создание таблиц"""
     async with engine.begin() as conn:
@@ -32,4 +110,6 @@ async def init_db():
 
 async def close_db():
     """Закрытие соединения с базой данных"""
-    await engine.dispose() 
\ No newline at end of file
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
@@ -0,0 +1,100 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Границы корзин гистограммы ожидания соединения (мс)
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class WaitHistogram:
+    """Гистограмма времени ожидания соединения из пула"""
+
+    def __init__(self, buckets_ms=WAIT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Сбросить накопленные значения"""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.timeouts = 0
+
+    def observe(self, elapsed_ms: float):
+        """Учесть одно ожидание соединения"""
+        index = bisect_left(self.buckets_ms, elapsed_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            if elapsed_ms > self.max_ms:
+                self.max_ms = elapsed_ms
+
+    def observe_timeout(self):
+        """Учесть ожидание, завершившееся таймаутом"""
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Снимок гистограммы для API"""
+        with self._lock:
+            buckets = {f"le_{bound}ms": count for bound, count in zip(self.buckets_ms, self._counts)}
+            buckets["le_inf"] = self._counts[-1]
+            return {
+                "count": self.count,
+                "timeouts": self.timeouts,
+                "total_ms": round(self.total_ms, 3),
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "buckets": buckets,
+            }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, измеряющий время получения соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitHistogram()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            # Ошибки подключения к базе - не ожидание пула: пробрасываются без учета
+            self.wait_stats.observe_timeout()
+            raise
+        self.wait_stats.observe((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        # Пересозданный пул (например, после dispose) сохраняет статистику
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def pool_status(pool) -> Dict[str, Any]:
+    """Текущее состояние пула соединений"""
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    wait_stats: Optional[WaitHistogram] = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status["wait"] = wait_stats.snapshot()
+    return status
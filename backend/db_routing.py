@@ -0,0 +1,118 @@
+import logging
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from .cache import CACHE_KEY_PREFIX, get_backend
+
+logger = logging.getLogger(__name__)
+
+# Параметры запроса, по которым определяется "свой" пользователь для read-your-writes
+CONSISTENCY_PARAMS = ("telegram_id", "user_id", "project_id", "scenario_id")
+
+
+def consistency_key(name: str, value) -> str:
+    """Ключ согласованности чтения для параметра запроса"""
+    return f"{name}:{value}"
+
+
+def request_consistency_keys(request) -> List[str]:
+    """Ключи согласованности, извлеченные из path и query параметров запроса"""
+    keys = []
+    for name in CONSISTENCY_PARAMS:
+        value = request.path_params.get(name) or request.query_params.get(name)
+        if value is not None:
+            keys.append(consistency_key(name, value))
+    return keys
+
+
+def make_read_only(engine: AsyncEngine):
+    """Переводит все соединения движка в режим только для чтения"""
+    if engine.dialect.name == "postgresql":
+        statement = "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY"
+    elif engine.dialect.name == "sqlite":
+        statement = "PRAGMA query_only = ON"
+    else:
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(statement)
+        cursor.close()
+
+
+class ReadRouter:
+    """
+    Маршрутизация читающих запросов между primary и репликой.
+
+    Отметки о записях хранятся в хранилище кэша с TTL, равным окну согласованности:
+    с CACHE_BACKEND=redis их видят все воркеры, с memory - только записавший процесс.
+    """
+
+    name = "consistency"
+
+    def __init__(self, primary_factory: async_sessionmaker,
+                 replica_factory: Optional[async_sessionmaker] = None,
+                 consistency_window: float = 5.0,
+                 retry_interval: float = 30.0,
+                 backend=None):
+        self.primary_factory = primary_factory
+        self.replica_factory = replica_factory
+        self.consistency_window = consistency_window
+        self.retry_interval = retry_interval
+        self._backend = backend
+        self._replica_down_until = 0.0
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _key(self, key: str) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:{key}"
+
+    async def mark_write(self, *keys: str):
+        """Запомнить запись пользователя: его чтения идут на primary в течение окна"""
+        # Без реплики все чтения и так идут на primary
+        if self.replica_factory is None or not keys:
+            return
+        try:
+            for key in keys:
+                await self.backend.set(self._key(key), b"1", self.consistency_window)
+        except Exception as e:
+            logger.warning("Не удалось сохранить отметку о записи (%s): чтения могут уйти на реплику", e)
+
+    async def recently_written(self, keys: Iterable[str]) -> bool:
+        """Была ли запись по одному из ключей в пределах окна согласованности"""
+        keys = [self._key(key) for key in keys]
+        if not keys:
+            return False
+        try:
+            return any(value is not None for value in await self.backend.get_many(keys))
+        except Exception as e:
+            # Без отметок нельзя гарантировать чтение своих записей: читаем с primary
+            logger.warning("Отметки о записях недоступны (%s): чтение идет на primary", e)
+            return True
+
+    @property
+    def replica_available(self) -> bool:
+        return self.replica_factory is not None and time.monotonic() >= self._replica_down_until
+
+    async def open_session(self, keys: Iterable[str] = ()) -> AsyncSession:
+        """Открыть сессию для чтения: реплика, если она доступна и нет свежих записей"""
+        if not self.replica_available or await self.recently_written(keys):
+            return self.primary_factory()
+
+        session = self.replica_factory()
+        try:
+            # Соединение берется сразу, чтобы при недоступной реплике уйти на primary
+            await session.connection()
+        except (OperationalError, DBAPIError, OSError, TimeoutError) as e:
+            await session.close()
+            self._replica_down_until = time.monotonic() + self.retry_interval
+            logger.warning("Реплика недоступна, чтение переключено на primary: %s", e)
+            return self.primary_factory()
+        return session
@@ -0,0 +1,205 @@
+import os
+import time
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .responses import etag_matches, not_modified
+
+# Префикс internal-location прокси (nginx): если задан, API отдает только заголовок
+# X-Accel-Redirect, а сам файл (с Range и sendfile) отдает прокси
+REPORTS_ACCEL_REDIRECT = os.getenv("REPORTS_ACCEL_REDIRECT", "")
+# Отчет по ID меняется только при повторном рендере, клиент перепроверяет его по ETag
+DOWNLOAD_CACHE_CONTROL = "private, max-age=3600"
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    """Запрошенный диапазон целиком за пределами файла"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Диапазон из заголовка Range как (начало, конец включительно).
+
+    None - отдать файл целиком: заголовка нет, он не про байты, синтаксис неверный
+    или диапазонов несколько (RFC 9110 разрешает их игнорировать).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        # bytes=-N: последние N байт
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def if_range_matches(if_range: Optional[str], etag: str, mtime: float) -> bool:
+    """Можно ли отдать часть файла: If-Range нет или он совпадает с текущей версией"""
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(("\"", "W/")):
+        # Для If-Range годится только сильное сравнение
+        return if_range == etag
+    try:
+        return int(parsedate_to_datetime(if_range).timestamp()) == int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+class RangeFileResponse(FileResponse):
+    """
+    Файл или его часть. Если сервер поддерживает ASGI-расширение zerocopysend,
+    байты уходят через sendfile без чтения в Python; иначе - чтение блоками.
+    """
+
+    def __init__(self, path: str, stat_result: os.stat_result, start: int, end: int,
+                 status_code: int = 200, headers: Optional[Mapping[str, str]] = None,
+                 media_type: Optional[str] = None, method: Optional[str] = None):
+        self.start = start
+        self.length = end - start + 1
+        super().__init__(
+            path, status_code=status_code, headers=headers, media_type=media_type,
+            stat_result=stat_result, method=method
+        )
+
+    def set_stat_headers(self, stat_result: os.stat_result):
+        self.headers.setdefault("content-length", str(self.length))
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZEROCOPY_EXTENSION, "file": file,
+                    "offset": self.start, "count": self.length, "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # Файл укоротился во время отдачи: закрываем тело, чтобы клиент не ждал
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_download(path: str, stat_result: os.stat_result, etag: str, filename: str, method: str,
+                  request_headers: Mapping[str, str], media_type: str = "application/pdf",
+                  root: Optional[str] = None) -> Response:
+    """
+    Ответ на скачивание файла: 304 по If-None-Match, 206/416 по Range и If-Range,
+    либо X-Accel-Redirect, если файл лежит в root и задан REPORTS_ACCEL_REDIRECT.
+    """
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL,
+        "Content-Disposition": content_disposition(filename),
+    }
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    if REPORTS_ACCEL_REDIRECT and root:
+        relative = os.path.relpath(path, root)
+        if not relative.startswith(os.pardir):
+            # Range, If-Range и sendfile берет на себя прокси, воркер API не читает файл
+            headers["X-Accel-Redirect"] = REPORTS_ACCEL_REDIRECT.rstrip("/") + "/" + quote(relative)
+            return Response(status_code=200, headers=headers, media_type=media_type)
+
+    size = stat_result.st_size
+    byte_range = None
+    if if_range_matches(request_headers.get("if-range"), etag, stat_result.st_mtime):
+        try:
+            byte_range = parse_range(request_headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", "ETag": etag})
+
+    if byte_range is None:
+        return RangeFileResponse(path, stat_result, 0, size - 1, headers=headers,
+                                 media_type=media_type, method=method)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(path, stat_result, start, end, status_code=206, headers=headers,
+                             media_type=media_type, method=method)
+
+
+class _ZipSink:
+    """Приемник для ZipFile без seek и tell: записанные байты забираются после каждого блока"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def zip_stream(entries: AsyncIterator[Tuple[str, AsyncIterator[bytes]]]) -> AsyncIterator[bytes]:
+    """
+    ZIP-архив, собираемый на лету: ни архив, ни файл целиком не держатся в памяти и на диске.
+
+    Файлы пишутся без сжатия (PDF уже сжат), размер и CRC - в дескрипторе после данных.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for name, chunks in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            with archive.open(info, "w") as entry:
+                async for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    # Центральный каталог архива
+    yield sink.drain()
@@ -0,0 +1,37 @@
+from typing import Generic, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import RowMapping, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+class ListReader(Generic[SchemaT]):
+    """
+    Чтение списков без ORM: выбираются только колонки схемы ответа,
+    строки (.mappings()) валидируются сразу в модели ответа одним TypeAdapter.
+    """
+
+    def __init__(self, model, schema: Type[SchemaT]):
+        self.model = model
+        self.schema = schema
+        self.columns = [model.__table__.c[name] for name in schema.model_fields if name in model.__table__.c]
+        self.adapter = TypeAdapter(List[schema])
+
+    def select(self):
+        """SELECT только нужных колонок"""
+        return select(*self.columns)
+
+    async def fetch(self, db: AsyncSession, query) -> List[SchemaT]:
+        """Выполнить запрос и собрать модели ответа из строк"""
+        result = await db.execute(query)
+        return self.adapter.validate_python(result.mappings().all())
+
+    async def fetch_row(self, db: AsyncSession, query) -> Optional[RowMapping]:
+        """Одна строка без валидации: по ней можно посчитать ETag и не собирать модель"""
+        result = await db.execute(query)
+        return result.mappings().one_or_none()
+
+    def validate_row(self, row: RowMapping) -> SchemaT:
+        return self.schema.model_validate(dict(row))
@@ -1,14 +1,25 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, RedirectResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uvicorn
+import logging
 import os
 from datetime import datetime
 from dotenv import load_dotenv
 
-from .database import get_db, engine
-from .models import Base, ProjectType, InfrastructureType, ZoneType
+from .cache import cache_stats
+from .market_index import market_index
+from .database import AsyncSessionLocal, get_db, get_read_db, mark_write, engine, get_pool_stats
+from .db_routing import consistency_key
+from .downloads import file_download
+from .migrate import check_schema
+from .pagination import InvalidCursor, NEXT_CURSOR_HEADER, next_cursor
+from .responses import StaticJSON, content_etag, etag_matches, json_response, not_modified
+from .sql_metrics import SERVER_TIMING_HEADER, SQLMetricsMiddleware
+from .models import ProjectType, InfrastructureType, ZoneType
 from .schemas import (
     ProjectCreate, ProjectResponse, 
     ScenarioCreate, ScenarioResponse,
@@ -16,13 +27,20 @@ from .schemas import (
 )
 from .services import (
     ProjectService, ScenarioService, 
-    ContractorService, PDFService
+    ContractorService, PDFService, ReportBatchService, ReportJobService, UserService,
+    PROJECT_LIST, SCENARIO_LIST
 )
+from .services.pdf_generator import TEMPLATES
+from .services.render_pool import pdf_pool
+from .report_jobs import report_jobs
+from .report_store import report_store
 from . import crud
 from . import schemas
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Тестовые данные для простых сценариев
 test_scenarios = [
     {
@@ -54,7 +72,8 @@ test_scenarios = [
 app = FastAPI(
     title="TrendPulse AI API",
     description="API для генерации сценариев развития и подбора подрядчиков",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -64,18 +83,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SERVER_TIMING_HEADER, "ETag"],
 )
 
-# Инициализация базы данных
+# Число SQL-запросов и время в базе для каждого запроса (заголовок Server-Timing)
+app.add_middleware(SQLMetricsMiddleware)
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+# Проверка версии схемы: таблицы и индексы создает python -m backend.migrate, воркеры DDL не выполняют
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await check_schema(engine)
+    try:
+        async with AsyncSessionLocal() as session:
+            await market_index.refresh(session)
+    except Exception as e:
+        # Индекс догрузится при первой генерации сценариев
+        logger.warning("Не удалось загрузить рыночные данные при старте: %s", e)
+    try:
+        await pdf_pool.start()
+    except Exception as e:
+        # Пул запустится при первом отчете
+        logger.warning("Не удалось запустить пул рендера PDF: %s", e)
+    report_store.start_sweeper(AsyncSessionLocal)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await report_store.stop_sweeper()
+    # Начатые отчеты дописываются, пока процесс рендера еще жив
+    await ReportJobService.drain(pdf_pool.timeout)
+    pdf_pool.shutdown()
+
+def _next_cursor_headers(items: list, limit: int) -> dict:
+    """Заголовок с курсором следующей страницы"""
+    cursor = next_cursor(items, limit)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
 
 # Health check
+# Ответ health check не кэшируется без перепроверки: 304 тоже подтверждает, что процесс жив
+HEALTH_RESPONSE = StaticJSON({"status": "healthy", "version": "3.0.0"}, cache_control="no-cache")
+
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "version": "3.0.0"}
+async def health_check(if_none_match: Optional[str] = Header(None)):
+    return HEALTH_RESPONSE.response(if_none_match)
 
 # Проекты
 @app.post("/projects/", response_model=ProjectResponse)
@@ -84,28 +137,38 @@ async def create_project(
     db: AsyncSession = Depends(get_db)
 ):
     service = ProjectService(db)
-    return await service.create_project(project)
+    created = await service.create_project(project)
+    await mark_write(consistency_key("user_id", created.user_id), consistency_key("project_id", created.id))
+    return json_response(ProjectResponse, created)
 
 @app.get("/projects/", response_model=List[ProjectResponse])
 async def get_projects(
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
+    """Список проектов, новые первыми. Следующая страница - по курсору из заголовка X-Next-Cursor"""
     service = ProjectService(db)
-    return await service.get_projects(skip=skip, limit=limit, user_id=user_id)
+    projects = await service.get_projects(skip=skip, limit=limit, user_id=user_id, cursor=cursor)
+    return json_response(List[ProjectResponse], projects, headers=_next_cursor_headers(projects, limit))
 
 @app.get("/projects/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: int,
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
+    """Проект по ID. ETag считается по строке, при совпадении If-None-Match - 304 без сборки модели"""
     service = ProjectService(db)
-    project = await service.get_project(project_id)
-    if not project:
+    row = await service.get_project_row(project_id)
+    if row is None:
         raise HTTPException(status_code=404, detail="Проект не найден")
-    return project
+    etag = content_etag(*row.values())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(ProjectResponse, PROJECT_LIST.validate_row(row), headers={"ETag": etag})
 
 # Сценарии
 @app.post("/projects/{project_id}/scenarios/", response_model=ScenarioResponse)
@@ -115,15 +178,17 @@ async def create_scenario(
     db: AsyncSession = Depends(get_db)
 ):
     service = ScenarioService(db)
-    return await service.create_scenario(project_id, scenario)
+    created = await service.create_scenario(project_id, scenario)
+    await mark_write(consistency_key("project_id", project_id), consistency_key("scenario_id", created.id))
+    return json_response(ScenarioResponse, created)
 
 @app.get("/projects/{project_id}/scenarios/", response_model=List[ScenarioResponse])
 async def get_scenarios(
     project_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     service = ScenarioService(db)
-    return await service.get_scenarios(project_id)
+    return json_response(List[ScenarioResponse], await service.get_scenarios(project_id))
 
 @app.post("/projects/{project_id}/scenarios/generate/", response_model=List[ScenarioResponse])
 async def generate_scenarios(
@@ -132,7 +197,29 @@ async def generate_scenarios(
     db: AsyncSession = Depends(get_db)
 ):
     service = ScenarioService(db)
-    return await service.generate_scenarios(project_id, count)
+    generated = await service.generate_scenarios(project_id, count)
+    await mark_write(
+        consistency_key("project_id", project_id),
+        *(consistency_key("scenario_id", scenario.id) for scenario in generated)
+    )
+    return json_response(List[ScenarioResponse], generated)
+
+@app.post("/scenarios/generate-batch", response_model=List[ScenarioResponse])
+async def generate_scenarios_batch(
+    request: schemas.ScenarioBatchGenerate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Генерирует сценарии сразу для нескольких проектов одним запросом к базе"""
+    service = ScenarioService(db)
+    generated = await service.generate_scenarios_batch(request.project_ids, request.count)
+    await mark_write(
+        *(consistency_key("project_id", project_id) for project_id in generated),
+        *(consistency_key("scenario_id", scenario.id) for scenarios in generated.values() for scenario in scenarios)
+    )
+    return json_response(
+        List[ScenarioResponse],
+        [scenario for scenarios in generated.values() for scenario in scenarios]
+    )
 
 # Подрядчики
 @app.post("/contractors/", response_model=ContractorResponse)
@@ -141,16 +228,27 @@ async def create_contractor(
     db: AsyncSession = Depends(get_db)
 ):
     service = ContractorService(db)
-    return await service.create_contractor(contractor)
+    return json_response(ContractorResponse, await service.create_contractor(contractor))
 
 @app.get("/contractors/", response_model=List[ContractorResponse])
 async def get_contractors(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
+    """Список активных подрядчиков, новые первыми. Следующая страница - по курсору из X-Next-Cursor"""
+    # База нужна только при промахе кэша, а промах после записи не должен закэшировать
+    # на весь TTL страницу с отстающей реплики: кэш заполняется с primary
     service = ContractorService(db)
-    return await service.get_contractors(skip=skip, limit=limit)
+    page = await service.get_contractors_rendered(skip=skip, limit=limit, cursor=cursor)
+    headers = {"ETag": page.etag}
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if etag_matches(if_none_match, page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
 
 # Генерация PDF
 @app.post("/projects/{project_id}/generate-pdf/")
@@ -164,28 +262,32 @@ async def generate_pdf(
         raise HTTPException(status_code=404, detail="Проект не найден")
     return {"pdf_path": pdf_path, "message": "PDF успешно сгенерирован"}
 
-@app.get("/")
-async def root():
-    return {
-        "message": "TrendPulse AI API работает!",
-        "version": "3.0.0",
-        "description": "Цифровая экосистема девелопмента",
-        "endpoints": {
-            "scenarios": "/scenarios - Простые сценарии (для совместимости)",
-            "generate_scenarios": "/generate-scenarios - Генерация персонализированных сценариев",
-            "contractors": "/contractors - База подрядчиков",
-            "users": "/users - Управление пользователями",
-            "land_plots": "/land-plots - Управление участками",
-            "reports": "/reports - Генерация PDF отчетов",
-            "health": "/health - Проверка состояния",
-            "stats": "/stats - Статистика системы"
-        }
+ROOT_RESPONSE = StaticJSON({
+    "message": "TrendPulse AI API работает!",
+    "version": "3.0.0",
+    "description": "Цифровая экосистема девелопмента",
+    "endpoints": {
+        "scenarios": "/scenarios - Простые сценарии (для совместимости)",
+        "generate_scenarios": "/generate-scenarios - Генерация персонализированных сценариев",
+        "contractors": "/contractors - База подрядчиков",
+        "users": "/users - Управление пользователями",
+        "land_plots": "/land-plots - Управление участками",
+        "reports": "/reports - Генерация PDF отчетов",
+        "health": "/health - Проверка состояния",
+        "stats": "/stats - Статистика системы"
     }
+})
+
+@app.get("/")
+async def root(if_none_match: Optional[str] = Header(None)):
+    return ROOT_RESPONSE.response(if_none_match)
+
+LEGACY_SCENARIOS_RESPONSE = StaticJSON(test_scenarios, List[schemas.SimpleScenario])
 
 @app.get("/scenarios", response_model=List[schemas.SimpleScenario])
-async def get_scenarios():
+async def get_scenarios(if_none_match: Optional[str] = Header(None)):
     """Получить список простых сценариев (для обратной совместимости)"""
-    return test_scenarios
+    return LEGACY_SCENARIOS_RESPONSE.response(if_none_match)
 
 @app.post("/generate-scenarios", response_model=List[schemas.ScenarioResponse])
 async def generate_personalized_scenarios(
@@ -198,49 +300,32 @@ async def generate_personalized_scenarios(
     Это основной эндпоинт для создания сценариев с полной unit-экономикой,
     подбором подрядчиков и рекомендациями.
     """
+    telegram_id = user_request.telegram_id or 0
     try:
-        # Создаем или получаем пользователя
-        user = await crud.UserCRUD.get_or_create_user(
-            db, 
-            user_request.telegram_id if hasattr(user_request, 'telegram_id') else 0
-        )
-        
-        # Создаем земельный участок
-        land_plot = await crud.LandPlotCRUD.create_land_plot(
-            db, 
-            user.id, 
-            user_request.land_plot
-        )
-        
-        # Генерируем сценарии
-        scenarios = ScenarioService.generate_scenarios(
-            user_request.land_plot, 
-            user_request
-        )
-        
-        # Сохраняем сценарии в базу данных
-        saved_scenarios = []
-        for scenario in scenarios:
-            saved_scenario = await crud.ScenarioCRUD.create_scenario(
-                db, 
-                user.id, 
-                land_plot.id, 
-                scenario
-            )
-            saved_scenarios.append(saved_scenario)
-        
-        return saved_scenarios
-        
+        # Пользователь, участок и сценарии сохраняются одной транзакцией
+        service = ScenarioService(db)
+        user_id, saved_scenarios = await service.generate_for_request(telegram_id, user_request)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Некорректные параметры участка: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка генерации сценариев: {str(e)}")
+    
+    await mark_write(
+        consistency_key("telegram_id", telegram_id),
+        consistency_key("user_id", user_id),
+        *(consistency_key("project_id", scenario.project_id) for scenario in saved_scenarios),
+        *(consistency_key("scenario_id", scenario.id) for scenario in saved_scenarios)
+    )
+    return json_response(List[schemas.ScenarioResponse], saved_scenarios)
 
 @app.get("/users/{telegram_id}", response_model=schemas.UserResponse)
 async def get_user(telegram_id: int, db: AsyncSession = Depends(get_db)):
     """Получить пользователя по Telegram ID"""
-    user = await crud.UserCRUD.get_by_telegram_id(db, telegram_id)
+    # Карточка (и ее отсутствие) кэшируется в общем кэше: промах читается с primary, как у подрядчиков
+    user = await UserService(db).get_user_response(telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
-    return user
+    return json_response(schemas.UserResponse, user)
 
 @app.post("/users", response_model=schemas.UserResponse)
 async def create_user(
@@ -250,83 +335,145 @@ async def create_user(
     """Создать нового пользователя"""
     try:
         user = await crud.UserCRUD.create_user(db, **user_data.model_dump())
+        await mark_write(consistency_key("telegram_id", user.telegram_id))
         return user
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка создания пользователя: {str(e)}")
 
 @app.get("/users/{telegram_id}/scenarios", response_model=List[schemas.ScenarioResponse])
-async def get_user_scenarios(telegram_id: int, db: AsyncSession = Depends(get_db)):
-    """Получить все сценарии пользователя"""
-    user = await crud.UserCRUD.get_by_telegram_id(db, telegram_id)
-    if not user:
+async def get_user_scenarios(
+    telegram_id: int,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получить сценарии пользователя, новые первыми.
+    
+    Без cursor и limit - все сценарии, как до пагинации (на это рассчитаны старые клиенты).
+    С любым из них - страница по limit (по умолчанию 100), курсор следующей в X-Next-Cursor.
+    """
+    user_id = await crud.UserCRUD.get_user_id(db, telegram_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
-    scenarios = await crud.ScenarioCRUD.get_user_scenarios(db, user.id)
-    return scenarios
+    if limit is None and cursor is not None:
+        limit = 100
+    scenarios = await crud.ScenarioCRUD.get_user_scenarios(
+        db, user_id, skip=skip, limit=limit, cursor=cursor
+    )
+    return json_response(
+        List[schemas.ScenarioResponse],
+        [schemas.ScenarioResponse.model_validate(scenario) for scenario in scenarios],
+        headers=_next_cursor_headers(scenarios, limit) if limit is not None else None
+    )
 
 @app.get("/scenarios/{scenario_id}", response_model=schemas.ScenarioResponse)
-async def get_scenario(scenario_id: int, db: AsyncSession = Depends(get_db)):
-    """Получить сценарий по ID"""
-    scenario = await crud.ScenarioCRUD.get_scenario_by_id(db, scenario_id)
-    if not scenario:
+async def get_scenario(
+    scenario_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Получить сценарий по ID (с ETag, см. get_project)"""
+    row = await ScenarioService(db).get_scenario_row(scenario_id)
+    if row is None:
         raise HTTPException(status_code=404, detail="Сценарий не найден")
-    return scenario
+    etag = content_etag(*row.values())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(schemas.ScenarioResponse, SCENARIO_LIST.validate_row(row), headers={"ETag": etag})
 
-@app.post("/scenarios/{scenario_id}/generate-pdf")
+@app.post("/scenarios/{scenario_id}/generate-pdf", status_code=202, response_model=schemas.ReportJob)
 async def generate_pdf_report(
     scenario_id: int,
     report_type: str = "pre_feasibility",
-    db: AsyncSession = Depends(get_db),
-    background_tasks: BackgroundTasks = None
+    db: AsyncSession = Depends(get_db)
 ):
-    """Генерирует PDF отчет для сценария"""
+    """
+    Ставит PDF отчет для сценария в очередь и сразу возвращает задачу (202).
+    
+    Статус - GET /reports/jobs/{job_id}, готовый файл - по download_url задачи.
+    Если отчет с теми же данными уже есть, задача сразу в статусе done.
+    """
+    if report_type not in TEMPLATES:
+        raise HTTPException(status_code=400, detail="Неизвестный тип отчета")
+    
     try:
-        # Получаем сценарий
-        scenario = await crud.ScenarioCRUD.get_scenario_by_id(db, scenario_id)
-        if not scenario:
-            raise HTTPException(status_code=404, detail="Сценарий не найден")
-        
-        # Получаем данные участка и пользователя
-        land_plot = scenario.land_plot
-        user = scenario.user
-        
-        # Генерируем PDF
-        pdf_generator = PDFService()
-        
-        if report_type == "pre_feasibility":
-            pdf_path = pdf_generator.generate_pre_feasibility_report(
-                scenario_data=scenario.__dict__,
-                land_plot_data=land_plot.__dict__,
-                user_data=user.__dict__
-            )
-        elif report_type == "investment_memo":
-            pdf_path = pdf_generator.generate_investment_memo(
-                scenario_data=scenario.__dict__,
-                land_plot_data=land_plot.__dict__,
-                user_data=user.__dict__
-            )
-        else:
-            raise HTTPException(status_code=400, detail="Неизвестный тип отчета")
-        
-        # Сохраняем информацию об отчете в базу
-        report = await crud.ReportCRUD.create_report(
-            db, 
-            scenario_id, 
-            report_type, 
-            pdf_path,
-            os.path.getsize(pdf_path) if os.path.exists(pdf_path) else None
-        )
-        
-        return {
-            "message": "PDF отчет успешно сгенерирован",
-            "report_id": report.id,
-            "filename": os.path.basename(pdf_path),
-            "file_size": report.file_size,
-            "download_url": f"/downloads/{report.id}"
-        }
-        
+        job = await ReportJobService(db).submit(scenario_id, report_type)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка генерации PDF: {str(e)}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Сценарий не найден")
+    return json_response(
+        schemas.ReportJob, job, status_code=202, headers={"Location": f"/reports/jobs/{job.job_id}"}
+    )
+
+@app.post("/projects/{project_id}/reports.zip")
+async def generate_reports_archive(
+    project_id: int,
+    report_type: str = "pre_feasibility",
+    scenario_ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Отчеты по сценариям участка одним ZIP-архивом (все сценарии или scenario_ids).
+    
+    Готовые отчеты берутся без рендера, остальные рендерятся параллельно в пуле;
+    архив отдается потоком по мере готовности отчетов, без временного файла.
+    Отчеты, которые не удалось построить, перечислены в errors.txt внутри архива.
+    Чужие scenario_ids и больше REPORT_BATCH_MAX_SCENARIOS сценариев - 422 до начала архива.
+    """
+    if report_type not in TEMPLATES:
+        raise HTTPException(status_code=400, detail="Неизвестный тип отчета")
+    
+    service = ReportBatchService(db)
+    try:
+        jobs = await service.submit(project_id, report_type, scenario_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if jobs is None:
+        raise HTTPException(status_code=404, detail="Участок не найден")
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Сценарии не найдены")
+    return StreamingResponse(
+        service.archive(jobs),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="project_{project_id}_{report_type}.zip"'}
+    )
+
+@app.get("/reports/jobs/{job_id}", response_model=schemas.ReportJob)
+async def get_report_job(job_id: str):
+    """Статус задачи генерации отчета"""
+    job = await report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return json_response(schemas.ReportJob, job)
+
+@app.api_route("/downloads/{report_id}", methods=["GET", "HEAD"])
+async def download_report(report_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Скачать готовый PDF отчет: Range/If-Range для докачки, ETag для перепроверки,
+    при REPORTS_ACCEL_REDIRECT файл отдает прокси, из S3 - редирект на подписанную ссылку.
+    Читает из primary: запись только что создана задачей и на реплику могла не дойти.
+    """
+    report = await crud.ReportCRUD.get_report(db, report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Отчет не найден")
+    filename = f"{report.report_type}_{report.scenario_id}.pdf"
+    url = report_store.download_url(report.file_path, filename)
+    if url is not None:
+        # Отчет в бакете: клиент скачивает его напрямую (с Range), API байты не проксирует
+        await report_store.touch(db, report)
+        return RedirectResponse(url, status_code=302, headers={"Cache-Control": "no-store"})
+    if not os.path.exists(report.file_path):
+        raise HTTPException(status_code=404, detail="Отчет не найден")
+    stat_result = os.stat(report.file_path)
+    etag = content_etag(report.content_hash, stat_result.st_size, stat_result.st_mtime_ns)
+    await report_store.touch(db, report)
+    return file_download(
+        report.file_path, stat_result, etag, filename, request.method, request.headers, root=report_store.root
+    )
 
 @app.get("/reports/{report_id}", response_model=schemas.ReportResponse)
 async def get_report(report_id: int, db: AsyncSession = Depends(get_db)):
@@ -374,29 +521,46 @@ async def get_system_stats(db: AsyncSession = Depends(get_db)):
         "reports_generated": 320
     }
 
+@app.get("/stats/db-pool", response_model=schemas.DatabasePoolStats)
+async def get_db_pool_stats():
+    """Состояние пула соединений с базой данных"""
+    return {"pools": get_pool_stats()}
+
+@app.get("/stats/cache", response_model=schemas.CacheStatsResponse)
+async def get_cache_stats():
+    """Попадания и промахи in-process кэшей"""
+    return {"caches": cache_stats()}
+
+@app.get("/stats/pdf", response_model=schemas.PDFRenderStats)
+async def get_pdf_stats():
+    """Очередь и время рендера PDF"""
+    return pdf_pool.stats()
+
+API_INFO_RESPONSE = StaticJSON({
+    "name": "TrendPulse AI API",
+    "version": "3.0.0",
+    "description": "Цифровая экосистема девелопмента",
+    "capabilities": {
+        "scenario_generation": "Генерация персонализированных сценариев с unit-экономикой",
+        "contractor_matching": "Подбор подходящих подрядчиков",
+        "pdf_reports": "Генерация пред-ТЭО и инвестиционных меморандумов",
+        "recommendations": "Умные рекомендации для улучшения проектов",
+        "risk_assessment": "Оценка рисков и рыночного спроса",
+        "user_management": "Управление пользователями и их данными",
+        "analytics": "Статистика и аналитика системы"
+    },
+    "supported_project_types": [pt.value for pt in ProjectType],
+    "supported_infrastructure": [it.value for it in InfrastructureType],
+    "supported_zones": [zt.value for zt in ZoneType],
+    "database": "PostgreSQL с async поддержкой",
+    "pdf_generation": "WeasyPrint + Jinja2",
+    "architecture": "FastAPI + SQLAlchemy + aiogram"
+})
+
 @app.get("/api-info")
-async def api_info():
+async def api_info(if_none_match: Optional[str] = Header(None)):
     """Информация о возможностях API"""
-    return {
-        "name": "TrendPulse AI API",
-        "version": "3.0.0",
-        "description": "Цифровая экосистема девелопмента",
-        "capabilities": {
-            "scenario_generation": "Генерация персонализированных сценариев с unit-экономикой",
-            "contractor_matching": "Подбор подходящих подрядчиков",
-            "pdf_reports": "Генерация пред-ТЭО и инвестиционных меморандумов",
-            "recommendations": "Умные рекомендации для улучшения проектов",
-            "risk_assessment": "Оценка рисков и рыночного спроса",
-            "user_management": "Управление пользователями и их данными",
-            "analytics": "Статистика и аналитика системы"
-        },
-        "supported_project_types": [pt.value for pt in ProjectType],
-        "supported_infrastructure": [it.value for it in InfrastructureType],
-        "supported_zones": [zt.value for zt in ZoneType],
-        "database": "PostgreSQL с async поддержкой",
-        "pdf_generation": "WeasyPrint + Jinja2",
-        "architecture": "FastAPI + SQLAlchemy + aiogram"
-    }
+    return API_INFO_RESPONSE.response(if_none_match)
 
 if __name__ == "__main__":
     uvicorn.run(
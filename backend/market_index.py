@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from types import MappingProxyType
+from typing import List, Mapping, NamedTuple, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import SharedCache
+from .models import MarketData
+
+logger = logging.getLogger(__name__)
+
+# Как часто (секунды) перечитывать индекс, даже если в этом процессе market_data не менялась:
+# записи из других воркеров видны не позже этого интервала
+MARKET_INDEX_REFRESH_INTERVAL = float(os.getenv("MARKET_INDEX_REFRESH_INTERVAL", "300"))
+
+
+class MarketSnapshot(NamedTuple):
+    """Рыночные данные для пары (регион, тип проекта)"""
+    region: str
+    project_type: str
+    construction_cost: Optional[float]
+    rental_rate: Optional[float]
+    vacancy_rate: Optional[float]
+    demand_score: Optional[float]
+
+
+def normalize_region(region: Optional[str]) -> str:
+    """Регион для сравнения: " Москва", "москва" и "МОСКВА" - один регион"""
+    return (region or "").strip().lower()
+
+
+_ROWS = TypeAdapter(List[MarketSnapshot])
+
+# Строки market_data в общем кэше: после сброса таблицу из базы читает один воркер, остальные берут готовое
+market_cache = SharedCache("market_data", MARKET_INDEX_REFRESH_INTERVAL)
+
+
+class MarketIndexState(NamedTuple):
+    """Неизменяемое состояние индекса: читатели держат ссылку на один снимок целиком"""
+    version: str
+    loaded_at: float
+    entries: Mapping[Tuple[str, str], MarketSnapshot]
+
+    def lookup(self, region: Optional[str], project_type: Optional[str]) -> Optional[MarketSnapshot]:
+        return self.entries.get((normalize_region(region), project_type))
+
+
+_EMPTY = MarketIndexState("", 0.0, MappingProxyType({}))
+
+
+class MarketDataIndex:
+    """
+    Таблица market_data целиком в памяти, ключ - (region, project_type);
+    регион сравнивается без учета регистра и пробелов по краям.
+
+    Перезагрузка строит новый снимок и подменяет ссылку одним присваиванием,
+    поэтому чтение не блокируется и никогда не видит наполовину обновленный индекс.
+    Версия - хэш содержимого, одинаковая во всех воркерах с одинаковыми данными.
+    """
+
+    name = "market_data"
+
+    def __init__(self, refresh_interval: float = MARKET_INDEX_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._state = _EMPTY
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self.reloads = 0
+
+    @property
+    def version(self) -> str:
+        return self._state.version
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not _EMPTY
+
+    def get(self, region: Optional[str], project_type: Optional[str]) -> Optional[MarketSnapshot]:
+        return self._state.lookup(region, project_type)
+
+    def snapshot(self) -> MarketIndexState:
+        return self._state
+
+    def __len__(self):
+        return len(self._state.entries)
+
+    def clear(self):
+        """Пометить индекс устаревшим: следующий ensure_fresh перечитает таблицу"""
+        self._stale = True
+        market_cache.clear()
+
+    def needs_refresh(self) -> bool:
+        return self._stale or time.monotonic() - self._state.loaded_at >= self.refresh_interval
+
+    async def refresh(self, db: AsyncSession) -> MarketIndexState:
+        """Прочитать market_data и атомарно подменить снимок"""
+        # Сбрасываем флаг до чтения: инвалидация во время запроса не потеряется
+        self._stale = False
+        async def load() -> List[MarketSnapshot]:
+            result = await db.execute(
+                select(
+                    MarketData.region, MarketData.project_type, MarketData.construction_cost,
+                    MarketData.rental_rate, MarketData.vacancy_rate, MarketData.demand_score
+                ).order_by(MarketData.id)
+            )
+            return [MarketSnapshot(*row) for row in result.all()]
+
+        try:
+            rows = await market_cache.get_or_load_model("rows", load, _ROWS)
+        except Exception:
+            self._stale = True
+            raise
+        # При дублях пары (region, project_type) побеждает последняя запись
+        entries = {(normalize_region(row.region), row.project_type): row for row in rows}
+
+        digest = hashlib.blake2b(digest_size=8)
+        for key in sorted(entries):
+            digest.update(repr(entries[key]).encode())
+
+        self._state = MarketIndexState(digest.hexdigest(), time.monotonic(), MappingProxyType(entries))
+        self.reloads += 1
+        logger.info("Индекс рыночных данных загружен: %d записей, версия %s", len(entries), self._state.version)
+        return self._state
+
+    async def ensure_fresh(self, db: AsyncSession) -> MarketIndexState:
+        """Снимок индекса; к базе обращается только после инвалидации или по интервалу"""
+        if self.needs_refresh():
+            async with self._lock:
+                if self.needs_refresh():
+                    await self.refresh(db)
+        return self._state
+
+
+market_index = MarketDataIndex()
+
+
+def demand_level(demand_score: Optional[float]) -> Optional[str]:
+    """Оценка спроса (0..1) в уровень спроса сценария"""
+    if demand_score is None:
+        return None
+    if demand_score >= 0.7:
+        return "high"
+    if demand_score >= 0.4:
+        return "medium"
+    return "low"
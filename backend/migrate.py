@@ -0,0 +1,115 @@
+"""
+Применение миграций схемы базы данных.
+
+Схемой владеют миграции Alembic (backend/migrations), API воркеры DDL не выполняют.
+Запускается один раз перед стартом воркеров:
+
+    python -m backend.migrate            # применить все миграции
+    python -m backend.migrate --check    # проверить, что схема актуальна
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional, Set, Tuple
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from .database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# Ревизия, соответствующая схеме, которую раньше создавал create_all при старте
+BASELINE_REVISION = "0001"
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Конфигурация Alembic для указанной базы"""
+    config = Config(ALEMBIC_INI)
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+def head_revision() -> str:
+    """Последняя ревизия в каталоге миграций"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def _inspect_schema(connection) -> Tuple[Set[str], Optional[str]]:
+    tables = set(inspect(connection).get_table_names())
+    revision = MigrationContext.configure(connection).get_current_revision()
+    return tables, revision
+
+async def current_revision(engine: AsyncEngine) -> Optional[str]:
+    """Текущая ревизия схемы в базе"""
+    async with engine.connect() as conn:
+        _, revision = await conn.run_sync(_inspect_schema)
+    return revision
+
+async def _schema_state(url: str) -> Tuple[Set[str], Optional[str]]:
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            return await conn.run_sync(_inspect_schema)
+    finally:
+        await engine.dispose()
+
+def upgrade(url: Optional[str] = None, revision: str = "head"):
+    """Применить миграции до указанной ревизии"""
+    url = url or DATABASE_URL
+    config = alembic_config(url)
+    tables, current = asyncio.run(_schema_state(url))
+
+    # База создана старым create_all: помечаем исходную ревизию вместо повторного создания таблиц
+    if current is None and "users" in tables:
+        logger.info("Найдена схема без версии, помечаем ревизию %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, revision)
+
+async def check_schema(engine: AsyncEngine) -> bool:
+    """Проверить при старте API, что схема в базе соответствует последней миграции"""
+    try:
+        current = await current_revision(engine)
+    except Exception as e:
+        logger.warning("Не удалось проверить версию схемы: %s", e)
+        return False
+
+    head = head_revision()
+    if current != head:
+        logger.warning(
+            "Схема базы данных устарела (%s, ожидается %s). Выполните: python -m backend.migrate",
+            current, head
+        )
+        return False
+    return True
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Миграции базы данных TrendPulse AI")
+    parser.add_argument("--url", help="URL базы данных (по умолчанию DATABASE_URL)")
+    parser.add_argument("--revision", default="head", help="Целевая ревизия")
+    parser.add_argument("--check", action="store_true", help="Только проверить версию схемы")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    url = args.url or DATABASE_URL
+
+    if args.check:
+        _, current = asyncio.run(_schema_state(url))
+        head = head_revision()
+        print(f"Текущая ревизия: {current}, последняя: {head}")
+        return 0 if current == head else 1
+
+    upgrade(url, args.revision)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Исходная схема (ранее создавалась через Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('telegram_id', sa.Integer(), nullable=True),
+        sa.Column('username', sa.String(length=100), nullable=True),
+        sa.Column('first_name', sa.String(length=100), nullable=True),
+        sa.Column('last_name', sa.String(length=100), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('email', sa.String(length=100), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_telegram_id', 'users', ['telegram_id'], unique=True)
+
+    op.create_table(
+        'projects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('project_type', sa.String(length=100), nullable=False),
+        sa.Column('location', sa.String(length=200), nullable=True),
+        sa.Column('budget', sa.Float(), nullable=True),
+        sa.Column('area', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_projects_id', 'projects', ['id'])
+
+    op.create_table(
+        'scenarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('roi', sa.Float(), nullable=True),
+        sa.Column('estimated_cost', sa.Float(), nullable=True),
+        sa.Column('construction_time', sa.String(length=100), nullable=True),
+        sa.Column('risk_level', sa.String(length=50), nullable=True),
+        sa.Column('market_demand', sa.String(length=50), nullable=True),
+        sa.Column('regulatory_complexity', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_scenarios_id', 'scenarios', ['id'])
+
+    op.create_table(
+        'contractors',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('specialization', sa.String(length=200), nullable=False),
+        sa.Column('experience_years', sa.Integer(), nullable=True),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('contact_phone', sa.String(length=20), nullable=True),
+        sa.Column('contact_email', sa.String(length=100), nullable=True),
+        sa.Column('website', sa.String(length=200), nullable=True),
+        sa.Column('location', sa.String(length=200), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('projects_completed', sa.Integer(), nullable=True),
+        sa.Column('average_rating', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('additional_info', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_contractors_id', 'contractors', ['id'])
+
+    op.create_table(
+        'reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scenario_id', sa.Integer(), nullable=True),
+        sa.Column('report_type', sa.String(length=100), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['scenario_id'], ['scenarios.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reports_id', 'reports', ['id'])
+
+    op.create_table(
+        'user_sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('telegram_id', sa.Integer(), nullable=True),
+        sa.Column('state', sa.String(length=100), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_user_sessions_id', 'user_sessions', ['id'])
+    op.create_index('ix_user_sessions_telegram_id', 'user_sessions', ['telegram_id'], unique=True)
+
+    op.create_table(
+        'market_data',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('region', sa.String(length=200), nullable=False),
+        sa.Column('project_type', sa.String(length=100), nullable=False),
+        sa.Column('construction_cost', sa.Float(), nullable=True),
+        sa.Column('rental_rate', sa.Float(), nullable=True),
+        sa.Column('vacancy_rate', sa.Float(), nullable=True),
+        sa.Column('demand_score', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_market_data_id', 'market_data', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('market_data')
+    op.drop_table('user_sessions')
+    op.drop_table('reports')
+    op.drop_table('contractors')
+    op.drop_table('scenarios')
+    op.drop_table('projects')
+    op.drop_table('users')
@@ -0,0 +1,41 @@
+"""Индексы для частых фильтров списочных запросов
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, таблица, колонки)
+INDEXES = [
+    ('ix_scenarios_project_id', 'scenarios', ['project_id']),
+    ('ix_projects_user_id', 'projects', ['user_id']),
+    ('ix_contractors_is_active_specialization', 'contractors', ['is_active', 'specialization']),
+    ('ix_market_data_region_project_type', 'market_data', ['region', 'project_type']),
+    ('ix_reports_scenario_id', 'reports', ['scenario_id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в растущие таблицы, но требует выполнения вне транзакции.
+    # IF NOT EXISTS - на случай, если индекс уже создан вручную или прерванным запуском
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""Индексы (created_at, id) для keyset-пагинации списков
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, таблица, колонки)
+INDEXES = [
+    ('ix_projects_created_at_id', 'projects', ['created_at', 'id']),
+    ('ix_projects_user_id_created_at_id', 'projects', ['user_id', 'created_at', 'id']),
+    ('ix_contractors_is_active_created_at_id', 'contractors', ['is_active', 'created_at', 'id']),
+    ('ix_scenarios_created_at_id', 'scenarios', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""Хэш содержимого отчета для повторного использования PDF
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Колонка без значения по умолчанию: старые отчеты остаются с NULL, таблица не переписывается.
+    # В базах, созданных create_all по текущим моделям, колонка уже есть
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('reports')}
+    if 'content_hash' not in columns:
+        op.add_column('reports', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_reports_content_hash', 'reports', ['content_hash'], unique=True,
+                        if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reports_content_hash', table_name='reports', if_exists=True,
+                      postgresql_concurrently=True)
+    op.drop_column('reports', 'content_hash')
@@ -0,0 +1,31 @@
+"""Время последнего скачивания отчета для очистки каталога отчетов
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable без значения по умолчанию: таблица не переписывается, для старых отчетов
+    # очистка считает временем последнего использования created_at.
+    # В базах, созданных create_all по текущим моделям, колонка уже есть
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('reports')}
+    if 'last_accessed_at' not in columns:
+        op.add_column('reports', sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('reports', 'last_accessed_at')
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -70,9 +70,13 @@ class User(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     project_type = Column(String(100), nullable=False)  # residential, commercial, mixed
@@ -88,9 +92,12 @@ class Project(Base):
 
 class Scenario(Base):
     __tablename__ = "scenarios"
+    __table_args__ = (
+        Index("ix_scenarios_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     roi = Column(Float, nullable=True)  # Return on Investment
@@ -106,6 +113,10 @@ class Scenario(Base):
 
 class Contractor(Base):
     __tablename__ = "contractors"
+    __table_args__ = (
+        Index("ix_contractors_is_active_specialization", "is_active", "specialization"),
+        Index("ix_contractors_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
@@ -168,13 +179,20 @@ class UserRequest(BaseModel):
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_content_hash", "content_hash", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    scenario_id = Column(Integer, ForeignKey("scenarios.id"))
+    scenario_id = Column(Integer, ForeignKey("scenarios.id"), index=True)
     report_type = Column(String(100), nullable=False)  # pdf, excel, etc.
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer, nullable=True)
+    # sha256 от данных сценария, участка, типа отчета и версии шаблона; одинаковые отчеты не рендерятся повторно
+    content_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Последнее скачивание (с точностью до часа): очистка каталога удаляет давно не скачанные отчеты
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
     
     scenario = relationship("Scenario", back_populates="reports")
 
@@ -190,6 +208,9 @@ class UserSession(Base):
 
 class MarketData(Base):
     __tablename__ = "market_data"
+    __table_args__ = (
+        Index("ix_market_data_region_project_type", "region", "project_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     region = Column(String(200), nullable=False)
@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Заголовок ответа с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Курсор пагинации поврежден или создан не этим API"""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Непрозрачный курсор по ключу (created_at, id)"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Разобрать курсор, полученный от клиента"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Некорректный курсор пагинации") from e
+
+
+class KeysetTime(FunctionElement):
+    """Время создания в ключе пагинации: в PostgreSQL - сама колонка"""
+    name = "keyset_time"
+    inherit_cache = True
+
+
+@compiles(KeysetTime)
+def _keyset_time(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(KeysetTime, "sqlite")
+def _keyset_time_sqlite(element, compiler, **kw):
+    # SQLite хранит время текстом: CURRENT_TIMESTAMP без долей секунды, ORM - с ними.
+    # Текстовое сравнение таких строк не совпадает с порядком времени, поэтому сравниваем числа
+    return f"julianday({compiler.process(element.clauses, **kw)})"
+
+
+def keyset_order(query, model):
+    """Порядок выдачи для keyset-пагинации: сначала новые записи"""
+    return query.order_by(KeysetTime(model.created_at).desc(), model.id.desc())
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int):
+    """Страница после курсора: WHERE (created_at, id) < курсор, стоимость не зависит от глубины"""
+    query = keyset_order(query, model)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Значение курсора привязывается с типом колонки, а не как строка isoformat()
+        bound = KeysetTime(literal(created_at, model.created_at.type))
+        query = query.where(tuple_(KeysetTime(model.created_at), model.id) < tuple_(bound, row_id))
+    return query.limit(limit)
+
+
+def next_cursor(items: Sequence, limit: int) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница неполная"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if last.created_at is None:
+        return None
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from .cache import CACHE_KEY_PREFIX, get_backend
+from .schemas import ReportJob
+
+# Сколько секунд хранится статус задачи генерации отчета
+REPORT_JOB_TTL = float(os.getenv("REPORT_JOB_TTL", "86400"))
+# Привязка хэша отчета к выполняющейся задаче: дольше любого рендера вместе с ожиданием в очереди
+CLAIM_TTL = 600.0
+# Как часто перечитывается статус задачи, которую ждет запрос
+WAIT_POLL_INTERVAL = 0.25
+
+QUEUED = "queued"
+RENDERING = "rendering"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE = (QUEUED, RENDERING)
+PROGRESS = {QUEUED: 0.0, RENDERING: 0.5, DONE: 1.0, FAILED: 1.0}
+
+
+def new_job(job_id: str, scenario_id: int, report_type: str) -> ReportJob:
+    now = datetime.now(timezone.utc)
+    return ReportJob(
+        job_id=job_id, status=QUEUED, progress=PROGRESS[QUEUED], scenario_id=scenario_id,
+        report_type=report_type, created_at=now, updated_at=now
+    )
+
+
+class ReportJobStore:
+    """
+    Статусы задач генерации отчетов в общем хранилище кэша (memory или redis).
+
+    С redis статус виден любому воркеру API, а одинаковые отчеты, запрошенные
+    одновременно, рендерит одна задача: хэш содержимого закрепляется за ней через SET NX.
+    """
+
+    name = "report_jobs"
+
+    def __init__(self, ttl: float = REPORT_JOB_TTL, backend=None):
+        self.ttl = ttl
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _key(self, job_id: str) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:{job_id}"
+
+    def _claim_key(self, content_hash: str) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:~hash:{content_hash}"
+
+    async def get(self, job_id: str) -> Optional[ReportJob]:
+        data = (await self.backend.get_many([self._key(job_id)]))[0]
+        return ReportJob.model_validate_json(data) if data is not None else None
+
+    async def save(self, job: ReportJob, **changes) -> ReportJob:
+        """Сохранить задачу; changes - новые значения полей (статус, ID отчета, ошибка)"""
+        if changes:
+            if "status" in changes:
+                changes.setdefault("progress", PROGRESS[changes["status"]])
+            job = job.model_copy(update={**changes, "updated_at": datetime.now(timezone.utc)})
+        await self.backend.set(self._key(job.job_id), job.model_dump_json().encode(), self.ttl)
+        return job
+
+    async def discard(self, job_id: str):
+        await self.backend.delete(self._key(job_id))
+
+    async def claim(self, content_hash: str, job_id: str) -> Optional[ReportJob]:
+        """
+        Закрепить хэш за задачей; если его уже рендерит другая задача - вернуть ее.
+        Задача должна быть сохранена до вызова: иначе конкурент не найдет владельца хэша.
+        """
+        key = self._claim_key(content_hash)
+        while not await self.backend.add(key, job_id.encode(), CLAIM_TTL):
+            owner = (await self.backend.get_many([key]))[0]
+            if owner is None:
+                continue
+            job = await self.get(owner.decode())
+            if job is not None and job.status in ACTIVE:
+                return job
+            # Задача-владелец уже закончилась или пропала: снимаем ее привязку,
+            # если хэш тем временем не перехватила другая задача, и пробуем снова
+            await self.backend.delete_if(key, owner)
+        return None
+
+    async def wait(self, job: ReportJob, timeout: float = CLAIM_TTL) -> ReportJob:
+        """
+        Дождаться завершения задачи, в том числе идущей в другом воркере.
+        Задача, пропавшая из хранилища или не закончившаяся за timeout, возвращается как failed.
+        """
+        deadline = time.monotonic() + timeout
+        while job.status in ACTIVE:
+            if time.monotonic() > deadline:
+                return job.model_copy(update={"status": FAILED, "error": "Превышено время ожидания отчета"})
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+            current = await self.get(job.job_id)
+            if current is None:
+                return job.model_copy(update={"status": FAILED, "error": "Задача не найдена"})
+            job = current
+        return job
+
+    async def release(self, content_hash: str, job_id: str):
+        """Снять привязку хэша, если она все еще принадлежит этой задаче"""
+        await self.backend.delete_if(self._claim_key(content_hash), job_id.encode())
+
+
+report_jobs = ReportJobStore()
@@ -0,0 +1,146 @@
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+
+import anyio
+
+from . import reports
+from .s3 import ObjectInfo, S3Client
+
+# Где лежат PDF-отчеты: local - каталог REPORTS_DIR, s3 - бакет S3-совместимого хранилища
+REPORTS_STORAGE = os.getenv("REPORTS_STORAGE", "local")
+S3_REPORTS_BUCKET = os.getenv("S3_REPORTS_BUCKET", "reports")
+# Префикс ключей отчетов в бакете
+S3_REPORTS_PREFIX = os.getenv("S3_REPORTS_PREFIX", "reports/")
+# Срок действия ссылки на скачивание отчета (секунды)
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "900"))
+
+S3_SCHEME = "s3://"
+# Блок чтения файла отчета при отдаче через API
+READ_CHUNK_SIZE = 64 * 1024
+# Служебные подкаталоги REPORTS_DIR, которые не относятся к файлам отчетов
+SERVICE_DIRS = ("tmp", "projects")
+
+
+def normalize(location: str) -> str:
+    """Один и тот же файл - одна строка: для сверки записей reports с листингом хранилища"""
+    return location if location.startswith(S3_SCHEME) else os.path.abspath(location)
+
+
+class LocalStorage:
+    """Отчеты в каталоге REPORTS_DIR; location - путь к файлу"""
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root or reports.REPORTS_DIR
+
+    def owns(self, location: str) -> bool:
+        return not location.startswith(S3_SCHEME)
+
+    def location(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def put_file(self, path: str, location: str, content_type: str) -> int:
+        """Перенести готовый файл на место: переименование в пределах одной файловой системы атомарно"""
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        os.replace(path, location)
+        return os.path.getsize(location)
+
+    async def size(self, location: str) -> Optional[int]:
+        try:
+            return os.path.getsize(location)
+        except OSError:
+            return None
+
+    async def read(self, location: str) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(location, "rb") as f:
+            while True:
+                chunk = await f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    async def delete(self, location: str):
+        try:
+            os.remove(location)
+        except FileNotFoundError:
+            pass
+
+    async def list(self) -> Dict[str, ObjectInfo]:
+        """Все файлы отчетов с размером и временем изменения (без служебных подкаталогов)"""
+        files = {}
+        for directory, subdirs, names in os.walk(self.root):
+            if directory == self.root:
+                subdirs[:] = [name for name in subdirs if name not in SERVICE_DIRS]
+            for name in names:
+                path = os.path.abspath(os.path.join(directory, name))
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    # Файл удален параллельно
+                    continue
+                files[path] = ObjectInfo(
+                    stat_result.st_size, datetime.fromtimestamp(stat_result.st_mtime, timezone.utc)
+                )
+        return files
+
+    def download_url(self, location: str, filename: str) -> Optional[str]:
+        # Файл отдает сам API (или nginx по X-Accel-Redirect)
+        return None
+
+
+class S3Storage:
+    """
+    Отчеты в бакете S3-совместимого хранилища; location - s3://<bucket>/<key>.
+    Файлы загружаются по частям, скачиваются клиентом напрямую по подписанной ссылке.
+    """
+
+    name = "s3"
+
+    def __init__(self, client: S3Client, bucket: str = S3_REPORTS_BUCKET, prefix: str = S3_REPORTS_PREFIX,
+                 presign_expires: int = S3_PRESIGN_EXPIRES):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.presign_expires = presign_expires
+
+    def owns(self, location: str) -> bool:
+        return location.startswith(f"{S3_SCHEME}{self.bucket}/")
+
+    def location(self, key: str) -> str:
+        return f"{S3_SCHEME}{self.bucket}/{self.prefix}{key}"
+
+    def _key(self, location: str) -> str:
+        return location[len(f"{S3_SCHEME}{self.bucket}/"):]
+
+    async def put_file(self, path: str, location: str, content_type: str) -> int:
+        return await self.client.upload_file(path, self.bucket, self._key(location), content_type)
+
+    async def size(self, location: str) -> Optional[int]:
+        return await self.client.head_object(self.bucket, self._key(location))
+
+    def read(self, location: str) -> AsyncIterator[bytes]:
+        return self.client.iter_object(self.bucket, self._key(location), READ_CHUNK_SIZE)
+
+    async def delete(self, location: str):
+        await self.client.delete_object(self.bucket, self._key(location))
+
+    async def list(self) -> Dict[str, ObjectInfo]:
+        objects = await self.client.list_objects(self.bucket, self.prefix)
+        return {f"{S3_SCHEME}{self.bucket}/{key}": info for key, info in objects.items()}
+
+    def download_url(self, location: str, filename: str) -> Optional[str]:
+        return self.client.presigned_url(self.bucket, self._key(location), self.presign_expires, filename)
+
+
+def create_storage(kind: str = REPORTS_STORAGE):
+    if kind == "local":
+        return LocalStorage()
+    if kind == "s3":
+        return S3Storage(S3Client.from_settings())
+    raise ValueError(f"Неизвестный REPORTS_STORAGE: {kind}")
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import CACHE_KEY_PREFIX, get_backend
+from .models import Report
+from .report_storage import REPORTS_STORAGE, SERVICE_DIRS, LocalStorage, create_storage, normalize
+
+logger = logging.getLogger(__name__)
+
+# Предельный объем PDF-отчетов на диске (МБ); сверх него удаляются давно не скачанные. 0 - без лимита
+REPORTS_MAX_MB = int(os.getenv("REPORTS_MAX_MB", "5120"))
+# Через сколько секунд без скачиваний отчет удаляется; 0 - не удалять по возрасту
+REPORTS_MAX_AGE = float(os.getenv("REPORTS_MAX_AGE", str(30 * 86400)))
+# Интервал очистки каталога отчетов (секунды); 0 - фоновая очистка выключена
+REPORTS_SWEEP_INTERVAL = float(os.getenv("REPORTS_SWEEP_INTERVAL", "3600"))
+
+# Время последнего скачивания пишется в базу не чаще раза в этот интервал: для LRU точнее не нужно
+TOUCH_INTERVAL = timedelta(hours=1)
+# Недописанные и ничьи файлы старше этого возраста удаляются: дольше любого рендера
+ORPHAN_TTL = 3600.0
+
+STAGING_DIR, PROJECTS_DIR = SERVICE_DIRS
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite возвращает время без зоны (CURRENT_TIMESTAMP в UTC), PostgreSQL - с зоной
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def last_used(report: Report) -> datetime:
+    """Момент последнего скачивания отчета, для нескачанных - создания"""
+    return _as_utc(report.last_accessed_at) or _as_utc(report.created_at) or datetime.now(timezone.utc)
+
+
+class ReportStore:
+    """
+    Файлы отчетов: раскладка, атомарная запись и очистка.
+
+    PDF лежат по хэшу содержимого с подкаталогом по его первым двум символам (ab/abcd....pdf)
+    в хранилище REPORTS_STORAGE: каталоге REPORTS_DIR или бакете S3. Рендер пишет файл
+    в <REPORTS_DIR>/tmp, готовый файл атомарно переименовывается или загружается в бакет.
+    Фоновая очистка держит отчеты в пределах объема и возраста, удаляя те, которые дольше
+    всех не скачивали, вместе с их записями в reports.
+    """
+
+    name = "report_store"
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = REPORTS_MAX_MB * 1024 * 1024,
+                 max_age: float = REPORTS_MAX_AGE, backend=None, storage=None):
+        self.local = LocalStorage(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._backend = backend
+        self._storage = storage
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @property
+    def root(self) -> str:
+        """Локальный каталог: временные файлы, сводки проектов и отчеты при REPORTS_STORAGE=local"""
+        return self.local.root
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    @property
+    def storage(self):
+        """Хранилище новых отчетов (создается при первом обращении)"""
+        if self._storage is None:
+            self._storage = self.local if REPORTS_STORAGE == "local" else create_storage()
+        return self._storage
+
+    def storage_for(self, location: str):
+        """Хранилище, в котором лежит файл: старые отчеты остаются на диске после перехода на S3"""
+        return self.storage if self.storage.owns(location) else self.local
+
+    def path(self, content_hash: str) -> str:
+        """Расположение PDF по хэшу содержимого"""
+        return self.storage.location(f"{content_hash[:2]}/{content_hash}.pdf")
+
+    def project_summary_path(self, project_id: int) -> str:
+        """Путь к текстовой сводке проекта: одна на проект, перезаписывается"""
+        return os.path.join(self.root, PROJECTS_DIR, f"project_{project_id}.txt")
+
+    def staging_path(self, suffix: str = ".pdf") -> str:
+        """Временный файл в каталоге отчетов: та же файловая система, что и у готовых файлов"""
+        staging = os.path.join(self.root, STAGING_DIR)
+        os.makedirs(staging, exist_ok=True)
+        return os.path.join(staging, f"{uuid.uuid4().hex}{suffix}")
+
+    async def save(self, location: str, write: Callable[[str], Awaitable[Any]],
+                   content_type: str = "application/pdf") -> int:
+        """
+        Записать файл через write(tmp_path) и переложить в location: переименованием
+        на диске или загрузкой в бакет. Читатели не видят недописанный файл.
+        Возвращает размер файла.
+        """
+        tmp_path = self.staging_path(os.path.splitext(location)[1])
+        try:
+            await write(tmp_path)
+            return await self.storage_for(location).put_file(tmp_path, location, content_type)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def exists(self, location: str) -> bool:
+        return await self.storage_for(location).size(location) is not None
+
+    def read(self, location: str) -> AsyncIterator[bytes]:
+        """Содержимое файла блоками (для ответов, которые собирает сам API)"""
+        return self.storage_for(location).read(location)
+
+    def download_url(self, location: str, filename: str) -> Optional[str]:
+        """Подписанная ссылка на скачивание; None - файл отдает сам API"""
+        return self.storage_for(location).download_url(location, filename)
+
+    def needs_touch(self, report: Report) -> bool:
+        return datetime.now(timezone.utc) - last_used(report) > TOUCH_INTERVAL
+
+    async def touch(self, db: AsyncSession, report: Report):
+        """Отметить скачивание отчета (не чаще TOUCH_INTERVAL)"""
+        if self.needs_touch(report):
+            report.last_accessed_at = datetime.now(timezone.utc)
+            await db.commit()
+
+    async def sweep(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Очистка отчетов:
+        - записи без файлов удаляются, file_size сверяется с хранилищем;
+        - отчеты, которые не скачивали дольше max_age, удаляются;
+        - пока объем больше max_bytes, удаляются дольше всех не скачанные;
+        - удаляются недописанные файлы и файлы без записей старше ORPHAN_TTL.
+        Размеры берутся одним листингом хранилища, а не запросом на каждый отчет.
+        """
+        now = datetime.now(timezone.utc)
+        listing = await self.local.list()
+        if self.storage is not self.local:
+            listing.update(await self.storage.list())
+
+        result = await db.execute(select(Report))
+        rows = sorted(result.scalars().all(), key=last_used)
+
+        missing, evict, kept = [], [], []
+        for report in rows:
+            info = listing.get(normalize(report.file_path))
+            if info is None:
+                missing.append(report)
+                continue
+            if report.file_size != info.size:
+                report.file_size = info.size
+            if self.max_age and (now - last_used(report)).total_seconds() > self.max_age:
+                evict.append(report)
+            else:
+                kept.append(report)
+
+        total = sum(report.file_size for report in kept)
+        if self.max_bytes:
+            # kept отсортирован от давно не скачанных к недавним
+            while kept and total > self.max_bytes:
+                report = kept.pop(0)
+                total -= report.file_size
+                evict.append(report)
+
+        # Сначала удаляются записи, потом файлы: запись без файла не появится, а файл
+        # без записи (если процесс прервется) удалит следующая очистка
+        doomed = missing + evict
+        evicted = [report.file_path for report in evict]
+        freed = sum(report.file_size for report in evict)
+        known = {normalize(report.file_path) for report in rows}
+        if doomed:
+            await db.execute(delete(Report).where(Report.id.in_([report.id for report in doomed])))
+        await db.commit()
+        for location in evicted:
+            await self.storage_for(location).delete(location)
+
+        # Файл без записи моложе ORPHAN_TTL может быть только что загруженным отчетом, запись о котором еще не сохранена
+        orphans = 0
+        for location, info in listing.items():
+            if location not in known and (now - info.last_modified).total_seconds() > ORPHAN_TTL:
+                await self.storage_for(location).delete(location)
+                orphans += 1
+        orphans += self._remove_stale(os.path.join(self.root, STAGING_DIR), ORPHAN_TTL, now.timestamp())
+        # Сводки проектов перезаписываются и не попадают в reports: удаляются только по возрасту
+        orphans += self._remove_stale(os.path.join(self.root, PROJECTS_DIR), self.max_age, now.timestamp())
+
+        stats = {
+            "reports": len(kept),
+            "bytes": total,
+            "evicted": len(evict),
+            "freed_bytes": freed,
+            "missing": len(missing),
+            "orphans": orphans,
+        }
+        if evict or missing or orphans:
+            logger.info("Очистка отчетов: %s", stats)
+        return stats
+
+    @staticmethod
+    def _remove_stale(directory: str, ttl: float, now: float) -> int:
+        """Удалить файлы каталога старше ttl секунд"""
+        if not ttl or not os.path.isdir(directory):
+            return 0
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if now - os.path.getmtime(path) > ttl:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                # Файл переименован или удален параллельно
+                pass
+        return removed
+
+    def _lock_key(self) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:~sweep"
+
+    async def _sweep_loop(self, session_factory, interval: float):
+        while True:
+            try:
+                # С redis очистку за интервал выполняет один воркер из всех
+                if await self.backend.add(self._lock_key(), b"1", interval / 2):
+                    async with session_factory() as session:
+                        await self.sweep(session)
+            except Exception:
+                logger.exception("Ошибка очистки каталога отчетов")
+            await asyncio.sleep(interval)
+
+    def start_sweeper(self, session_factory, interval: float = REPORTS_SWEEP_INTERVAL):
+        """Запустить фоновую очистку в event loop процесса"""
+        if interval > 0 and self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop(session_factory, interval))
+
+    async def stop_sweeper(self):
+        sweeper, self._sweeper = self._sweeper, None
+        if sweeper is not None:
+            sweeper.cancel()
+            try:
+                await sweeper
+            except asyncio.CancelledError:
+                pass
+
+
+report_store = ReportStore()
@@ -0,0 +1,93 @@
+import hashlib
+import os
+from typing import Any, Dict, NamedTuple, Tuple
+
+import orjson
+
+from .models import Project, Scenario
+
+# Каталог готовых PDF (в docker-compose смонтирован как ./reports); раскладку файлов ведет report_store
+REPORTS_DIR = os.getenv("REPORTS_DIR", "/app/reports")
+
+# Сколько сценариев можно запросить одним архивом отчетов
+REPORT_BATCH_MAX_SCENARIOS = int(os.getenv("REPORT_BATCH_MAX_SCENARIOS", "50"))
+
+# Доля строительства в общих инвестициях сценария, операционные расходы в год и ставка дисконтирования для NPV
+CONSTRUCTION_SHARE = 0.85
+OPERATIONAL_SHARE = 0.05
+DISCOUNT_RATE = 0.1
+NPV_YEARS = 10
+
+_INFRASTRUCTURE_PREFIX = "Инфраструктура: "
+
+
+class ReportPlan(NamedTuple):
+    """Все, что нужно для рендера отчета без обращения к базе"""
+    scenario_id: int
+    report_type: str
+    content_hash: str
+    scenario_data: Dict[str, Any]
+    land_plot_data: Dict[str, Any]
+
+
+def unit_economics(roi: float, total_investment: float) -> Dict[str, float]:
+    """Unit-экономика для шаблонов отчетов из сохраненных ROI и стоимости сценария"""
+    # Числа приводятся к float: 120000000 и 120000000.0 должны давать один хэш отчета
+    roi = float(roi or 0.0)
+    total_investment = float(total_investment or 0.0)
+    profit = total_investment * roi / 100
+    operational_cost = total_investment * OPERATIONAL_SHARE
+    npv = sum(profit / (1 + DISCOUNT_RATE) ** year for year in range(1, NPV_YEARS + 1)) - total_investment
+    return {
+        "total_investment": total_investment,
+        "construction_cost": total_investment * CONSTRUCTION_SHARE,
+        "infrastructure_cost": total_investment * (1 - CONSTRUCTION_SHARE),
+        "operational_cost": operational_cost,
+        "revenue_per_year": profit + operational_cost,
+        "roi_percentage": roi,
+        "payback_period": 100 / roi if roi else 0.0,
+        "npv": npv,
+        "irr": roi,
+    }
+
+
+def scenario_report_data(scenario: Scenario, land_plot: Project) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Данные сценария и участка для шаблона: только то, что попадает в отчет"""
+    description = land_plot.description or ""
+    infrastructure = []
+    if description.startswith(_INFRASTRUCTURE_PREFIX):
+        infrastructure = [item for item in description[len(_INFRASTRUCTURE_PREFIX):].split(", ") if item]
+    scenario_data = {
+        "id": scenario.id,
+        "name": scenario.name,
+        "description": scenario.description,
+        "construction_time": scenario.construction_time,
+        "risk_level": scenario.risk_level,
+        "market_demand": scenario.market_demand,
+        "regulatory_complexity": scenario.regulatory_complexity,
+        "recommendations": [],
+        "unit_economics": unit_economics(scenario.roi, scenario.estimated_cost),
+    }
+    land_plot_data = {
+        "id": land_plot.id,
+        "area": float(land_plot.area) if land_plot.area is not None else None,
+        "zone_type": land_plot.project_type,
+        "location": land_plot.location,
+        "infrastructure": infrastructure,
+        "electricity_power": None,
+        "road_access": "road" in infrastructure,
+        "internet_available": "internet" in infrastructure,
+    }
+    return scenario_data, land_plot_data
+
+
+def report_content_hash(report_type: str, scenario_data: Dict[str, Any], land_plot_data: Dict[str, Any],
+                        template_version: str) -> str:
+    """sha256 от всего, что определяет содержимое PDF: одинаковый хэш - одинаковый отчет"""
+    canonical = {
+        "report_type": report_type,
+        "template": template_version,
+        "scenario": scenario_data,
+        "land_plot": land_plot_data,
+    }
+    return hashlib.sha256(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS)).hexdigest()
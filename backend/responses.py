@@ -0,0 +1,100 @@
+import hashlib
+import os
+from functools import lru_cache
+from typing import Any, Mapping, NamedTuple, Optional
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+# Сколько секунд клиенты и прокси могут не перепроверять статические ответы API
+STATIC_CACHE_MAX_AGE = int(os.getenv("STATIC_CACHE_MAX_AGE", "300"))
+
+
+@lru_cache(maxsize=None)
+def adapter_for(response_type) -> TypeAdapter:
+    """TypeAdapter для типа ответа (создается один раз на тип)"""
+    return TypeAdapter(response_type)
+
+
+class RenderedJSON(NamedTuple):
+    """Готовое тело JSON-ответа, его ETag и курсор следующей страницы"""
+    body: bytes
+    etag: str
+    next_cursor: Optional[str] = None
+
+    def pack(self) -> bytes:
+        """Байты для кэша: заголовки строками перед телом (JSON от pydantic не содержит переводов строк)"""
+        return f"{self.etag}\n{self.next_cursor or ''}\n".encode() + self.body
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "RenderedJSON":
+        etag, cursor, body = data.split(b"\n", 2)
+        return cls(body, etag.decode(), cursor.decode() or None)
+
+
+def content_etag(*parts: Any) -> str:
+    """Сильный ETag по содержимому (значения колонок строки или байты тела)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли If-None-Match с текущим ETag (слабое сравнение, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """304 без тела: клиент использует свою копию"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def render_json(response_type, content: Any, next_cursor: Optional[str] = None) -> RenderedJSON:
+    """Сериализовать ответ и посчитать ETag по телу"""
+    body = adapter_for(response_type).dump_json(content)
+    return RenderedJSON(body, content_etag(body), next_cursor)
+
+
+def json_response(response_type, content: Any, status_code: int = 200,
+                  headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    JSON-ответ, сериализованный pydantic-core напрямую в байты.
+
+    FastAPI для response_model прогоняет результат через jsonable_encoder и json.dumps;
+    здесь уже провалидированные модели ответа сразу превращаются в bytes.
+    """
+    return Response(
+        content=adapter_for(response_type).dump_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+class StaticJSON:
+    """
+    Ответ, который не меняется за время жизни процесса: тело сериализуется
+    и ETag считается один раз при импорте, запрос только отдает готовые байты.
+    """
+
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, content: Any, response_type=Any, cache_control: Optional[str] = None):
+        adapter = adapter_for(response_type)
+        self.body = adapter.dump_json(adapter.validate_python(content))
+        self.etag = content_etag(self.body)
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": cache_control or f"public, max-age={STATIC_CACHE_MAX_AGE}",
+        }
+
+    def response(self, if_none_match: Optional[str] = None) -> Response:
+        if etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=self.headers)
+        return Response(content=self.body, media_type="application/json", headers=self.headers)
@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+import hmac
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Mapping, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+# Сервер с протоколом S3 (AWS, MinIO, Yandex Object Storage...); адресация path-style: <endpoint>/<bucket>/<key>
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "http://minio:9000")
+# Адрес того же сервера, доступный клиентам: на него подписываются ссылки на скачивание
+S3_PUBLIC_ENDPOINT_URL = os.getenv("S3_PUBLIC_ENDPOINT_URL") or S3_ENDPOINT_URL
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID", "")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY", "")
+# Размер части multipart-загрузки (МБ): в памяти держится не больше одной части. S3 требует от 5 МБ
+S3_PART_SIZE_MB = max(int(os.getenv("S3_PART_SIZE_MB", "8")), 5)
+S3_TIMEOUT = float(os.getenv("S3_TIMEOUT", "30"))
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class S3Error(Exception):
+    """Ошибка ответа сервера S3"""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"S3 {status_code}: {body[:500]}")
+        self.status_code = status_code
+
+
+class Credentials(NamedTuple):
+    access_key_id: str
+    secret_access_key: str
+    region: str
+
+
+class ObjectInfo(NamedTuple):
+    size: int
+    last_modified: datetime
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _canonical_query(params: Mapping[str, str]) -> str:
+    return "&".join(
+        f"{_uri_encode(key)}={_uri_encode(value)}" for key, value in sorted(params.items())
+    )
+
+
+def _signature(credentials: Credentials, method: str, path: str, params: Mapping[str, str],
+               headers: Mapping[str, str], payload_hash: str, now: datetime) -> Tuple[str, str, str]:
+    """Подпись AWS Signature Version 4: (подпись, область ключа, список подписанных заголовков)"""
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date = amz_date[:8]
+    scope = f"{date}/{credentials.region}/s3/aws4_request"
+    canonical_headers = {name.lower(): " ".join(str(value).split()) for name, value in headers.items()}
+    signed_headers = ";".join(sorted(canonical_headers))
+    canonical_request = "\n".join([
+        method,
+        _uri_encode(path, safe="/-_.~"),
+        _canonical_query(params),
+        "".join(f"{name}:{canonical_headers[name]}\n" for name in sorted(canonical_headers)),
+        signed_headers,
+        payload_hash,
+    ])
+    string_to_sign = "\n".join([ALGORITHM, amz_date, scope, _sha256(canonical_request.encode())])
+
+    key = f"AWS4{credentials.secret_access_key}".encode()
+    for part in (date, credentials.region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return signature, scope, signed_headers
+
+
+def sign_request(credentials: Credentials, method: str, url: str, params: Mapping[str, str],
+                 headers: Dict[str, str], payload_hash: str, now: Optional[datetime] = None) -> Dict[str, str]:
+    """Заголовки запроса с подписью в Authorization"""
+    now = now or datetime.now(timezone.utc)
+    parts = urlsplit(url)
+    headers = {
+        **headers,
+        "host": parts.netloc,
+        "x-amz-date": now.strftime("%Y%m%dT%H%M%SZ"),
+        "x-amz-content-sha256": payload_hash,
+    }
+    signature, scope, signed_headers = _signature(
+        credentials, method, parts.path or "/", params, headers, payload_hash, now
+    )
+    headers["Authorization"] = (
+        f"{ALGORITHM} Credential={credentials.access_key_id}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    return headers
+
+
+def presign_url(credentials: Credentials, method: str, url: str, expires: int,
+                params: Optional[Mapping[str, str]] = None, now: Optional[datetime] = None) -> str:
+    """Ссылка с подписью в параметрах запроса: по ней объект скачивается без ключей доступа"""
+    now = now or datetime.now(timezone.utc)
+    parts = urlsplit(url)
+    date = now.strftime("%Y%m%d")
+    query = {
+        **(params or {}),
+        "X-Amz-Algorithm": ALGORITHM,
+        "X-Amz-Credential": f"{credentials.access_key_id}/{date}/{credentials.region}/s3/aws4_request",
+        "X-Amz-Date": now.strftime("%Y%m%dT%H%M%SZ"),
+        "X-Amz-Expires": str(expires),
+        "X-Amz-SignedHeaders": "host",
+    }
+    signature, _, _ = _signature(
+        credentials, method, parts.path or "/", query, {"host": parts.netloc}, UNSIGNED_PAYLOAD, now
+    )
+    return (
+        f"{parts.scheme}://{parts.netloc}{_uri_encode(parts.path, safe='/-_.~')}"
+        f"?{_canonical_query(query)}&X-Amz-Signature={signature}"
+    )
+
+
+class S3Client:
+    """
+    Минимальный асинхронный клиент S3 поверх httpx: объекты, multipart-загрузка,
+    листинг и подписанные ссылки. Без boto: нужны только эти операции.
+    """
+
+    def __init__(self, endpoint_url: str = S3_ENDPOINT_URL, credentials: Optional[Credentials] = None,
+                 public_endpoint_url: Optional[str] = None, part_size: int = S3_PART_SIZE_MB * 1024 * 1024,
+                 http: Optional[httpx.AsyncClient] = None):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.public_endpoint_url = (public_endpoint_url or endpoint_url).rstrip("/")
+        self.credentials = credentials or Credentials(S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY, S3_REGION)
+        self.part_size = part_size
+        self._http = http
+
+    @classmethod
+    def from_settings(cls) -> "S3Client":
+        return cls(S3_ENDPOINT_URL, public_endpoint_url=S3_PUBLIC_ENDPOINT_URL)
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Одно соединение на процесс: создается в event loop при первом запросе
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=S3_TIMEOUT)
+        return self._http
+
+    def _url(self, bucket: str, key: str = "", endpoint: Optional[str] = None) -> str:
+        return f"{endpoint or self.endpoint_url}/{bucket}/{key}"
+
+    async def _request(self, method: str, bucket: str, key: str = "", params: Optional[Dict[str, str]] = None,
+                       body: bytes = b"", headers: Optional[Dict[str, str]] = None,
+                       ok: Tuple[int, ...] = (200,)) -> httpx.Response:
+        url = self._url(bucket, key)
+        params = params or {}
+        signed = sign_request(self.credentials, method, url, params, headers or {}, _sha256(body))
+        request_url = _uri_encode(url, safe=":/-_.~")
+        if params:
+            request_url += "?" + _canonical_query(params)
+        response = await self.http.request(method, request_url, content=body, headers=signed)
+        if response.status_code not in ok:
+            raise S3Error(response.status_code, response.text)
+        return response
+
+    async def put_object(self, bucket: str, key: str, body: bytes, content_type: str):
+        await self._request("PUT", bucket, key, body=body, headers={"content-type": content_type})
+
+    async def iter_object(self, bucket: str, key: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Содержимое объекта блоками по мере получения"""
+        url = self._url(bucket, key)
+        headers = sign_request(self.credentials, "GET", url, {}, {}, _sha256(b""))
+        async with self.http.stream("GET", _uri_encode(url, safe=":/-_.~"), headers=headers) as response:
+            if response.status_code != 200:
+                raise S3Error(response.status_code, (await response.aread()).decode(errors="replace"))
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def head_object(self, bucket: str, key: str) -> Optional[int]:
+        """Размер объекта; None, если объекта нет"""
+        response = await self._request("HEAD", bucket, key, ok=(200, 404))
+        if response.status_code == 404:
+            return None
+        return int(response.headers["content-length"])
+
+    async def delete_object(self, bucket: str, key: str):
+        await self._request("DELETE", bucket, key, ok=(200, 204, 404))
+
+    async def list_objects(self, bucket: str, prefix: str = "") -> Dict[str, ObjectInfo]:
+        """Все объекты с префиксом (ListObjectsV2 постранично)"""
+        objects: Dict[str, ObjectInfo] = {}
+        params = {"list-type": "2", "prefix": prefix}
+        while True:
+            response = await self._request("GET", bucket, params=params)
+            root = ElementTree.fromstring(response.content)
+            for item in root.iter(f"{_NS}Contents"):
+                last_modified = item.findtext(f"{_NS}LastModified").replace("Z", "+00:00")
+                objects[item.findtext(f"{_NS}Key")] = ObjectInfo(
+                    int(item.findtext(f"{_NS}Size")), datetime.fromisoformat(last_modified)
+                )
+            token = root.findtext(f"{_NS}NextContinuationToken")
+            if root.findtext(f"{_NS}IsTruncated") != "true" or not token:
+                return objects
+            params = {**params, "continuation-token": token}
+
+    async def upload_file(self, path: str, bucket: str, key: str, content_type: str) -> int:
+        """
+        Загрузить файл: до part_size - одним PUT, больше - multipart по частям,
+        в памяти не больше одной части. Возвращает размер объекта.
+        """
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if size <= self.part_size:
+                await self.put_object(bucket, key, await asyncio.to_thread(f.read), content_type)
+                return size
+
+            response = await self._request(
+                "POST", bucket, key, params={"uploads": ""}, headers={"content-type": content_type}
+            )
+            upload_id = ElementTree.fromstring(response.content).findtext(f"{_NS}UploadId")
+            try:
+                parts: List[Tuple[int, str]] = []
+                while True:
+                    chunk = await asyncio.to_thread(f.read, self.part_size)
+                    if not chunk:
+                        break
+                    number = len(parts) + 1
+                    response = await self._request(
+                        "PUT", bucket, key, params={"partNumber": str(number), "uploadId": upload_id}, body=chunk
+                    )
+                    parts.append((number, response.headers["etag"]))
+                await self._request(
+                    "POST", bucket, key, params={"uploadId": upload_id}, body=_complete_body(parts)
+                )
+            except BaseException:
+                # Незавершенные части занимают место в бакете, пока загрузку не прервать
+                await asyncio.shield(self._request(
+                    "DELETE", bucket, key, params={"uploadId": upload_id}, ok=(200, 204, 404)
+                ))
+                raise
+        return size
+
+    def presigned_url(self, bucket: str, key: str, expires: int, filename: Optional[str] = None) -> str:
+        """Ссылка на скачивание объекта по публичному адресу сервера"""
+        params = {}
+        if filename:
+            params["response-content-disposition"] = f'attachment; filename="{filename}"'
+        return presign_url(
+            self.credentials, "GET", self._url(bucket, key, self.public_endpoint_url), expires, params
+        )
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+def _complete_body(parts: List[Tuple[int, str]]) -> bytes:
+    items = "".join(f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in parts)
+    return f"<CompleteMultipartUpload>{items}</CompleteMultipartUpload>".encode()
@@ -0,0 +1,57 @@
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+from pydantic import TypeAdapter
+
+from .cache import SharedCache
+from .market_index import normalize_region
+from .models import LandPlot
+
+# Версия движка сценариев: увеличивать при любом изменении расчета, чтобы не отдавать старые результаты
+SCENARIO_ENGINE_VERSION = "1"
+# Сколько секунд хранить рассчитанную экономику сценариев
+SCENARIO_MEMO_TTL = float(os.getenv("SCENARIO_MEMO_TTL", "86400"))
+# Точность округления числовых параметров участка: значащих цифр
+SCENARIO_MEMO_PRECISION = int(os.getenv("SCENARIO_MEMO_PRECISION", "2"))
+
+ECONOMICS = TypeAdapter(List[Dict[str, Any]])
+
+# Рассчитанные параметры сценариев (без привязки к проекту) по отпечатку участка
+scenario_cache = SharedCache("scenarios", SCENARIO_MEMO_TTL)
+
+
+def _bucket(value: Optional[float]) -> Optional[str]:
+    """Число, округленное до SCENARIO_MEMO_PRECISION значащих цифр: 4.96 и 5.04 га дают один ключ"""
+    if value is None:
+        return None
+    return f"{value:.{SCENARIO_MEMO_PRECISION}g}"
+
+
+def land_plot_fingerprint(plot: LandPlot, location: Optional[str], investment_budget: Optional[float],
+                          risk_tolerance: Optional[str] = None, timeline: Optional[str] = None,
+                          preferences: Optional[List[str]] = None, scenario_names: List[str] = ()) -> str:
+    """Канонический отпечаток участка и параметров запроса: порядок и мелкие различия не влияют"""
+    canonical = {
+        "zone": plot.zone_type.value,
+        "area": _bucket(plot.area),
+        "infrastructure": sorted({infra.value for infra in plot.infrastructure}),
+        "electricity_power": _bucket(plot.electricity_power),
+        "gas_pressure": _bucket(plot.gas_pressure),
+        "water_flow": _bucket(plot.water_flow),
+        "road_access": plot.road_access,
+        "internet_available": plot.internet_available,
+        "location": normalize_region(location),
+        "budget": _bucket(investment_budget),
+        "risk_tolerance": risk_tolerance,
+        "timeline": timeline,
+        "preferences": sorted(set(preferences or [])),
+        "scenarios": list(scenario_names),
+    }
+    return hashlib.blake2b(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+def memo_key(fingerprint: str, market_version: str) -> str:
+    """Ключ кэша: результат устаревает при смене версии движка или рыночных данных"""
+    return f"v{SCENARIO_ENGINE_VERSION}:{market_version or '-'}:{fingerprint}"
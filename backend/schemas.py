@@ -83,6 +83,10 @@ class ScenarioResponse(ScenarioBase):
     project_id: int
     created_at: datetime
 
+class ScenarioBatchGenerate(BaseModel):
+    project_ids: List[int] = Field(..., min_length=1, max_length=100)
+    count: int = Field(3, ge=1, le=5)
+
 # Contractor schemas
 class ContractorBase(BaseModel):
     name: str
@@ -143,6 +147,71 @@ class SystemStats(BaseModel):
     contractors_count: int
     reports_generated: int
 
+class PoolWaitStats(BaseModel):
+    count: int
+    timeouts: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    buckets: Dict[str, int]
+
+class PoolStats(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout: Optional[float] = None
+    wait: Optional[PoolWaitStats] = None
+
+class DatabasePoolStats(BaseModel):
+    pools: Dict[str, PoolStats]
+
+class CacheStats(BaseModel):
+    backend: str
+    ttl: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    invalidations: int
+    loads: Optional[int] = None
+    lock_waits: Optional[int] = None
+    errors: Optional[int] = None
+    size: Optional[int] = None
+    maxsize: Optional[int] = None
+    evictions: Optional[int] = None
+
+class CacheStatsResponse(BaseModel):
+    caches: Dict[str, CacheStats]
+
+class ReportJob(BaseModel):
+    job_id: str
+    status: str  # queued, rendering, done, failed
+    progress: float
+    scenario_id: int
+    report_type: str
+    report_id: Optional[int] = None
+    download_url: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class PDFRenderStats(BaseModel):
+    mode: str
+    workers: int
+    started: bool
+    pending: int
+    queued: int
+    renders: int
+    failures: int
+    timeouts: int
+    restarts: int
+    avg_render_ms: float
+    max_render_ms: float
+    avg_wait_ms: float
+
 # Схемы для фильтрации и поиска
 
 class ScenarioFilter(BaseModel):
@@ -171,6 +240,7 @@ class SuccessResponse(BaseModel):
 
 # UserRequest schemas
 class UserRequestCreate(BaseModel):
+    telegram_id: Optional[int] = None
     land_plot: Dict[str, Any]
     investment_budget: Optional[float] = None
     timeline: Optional[str] = None
@@ -0,0 +1,572 @@
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+import asyncio
+import logging
+import random
+import os
+import uuid
+
+from ..models import *
+from ..pagination import keyset_order, keyset_page, next_cursor
+from ..schemas import (
+    UserCreate, ProjectCreate, ScenarioCreate, ContractorCreate,
+    UserResponse, ProjectResponse, ScenarioResponse, ContractorResponse,
+    UserRequestCreate, ReportJob
+)
+from .. import crud
+from ..listing import ListReader
+from ..responses import RenderedJSON, adapter_for, render_json
+from ..cache import contractor_cache, invalidate_on_commit, user_cache, user_id_cache
+from ..market_index import MarketSnapshot, demand_level, market_index
+from ..scenario_memo import ECONOMICS, land_plot_fingerprint, memo_key, scenario_cache
+from ..database import AsyncSessionLocal
+from ..downloads import zip_stream
+from ..reports import REPORT_BATCH_MAX_SCENARIOS, ReportPlan, report_content_hash, scenario_report_data
+from ..report_store import ReportStore, report_store
+from ..report_jobs import DONE, FAILED, RENDERING, ReportJobStore, new_job, report_jobs
+from .render_pool import PDFRenderPool, pdf_pool
+
+logger = logging.getLogger(__name__)
+
+# Списочные эндпоинты читают строки напрямую в модели ответа, минуя ORM
+PROJECT_LIST = ListReader(Project, ProjectResponse)
+SCENARIO_LIST = ListReader(Scenario, ScenarioResponse)
+CONTRACTOR_LIST = ListReader(Contractor, ContractorResponse)
+
+# Справочник подрядчиков меняется редко: страницы кэшируются до любой записи в contractors
+invalidate_on_commit(Contractor, contractor_cache)
+# Индекс рыночных данных перечитывается после любой записи в market_data
+invalidate_on_commit(MarketData, market_index)
+# Карточка пользователя сбрасывается по его telegram_id
+invalidate_on_commit(User, user_cache, key=lambda user: str(user.telegram_id))
+invalidate_on_commit(User, user_id_cache, key=lambda user: user.telegram_id)
+
+class UserService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_user(self, user_data: UserCreate) -> UserResponse:
+        user = User(**user_data.model_dump())
+        self.db.add(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        return UserResponse.model_validate(user)
+    
+    async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
+        result = await self.db.execute(
+            select(User).where(User.telegram_id == telegram_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_user_response(self, telegram_id: int) -> Optional[UserResponse]:
+        """Карточка пользователя через общий кэш (кэшируется и отсутствие пользователя)"""
+        async def load():
+            user = await self.get_user_by_telegram_id(telegram_id)
+            return UserResponse.model_validate(user) if user else None
+        return await user_cache.get_or_load_model(str(telegram_id), load, adapter_for(Optional[UserResponse]))
+
+class ProjectService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_project(self, project_data: ProjectCreate) -> ProjectResponse:
+        project = Project(**project_data.model_dump())
+        self.db.add(project)
+        await self.db.commit()
+        await self.db.refresh(project)
+        return ProjectResponse.model_validate(project)
+    
+    async def get_projects(self, skip: int = 0, limit: int = 100, user_id: Optional[int] = None,
+                           cursor: Optional[str] = None) -> List[ProjectResponse]:
+        query = PROJECT_LIST.select()
+        if user_id is not None:
+            query = query.where(Project.user_id == user_id)
+        if cursor is None and skip:
+            # Offset-режим оставлен для старых клиентов
+            query = keyset_order(query, Project).offset(skip).limit(limit)
+        else:
+            query = keyset_page(query, Project, cursor, limit)
+        
+        return await PROJECT_LIST.fetch(self.db, query)
+    
+    async def get_project(self, project_id: int) -> Optional[ProjectResponse]:
+        result = await self.db.execute(
+            select(Project).where(Project.id == project_id)
+        )
+        project = result.scalar_one_or_none()
+        return ProjectResponse.model_validate(project) if project else None
+    
+    async def get_project_row(self, project_id: int):
+        """Колонки ответа для проекта одной строкой, без ORM-объекта"""
+        return await PROJECT_LIST.fetch_row(self.db, PROJECT_LIST.select().where(Project.id == project_id))
+
+class ScenarioService:
+    SCENARIO_NAMES = [
+        "Консервативный сценарий",
+        "Умеренный сценарий", 
+        "Агрессивный сценарий",
+        "Инновационный сценарий",
+        "Экологичный сценарий"
+    ]
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_scenario(self, project_id: int, scenario_data: ScenarioCreate) -> ScenarioResponse:
+        scenario = Scenario(**scenario_data.model_dump(), project_id=project_id)
+        self.db.add(scenario)
+        await self.db.commit()
+        await self.db.refresh(scenario)
+        return ScenarioResponse.model_validate(scenario)
+    
+    async def get_scenarios(self, project_id: int) -> List[ScenarioResponse]:
+        return await SCENARIO_LIST.fetch(
+            self.db,
+            SCENARIO_LIST.select().where(Scenario.project_id == project_id)
+        )
+    
+    async def get_scenario_row(self, scenario_id: int):
+        """Колонки ответа для сценария одной строкой, без ORM-объекта"""
+        return await SCENARIO_LIST.fetch_row(self.db, SCENARIO_LIST.select().where(Scenario.id == scenario_id))
+    
+    async def generate_scenarios(self, project_id: int, count: int = 3) -> List[ScenarioResponse]:
+        """Генерирует сценарии развития для проекта"""
+        generated = await self.generate_scenarios_batch([project_id], count)
+        return generated.get(project_id, [])
+    
+    async def generate_scenarios_batch(self, project_ids: List[int], count: int = 3) -> Dict[int, List[ScenarioResponse]]:
+        """Генерирует сценарии для нескольких проектов одним INSERT ... RETURNING"""
+        projects_result = await self.db.execute(
+            select(
+                Project.id, Project.name, Project.budget, Project.area,
+                Project.location, Project.project_type
+            ).where(Project.id.in_(set(project_ids)))
+        )
+        projects = projects_result.all()
+        markets = await market_index.ensure_fresh(self.db)
+        
+        rows = [
+            {
+                "project_id": project.id,
+                **self._scenario_values(
+                    project.name, project.budget, name, project.area,
+                    markets.lookup(project.location, project.project_type)
+                )
+            }
+            for project in projects
+            for name in self.SCENARIO_NAMES[:max(count, 0)]
+        ]
+        if not rows:
+            return {}
+        
+        # Одна команда вместо add() + refresh() на каждый сценарий
+        result = await self.db.execute(
+            insert(Scenario.__table__).values(rows).returning(*Scenario.__table__.columns)
+        )
+        inserted = sorted(result.mappings().all(), key=lambda row: row["id"])
+        await self.db.commit()
+        
+        generated: Dict[int, List[ScenarioResponse]] = {project.id: [] for project in projects}
+        for row in inserted:
+            generated[row["project_id"]].append(ScenarioResponse.model_validate(row))
+        return generated
+    
+    async def generate_for_request(self, telegram_id: int, user_request: UserRequestCreate,
+                                   count: int = 3) -> Tuple[int, List[ScenarioResponse]]:
+        """
+        Пользователь, участок и сценарии для /generate-scenarios в одной транзакции.
+        
+        Пользователь определяется одним upsert (или из кэша), участок и сценарии связаны
+        через relationship и записываются одним flush и одним commit; при ошибке ничего
+        не сохраняется. Возвращает ID пользователя и созданные сценарии.
+        """
+        try:
+            economics = await self._memoized_economics(user_request, self.SCENARIO_NAMES[:max(count, 0)])
+            user_id = await crud.UserCRUD.get_or_create_user_id(self.db, telegram_id, commit=False)
+            land_plot = await crud.LandPlotCRUD.create_land_plot(
+                self.db, user_id, user_request.land_plot,
+                investment_budget=user_request.investment_budget,
+                commit=False
+            )
+            scenarios = [
+                Scenario(project=land_plot, description=self._scenario_description(land_plot.name), **values)
+                for values in economics
+            ]
+            self.db.add_all(scenarios)
+            await self.db.flush()
+            responses = [ScenarioResponse.model_validate(scenario) for scenario in scenarios]
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return user_id, responses
+    
+    async def _memoized_economics(self, user_request: UserRequestCreate, names: List[str]) -> List[Dict[str, Any]]:
+        """
+        Экономика сценариев для участка. Одинаковые по отпечатку участки (зона, округленная
+        площадь, набор инфраструктуры, мощности, бюджет) получают уже рассчитанный результат;
+        он устаревает при смене рыночных данных или версии движка.
+        """
+        plot = LandPlot.model_validate(user_request.land_plot)
+        location = user_request.land_plot.get("location")
+        markets = await market_index.ensure_fresh(self.db)
+        market = markets.lookup(location, plot.zone_type.value)
+        fingerprint = land_plot_fingerprint(
+            plot, location, user_request.investment_budget,
+            user_request.risk_tolerance, user_request.timeline, user_request.preferences, names
+        )
+        
+        async def compute() -> List[Dict[str, Any]]:
+            return [
+                self._scenario_economics(user_request.investment_budget, name, plot.area, market)
+                for name in names
+            ]
+        
+        return await scenario_cache.get_or_load_model(memo_key(fingerprint, markets.version), compute, ECONOMICS)
+    
+    @staticmethod
+    def _scenario_description(project_name: str) -> str:
+        return f"Автоматически сгенерированный сценарий для проекта {project_name}"
+    
+    @classmethod
+    def _scenario_values(cls, project_name: str, budget: Optional[float], name: str,
+                         area: Optional[float] = None,
+                         market: Optional[MarketSnapshot] = None) -> Dict[str, Any]:
+        return {
+            "description": cls._scenario_description(project_name),
+            **cls._scenario_economics(budget, name, area, market)
+        }
+    
+    @staticmethod
+    def _scenario_economics(budget: Optional[float], name: str, area: Optional[float] = None,
+                            market: Optional[MarketSnapshot] = None) -> Dict[str, Any]:
+        """Параметры сценария; рыночные данные берутся из индекса в памяти, без запросов к базе"""
+        if budget:
+            estimated_cost = budget * random.uniform(0.8, 1.2)
+        elif market and market.construction_cost and area:
+            estimated_cost = market.construction_cost * area * random.uniform(0.9, 1.1)
+        else:
+            estimated_cost = random.uniform(1000000, 50000000)
+        return {
+            "name": name,
+            "roi": round(random.uniform(8.0, 35.0), 1),
+            "estimated_cost": estimated_cost,
+            "construction_time": f"{random.randint(12, 36)} месяцев",
+            "risk_level": random.choice(["low", "medium", "high"]),
+            "market_demand": (market and demand_level(market.demand_score)) or random.choice(["low", "medium", "high"]),
+            "regulatory_complexity": random.choice(["low", "medium", "high"])
+        }
+
+class ContractorService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_contractor(self, contractor_data: ContractorCreate) -> ContractorResponse:
+        contractor = Contractor(**contractor_data.model_dump())
+        self.db.add(contractor)
+        await self.db.commit()
+        await self.db.refresh(contractor)
+        return ContractorResponse.model_validate(contractor)
+    
+    async def get_contractors(self, skip: int = 0, limit: int = 100,
+                              cursor: Optional[str] = None) -> List[ContractorResponse]:
+        query = CONTRACTOR_LIST.select().where(Contractor.is_active == True)
+        if cursor is None and skip:
+            # Offset-режим оставлен для старых клиентов
+            query = keyset_order(query, Contractor).offset(skip).limit(limit)
+        else:
+            query = keyset_page(query, Contractor, cursor, limit)
+        return await CONTRACTOR_LIST.fetch(self.db, query)
+    
+    async def get_contractors_rendered(self, skip: int = 0, limit: int = 100,
+                                       cursor: Optional[str] = None) -> RenderedJSON:
+        """Готовое тело страницы подрядчиков с ETag и курсором, через общий кэш"""
+        async def load() -> bytes:
+            contractors = await self.get_contractors(skip=skip, limit=limit, cursor=cursor)
+            return render_json(List[ContractorResponse], contractors, next_cursor(contractors, limit)).pack()
+        key = f"active:{skip if cursor is None else 0}:{limit}:{cursor or ''}"
+        return RenderedJSON.unpack(await contractor_cache.get_or_load(key, load))
+    
+    async def get_contractors_by_specialization(self, specializations: List[str]) -> List[ContractorResponse]:
+        async def load() -> List[ContractorResponse]:
+            result = await self.db.execute(
+                select(Contractor).where(
+                    Contractor.is_active == True,
+                    Contractor.specialization.in_(specializations)
+                )
+            )
+            return [ContractorResponse.model_validate(contractor) for contractor in result.scalars().all()]
+        key = "specialization:" + "|".join(sorted(set(specializations)))
+        return await contractor_cache.get_or_load_model(key, load, CONTRACTOR_LIST.adapter)
+
+class PDFService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def generate_project_pdf(self, project_id: int) -> Optional[str]:
+        """Генерирует PDF отчет для проекта"""
+        try:
+            # Получаем проект
+            project_result = await self.db.execute(
+                select(Project).where(Project.id == project_id)
+            )
+            project = project_result.scalar_one_or_none()
+            if not project:
+                return None
+            
+            # Получаем сценарии
+            scenarios_result = await self.db.execute(
+                select(Scenario).where(Scenario.project_id == project_id)
+            )
+            scenarios = scenarios_result.scalars().all()
+            
+            # Одна сводка на проект в каталоге отчетов: новая версия атомарно заменяет предыдущую
+            async def write(tmp_path: str):
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(f"Отчет по проекту: {project.name}\n")
+                    f.write(f"Тип проекта: {project.project_type}\n")
+                    f.write(f"Локация: {project.location or 'Не указана'}\n")
+                    f.write(f"Бюджет: {project.budget or 'Не указан'}\n")
+                    f.write(f"Площадь: {project.area or 'Не указана'} кв.м\n")
+                    f.write(f"Дата создания: {project.created_at}\n\n")
+                    
+                    f.write("Сценарии развития:\n")
+                    for i, scenario in enumerate(scenarios, 1):
+                        f.write(f"\n{i}. {scenario.name}\n")
+                        f.write(f"   ROI: {scenario.roi}%\n")
+                        f.write(f"   Стоимость: {scenario.estimated_cost}\n")
+                        f.write(f"   Время строительства: {scenario.construction_time}\n")
+                        f.write(f"   Уровень риска: {scenario.risk_level}\n")
+            
+            filepath = report_store.project_summary_path(project_id)
+            await report_store.save(filepath, write)
+            return filepath
+            
+        except Exception as e:
+            print(f"Ошибка генерации PDF: {e}")
+            return None 
+
+class ReportService:
+    """PDF-отчеты по сценариям: одинаковое содержимое рендерится один раз"""
+    
+    def __init__(self, db: AsyncSession, pool: Optional[PDFRenderPool] = None,
+                 store: Optional[ReportStore] = None):
+        self.db = db
+        self.pool = pool or pdf_pool
+        self.store = store or report_store
+        self.generator = self.pool.generator
+    
+    async def plan(self, scenario_id: int, report_type: str) -> Optional[ReportPlan]:
+        """
+        Данные отчета и его ключ - хэш данных сценария, участка, типа отчета и версии шаблона.
+        None, если сценария нет.
+        """
+        result = await self.db.execute(
+            select(Scenario, Project)
+            .join(Project, Scenario.project_id == Project.id)
+            .where(Scenario.id == scenario_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        
+        scenario_data, land_plot_data = scenario_report_data(*row)
+        content_hash = report_content_hash(
+            report_type, scenario_data, land_plot_data, self.generator.template_version(report_type)
+        )
+        return ReportPlan(scenario_id, report_type, content_hash, scenario_data, land_plot_data)
+    
+    async def find_ready(self, plan: ReportPlan) -> Optional[Report]:
+        """Готовый отчет с тем же содержимым, если его файл на месте"""
+        report = await crud.ReportCRUD.get_by_content_hash(self.db, plan.content_hash)
+        if report is not None and await self.store.exists(report.file_path):
+            return report
+        return None
+    
+    async def build(self, plan: ReportPlan) -> Report:
+        """Рендерит отчет и сохраняет запись о нем (или берет готовый, если он успел появиться)"""
+        report = await crud.ReportCRUD.get_by_content_hash(self.db, plan.content_hash)
+        if report is not None and await self.store.exists(report.file_path):
+            return report
+        
+        path = self.store.path(plan.content_hash)
+        if report is not None:
+            # Запись есть, а файл пропал (например, удален вручную): рендерим заново в текущее хранилище
+            report.file_size = await self._render(plan, path)
+            report.file_path = path
+            await self.db.commit()
+            return report
+        
+        file_size = await self._render(plan, path)
+        try:
+            return await crud.ReportCRUD.create_report(
+                self.db, plan.scenario_id, plan.report_type, path, file_size, content_hash=plan.content_hash
+            )
+        except IntegrityError:
+            # Такой же отчет одновременно сохранил другой запрос: файл у них общий
+            await self.db.rollback()
+            return await crud.ReportCRUD.get_by_content_hash(self.db, plan.content_hash)
+    
+    async def get_or_create_pdf(self, scenario_id: int, report_type: str) -> Optional[Tuple[Report, bool]]:
+        """Отчет по сценарию и признак того, что он взят готовым; PDF с тем же ключом не рендерится заново"""
+        plan = await self.plan(scenario_id, report_type)
+        if plan is None:
+            return None
+        report = await self.find_ready(plan)
+        if report is not None:
+            return report, True
+        return await self.build(plan), False
+    
+    async def _render(self, plan: ReportPlan, path: str) -> int:
+        """Рендерит PDF в хранилище отчетов; возвращает размер файла"""
+        async def write(tmp_path: str):
+            await self.pool.render(plan.report_type, plan.scenario_data, plan.land_plot_data, tmp_path)
+        return await self.store.save(path, write)
+
+class ReportJobService:
+    """
+    Генерация отчетов задачами: запрос сразу получает ID задачи, рендер идет в фоне
+    в своей сессии базы, статус читается из общего хранилища.
+    """
+    
+    # Фоновые задачи процесса по ID задачи отчета: ссылки не дают сборщику мусора остановить их,
+    # shutdown их дожидается, а запросы этого процесса ждут их напрямую, без опроса хранилища
+    _tasks: Dict[str, asyncio.Task] = {}
+    
+    def __init__(self, db: AsyncSession, session_factory=None,
+                 store: Optional[ReportJobStore] = None, pool: Optional[PDFRenderPool] = None):
+        self.db = db
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.store = store or report_jobs
+        self.pool = pool
+    
+    async def submit(self, scenario_id: int, report_type: str) -> Optional[ReportJob]:
+        """Поставить отчет в работу; None, если сценария нет"""
+        reports = ReportService(self.db, self.pool)
+        plan = await reports.plan(scenario_id, report_type)
+        if plan is None:
+            return None
+        
+        job = new_job(uuid.uuid4().hex, scenario_id, report_type)
+        ready = await reports.find_ready(plan)
+        if ready is not None:
+            return await self.store.save(job, status=DONE, cached=True, **self._result(ready))
+        
+        # Тот же отчет уже рендерится (повторное нажатие, другой воркер): отдаем ту задачу
+        job = await self.store.save(job)
+        running = await self.store.claim(plan.content_hash, job.job_id)
+        if running is not None:
+            await self.store.discard(job.job_id)
+            return running
+        
+        task = asyncio.create_task(self._run(job, plan))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return job
+    
+    async def get(self, job_id: str) -> Optional[ReportJob]:
+        return await self.store.get(job_id)
+    
+    async def wait(self, job: ReportJob) -> ReportJob:
+        """Дождаться завершения задачи: рендер этого процесса - напрямую, задачу другого воркера - опросом хранилища"""
+        task = self._tasks.get(job.job_id)
+        if task is not None:
+            # shield: клиент, закрывший соединение, не отменяет рендер, который ждут и другие
+            return await asyncio.shield(task)
+        # Своя задача могла уже закончиться: тогда ее итог уже в хранилище и ждать нечего
+        return await self.store.wait(await self.store.get(job.job_id) or job)
+    
+    async def _run(self, job: ReportJob, plan: ReportPlan) -> ReportJob:
+        try:
+            job = await self.store.save(job, status=RENDERING)
+            async with self.session_factory() as session:
+                report = await ReportService(session, self.pool).build(plan)
+                result = self._result(report)
+            return await self.store.save(job, status=DONE, **result)
+        except Exception as e:
+            logger.exception("Ошибка генерации отчета %s", job.job_id)
+            return await self.store.save(job, status=FAILED, error=str(e) or type(e).__name__)
+        finally:
+            await self.store.release(plan.content_hash, job.job_id)
+    
+    @staticmethod
+    def _result(report: Report) -> Dict[str, Any]:
+        return {"report_id": report.id, "download_url": f"/downloads/{report.id}"}
+    
+    @classmethod
+    async def drain(cls, timeout: float):
+        """Дождаться фоновых задач (при остановке процесса)"""
+        if cls._tasks:
+            await asyncio.wait(list(cls._tasks.values()), timeout=timeout)
+
+class ReportBatchService:
+    """
+    Отчеты по всем (или выбранным) сценариям участка одним ZIP-архивом.
+
+    Каждый сценарий ставится задачей ReportJobService: готовые отчеты берутся сразу,
+    остальные рендерятся параллельно в пуле. Архив собирается на лету в порядке
+    готовности отчетов, первые байты уходят клиенту, пока рендерятся остальные.
+    """
+    
+    def __init__(self, db: AsyncSession, session_factory=None, jobs: Optional[ReportJobService] = None,
+                 store: Optional[ReportStore] = None):
+        self.db = db
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.jobs = jobs or ReportJobService(db, session_factory)
+        self.store = store or report_store
+    
+    async def submit(self, project_id: int, report_type: str,
+                     scenario_ids: Optional[List[int]] = None) -> Optional[List[ReportJob]]:
+        """
+        Поставить отчеты в работу; None, если участка нет. ValueError, если сценариев больше
+        REPORT_BATCH_MAX_SCENARIOS или среди scenario_ids есть чужие: архив без части
+        запрошенных отчетов не собирается.
+        """
+        if await self.db.get(Project, project_id) is None:
+            return None
+        query = select(Scenario.id).where(Scenario.project_id == project_id).order_by(Scenario.id)
+        if scenario_ids:
+            query = query.where(Scenario.id.in_(set(scenario_ids)))
+        # На одну строку больше лимита: так видно, что сценариев больше, чем помещается в архив
+        result = await self.db.execute(query.limit(REPORT_BATCH_MAX_SCENARIOS + 1))
+        found = result.scalars().all()
+        if len(found) > REPORT_BATCH_MAX_SCENARIOS:
+            raise ValueError(
+                f"В архив помещается не больше {REPORT_BATCH_MAX_SCENARIOS} сценариев: выберите их через scenario_ids"
+            )
+        missing = sorted(set(scenario_ids or ()) - set(found))
+        if missing:
+            raise ValueError(f"Сценарии не относятся к участку: {', '.join(map(str, missing))}")
+        jobs = []
+        for scenario_id in found:
+            job = await self.jobs.submit(scenario_id, report_type)
+            if job is not None:
+                jobs.append(job)
+        return jobs
+    
+    def archive(self, jobs: List[ReportJob]) -> AsyncIterator[bytes]:
+        """Содержимое ZIP-архива; отчеты, которые не удалось получить, перечислены в errors.txt"""
+        return zip_stream(self._entries(jobs))
+    
+    async def _entries(self, jobs: List[ReportJob]):
+        errors = []
+        # Сессия запроса к этому моменту может быть уже закрыта: тело ответа отдается после него
+        async with self.session_factory() as session:
+            for finished in asyncio.as_completed([self.jobs.wait(job) for job in jobs]):
+                job = await finished
+                name = f"{job.report_type}_{job.scenario_id}.pdf"
+                report = None
+                if job.status == DONE:
+                    report = await crud.ReportCRUD.get_report(session, job.report_id)
+                if report is None:
+                    errors.append(f"{name}: {job.error or 'отчет не найден'}")
+                    continue
+                await self.store.touch(session, report)
+                yield name, self.store.read(report.file_path)
+        if errors:
+            yield "errors.txt", _single_chunk(("\n".join(errors) + "\n").encode())
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    yield data
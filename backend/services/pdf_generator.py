@@ -1,161 +1,104 @@
+import hashlib
 import os
-import tempfile
 from datetime import datetime
-from typing import Dict, Any
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader
+
+from ..report_store import report_store
+
+# Каталог скомпилированных шаблонов (по умолчанию - во временной директории системы)
+PDF_TEMPLATE_CACHE_DIR = os.getenv("PDF_TEMPLATE_CACHE_DIR")
+# Перечитывать шаблоны при изменении файлов: только для разработки
+PDF_TEMPLATE_AUTO_RELOAD = os.getenv("ENVIRONMENT", "production") != "production"
+
+# Тип отчета -> шаблон
+TEMPLATES = {
+    'pre_feasibility': 'pre_feasibility.html',
+    'investment_memo': 'investment_memo.html',
+}
+# Общая таблица стилей всех отчетов
+STYLESHEET = 'report.css'
 
 class PDFGenerator:
     """Сервис для генерации PDF отчетов"""
     
-    def __init__(self):
-        # Настройка Jinja2
-        template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
-        self.env = Environment(loader=FileSystemLoader(template_dir))
-        
-        # Создаем директорию для шаблонов если её нет
-        os.makedirs(template_dir, exist_ok=True)
-        
-        # Создаем базовый шаблон если его нет
-        self._create_base_template()
+    def __init__(self, auto_reload: bool = PDF_TEMPLATE_AUTO_RELOAD,
+                 bytecode_cache_dir: Optional[str] = PDF_TEMPLATE_CACHE_DIR):
+        # Шаблоны лежат в пакете backend/templates и только читаются; скомпилированный код
+        # шаблонов сохраняется между перезапусками, поэтому воркер не парсит их заново
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+        self.env = Environment(
+            loader=PackageLoader('backend', 'templates'),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+            auto_reload=auto_reload,
+        )
+        self._source_hashes: Dict[Tuple[str, ...], str] = {}
+        # Шрифты и разобранная таблица стилей WeasyPrint создаются при первом рендере
+        self._font_config = None
+        self._stylesheet: Optional[Tuple[str, Any]] = None
+    
+    def _source_hash(self, *names: str) -> str:
+        """Хэш исходников шаблонов; вне production пересчитывается, чтобы видеть правки файлов"""
+        version = self._source_hashes.get(names)
+        if version is None or self.env.auto_reload:
+            digest = hashlib.sha256()
+            for name in names:
+                source, _, _ = self.env.loader.get_source(self.env, name)
+                digest.update(source.encode('utf-8'))
+            version = self._source_hashes[names] = digest.hexdigest()[:16]
+        return version
     
-    def _create_base_template(self):
-        """Создает базовый HTML шаблон для отчетов"""
-        template_path = os.path.join(os.path.dirname(__file__), '..', 'templates', 'base.html')
+    def template_version(self, report_type: str) -> str:
+        """Хэш шаблона отчета, base.html и стилей: меняется при любой правке, влияющей на PDF"""
+        return self._source_hash(TEMPLATES[report_type], 'base.html', STYLESHEET)
+    
+    def stylesheet(self):
+        """CSS отчетов, разобранный один раз на версию файла стилей"""
+        from weasyprint import CSS
         
-        if not os.path.exists(template_path):
-            base_template = """
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ title }}</title>
-    <style>
-        body {
-            font-family: 'Arial', sans-serif;
-            line-height: 1.6;
-            color: #333;
-            margin: 0;
-            padding: 20px;
-        }
-        .header {
-            text-align: center;
-            border-bottom: 3px solid #2c3e50;
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }
-        .header h1 {
-            color: #2c3e50;
-            margin: 0;
-            font-size: 28px;
-        }
-        .header .subtitle {
-            color: #7f8c8d;
-            font-size: 16px;
-            margin-top: 10px;
-        }
-        .section {
-            margin-bottom: 30px;
-        }
-        .section h2 {
-            color: #2c3e50;
-            border-bottom: 2px solid #3498db;
-            padding-bottom: 10px;
-            margin-bottom: 20px;
-        }
-        .info-grid {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 20px;
-            margin-bottom: 20px;
-        }
-        .info-item {
-            background: #f8f9fa;
-            padding: 15px;
-            border-radius: 8px;
-            border-left: 4px solid #3498db;
-        }
-        .info-item h3 {
-            margin: 0 0 10px 0;
-            color: #2c3e50;
-            font-size: 16px;
-        }
-        .info-item p {
-            margin: 0;
-            font-size: 18px;
-            font-weight: bold;
-            color: #27ae60;
-        }
-        .table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-        }
-        .table th, .table td {
-            border: 1px solid #ddd;
-            padding: 12px;
-            text-align: left;
-        }
-        .table th {
-            background-color: #2c3e50;
-            color: white;
-        }
-        .table tr:nth-child(even) {
-            background-color: #f2f2f2;
-        }
-        .highlight {
-            background-color: #e8f5e8;
-            padding: 15px;
-            border-radius: 8px;
-            border-left: 4px solid #27ae60;
-            margin: 20px 0;
-        }
-        .footer {
-            margin-top: 40px;
-            padding-top: 20px;
-            border-top: 1px solid #ddd;
-            text-align: center;
-            color: #7f8c8d;
-            font-size: 12px;
-        }
-        .roi-high {
-            color: #27ae60;
-            font-weight: bold;
-        }
-        .roi-medium {
-            color: #f39c12;
-            font-weight: bold;
-        }
-        .roi-low {
-            color: #e74c3c;
-            font-weight: bold;
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>{{ title }}</h1>
-        <div class="subtitle">{{ subtitle }}</div>
-    </div>
+        version = self._source_hash(STYLESHEET)
+        if self._stylesheet is None or self._stylesheet[0] != version:
+            source, _, _ = self.env.loader.get_source(self.env, STYLESHEET)
+            self._stylesheet = (version, CSS(string=source, font_config=self.font_config()))
+        return self._stylesheet[1]
     
-    {% block content %}{% endblock %}
+    def font_config(self):
+        """Конфигурация шрифтов WeasyPrint: системные шрифты ищутся один раз на процесс"""
+        if self._font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            self._font_config = FontConfiguration()
+        return self._font_config
     
-    <div class="footer">
-        <p>Отчет сгенерирован системой TrendPulse AI</p>
-        <p>{{ generated_at }}</p>
-    </div>
-</body>
-</html>
-            """
-            
-            with open(template_path, 'w', encoding='utf-8') as f:
-                f.write(base_template)
+    def generate(self, report_type: str, scenario_data: Dict[str, Any], land_plot_data: Dict[str, Any],
+                 user_data: Optional[Dict[str, Any]] = None, output_path: Optional[str] = None) -> str:
+        """Генерирует отчет нужного типа"""
+        if report_type == 'pre_feasibility':
+            return self.generate_pre_feasibility_report(scenario_data, land_plot_data, user_data, output_path)
+        if report_type == 'investment_memo':
+            return self.generate_investment_memo(scenario_data, land_plot_data, user_data, output_path)
+        raise ValueError(f"Неизвестный тип отчета: {report_type}")
+    
+    def _write_pdf(self, html_content: str, output_path: Optional[str]) -> str:
+        """Рендерит HTML в PDF; без output_path - во временный каталог хранилища отчетов (его чистит очистка)"""
+        # WeasyPrint загружает pango/cairo при импорте: подключаем только там, где реально рендерим
+        from weasyprint import HTML
+        
+        if output_path is None:
+            output_path = report_store.staging_path()
+        
+        HTML(string=html_content).write_pdf(
+            output_path,
+            stylesheets=[self.stylesheet()],
+            font_config=self.font_config()
+        )
+        return output_path
     
     def generate_pre_feasibility_report(self, scenario_data: Dict[str, Any], 
                                       land_plot_data: Dict[str, Any],
-                                      user_data: Dict[str, Any]) -> str:
+                                      user_data: Optional[Dict[str, Any]] = None,
+                                      output_path: Optional[str] = None) -> str:
         """Генерирует пред-ТЭО в формате PDF"""
         
         # Подготавливаем данные для шаблона
@@ -165,29 +108,21 @@ class PDFGenerator:
             'generated_at': datetime.now().strftime('%d.%m.%Y %H:%M'),
             'scenario': scenario_data,
             'land_plot': land_plot_data,
-            'user': user_data
+            'user': user_data,
+            'roi_class': self._get_roi_class(scenario_data['unit_economics']['roi_percentage'])
         }
         
         # Рендерим HTML
-        template = self.env.get_template('pre_feasibility.html')
+        template = self.env.get_template(TEMPLATES['pre_feasibility'])
         html_content = template.render(**template_data)
         
-        # Создаем временный файл для PDF
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-            pdf_path = tmp_file.name
-        
         # Генерируем PDF
-        font_config = FontConfiguration()
-        HTML(string=html_content).write_pdf(
-            pdf_path,
-            font_config=font_config
-        )
-        
-        return pdf_path
+        return self._write_pdf(html_content, output_path)
     
     def generate_investment_memo(self, scenario_data: Dict[str, Any],
                                land_plot_data: Dict[str, Any],
-                               user_data: Dict[str, Any]) -> str:
+                               user_data: Optional[Dict[str, Any]] = None,
+                               output_path: Optional[str] = None) -> str:
         """Генерирует инвестиционный меморандум"""
         
         template_data = {
@@ -196,22 +131,14 @@ class PDFGenerator:
             'generated_at': datetime.now().strftime('%d.%m.%Y %H:%M'),
             'scenario': scenario_data,
             'land_plot': land_plot_data,
-            'user': user_data
+            'user': user_data,
+            'roi_class': self._get_roi_class(scenario_data['unit_economics']['roi_percentage'])
         }
         
-        template = self.env.get_template('investment_memo.html')
+        template = self.env.get_template(TEMPLATES['investment_memo'])
         html_content = template.render(**template_data)
         
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-            pdf_path = tmp_file.name
-        
-        font_config = FontConfiguration()
-        HTML(string=html_content).write_pdf(
-            pdf_path,
-            font_config=font_config
-        )
-        
-        return pdf_path
+        return self._write_pdf(html_content, output_path)
     
     def _get_roi_class(self, roi: float) -> str:
         """Возвращает CSS класс для ROI в зависимости от значения"""
@@ -221,277 +148,9 @@ class PDFGenerator:
             return 'roi-medium'
         else:
             return 'roi-low'
-    
-    def create_pre_feasibility_template(self):
-        """Создает шаблон пред-ТЭО"""
-        template_path = os.path.join(os.path.dirname(__file__), '..', 'templates', 'pre_feasibility.html')
-        
-        if not os.path.exists(template_path):
-            template_content = """
-{% extends "base.html" %}
-
-{% block content %}
-<div class="section">
-    <h2>1. Резюме проекта</h2>
-    <div class="info-grid">
-        <div class="info-item">
-            <h3>Название проекта</h3>
-            <p>{{ scenario.name }}</p>
-        </div>
-        <div class="info-item">
-            <h3>Тип проекта</h3>
-            <p>{{ scenario.project_type }}</p>
-        </div>
-        <div class="info-item">
-            <h3>Площадь участка</h3>
-            <p>{{ land_plot.area }} га</p>
-        </div>
-        <div class="info-item">
-            <h3>Зонирование</h3>
-            <p>{{ land_plot.zone_type }}</p>
-        </div>
-    </div>
-    
-    <div class="highlight">
-        <h3>Ключевые показатели эффективности</h3>
-        <div class="info-grid">
-            <div class="info-item">
-                <h3>ROI</h3>
-                <p class="{{ roi_class }}">{{ "%.1f"|format(scenario.unit_economics.roi_percentage) }}%</p>
-            </div>
-            <div class="info-item">
-                <h3>Общие инвестиции</h3>
-                <p>{{ "{:,.0f}".format(scenario.unit_economics.total_investment) }} ₽</p>
-            </div>
-            <div class="info-item">
-                <h3>Срок окупаемости</h3>
-                <p>{{ "%.1f"|format(scenario.unit_economics.payback_period) }} лет</p>
-            </div>
-            <div class="info-item">
-                <h3>Срок строительства</h3>
-                <p>{{ scenario.construction_time }}</p>
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="section">
-    <h2>2. Характеристики участка</h2>
-    <table class="table">
-        <tr>
-            <th>Параметр</th>
-            <th>Значение</th>
-        </tr>
-        <tr>
-            <td>Площадь</td>
-            <td>{{ land_plot.area }} га</td>
-        </tr>
-        <tr>
-            <td>Тип зонирования</td>
-            <td>{{ land_plot.zone_type }}</td>
-        </tr>
-        <tr>
-            <td>Инфраструктура</td>
-            <td>{{ land_plot.infrastructure | join(', ') }}</td>
-        </tr>
-        <tr>
-            <td>Электричество</td>
-            <td>{% if land_plot.electricity_power %}{{ land_plot.electricity_power }} МВт{% else %}Не подключено{% endif %}</td>
-        </tr>
-        <tr>
-            <td>Дорожный доступ</td>
-            <td>{% if land_plot.road_access %}Есть{% else %}Нет{% endif %}</td>
-        </tr>
-        <tr>
-            <td>Интернет</td>
-            <td>{% if land_plot.internet_available %}Доступен{% else %}Недоступен{% endif %}</td>
-        </tr>
-    </table>
-</div>
-
-<div class="section">
-    <h2>3. Финансовая модель</h2>
-    <table class="table">
-        <tr>
-            <th>Показатель</th>
-            <th>Значение</th>
-        </tr>
-        <tr>
-            <td>Общие инвестиции</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.total_investment) }} ₽</td>
-        </tr>
-        <tr>
-            <td>Стоимость строительства</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.construction_cost) }} ₽</td>
-        </tr>
-        <tr>
-            <td>Стоимость инфраструктуры</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.infrastructure_cost) }} ₽</td>
-        </tr>
-        <tr>
-            <td>Операционные расходы (год)</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.operational_cost) }} ₽</td>
-        </tr>
-        <tr>
-            <td>Доход в год</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.revenue_per_year) }} ₽</td>
-        </tr>
-        <tr>
-            <td>ROI</td>
-            <td class="{{ roi_class }}">{{ "%.1f"|format(scenario.unit_economics.roi_percentage) }}%</td>
-        </tr>
-        <tr>
-            <td>Срок окупаемости</td>
-            <td>{{ "%.1f"|format(scenario.unit_economics.payback_period) }} лет</td>
-        </tr>
-        <tr>
-            <td>NPV</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.npv) }} ₽</td>
-        </tr>
-        <tr>
-            <td>IRR</td>
-            <td>{{ "%.1f"|format(scenario.unit_economics.irr) }}%</td>
-        </tr>
-    </table>
-</div>
-
-<div class="section">
-    <h2>4. Анализ рисков</h2>
-    <div class="info-grid">
-        <div class="info-item">
-            <h3>Уровень риска</h3>
-            <p>{{ scenario.risk_level }}</p>
-        </div>
-        <div class="info-item">
-            <h3>Рыночный спрос</h3>
-            <p>{{ scenario.market_demand }}</p>
-        </div>
-        <div class="info-item">
-            <h3>Регуляторная сложность</h3>
-            <p>{{ scenario.regulatory_complexity }}</p>
-        </div>
-    </div>
-</div>
-
-{% if scenario.recommendations %}
-<div class="section">
-    <h2>5. Рекомендации</h2>
-    <ul>
-        {% for recommendation in scenario.recommendations %}
-        <li>{{ recommendation }}</li>
-        {% endfor %}
-    </ul>
-</div>
-{% endif %}
-
-<div class="section">
-    <h2>6. Описание проекта</h2>
-    <p>{{ scenario.description }}</p>
-</div>
-{% endblock %}
-            """
-            
-            with open(template_path, 'w', encoding='utf-8') as f:
-                f.write(template_content)
-    
-    def create_investment_memo_template(self):
-        """Создает шаблон инвестиционного меморандума"""
-        template_path = os.path.join(os.path.dirname(__file__), '..', 'templates', 'investment_memo.html')
-        
-        if not os.path.exists(template_path):
-            template_content = """
-{% extends "base.html" %}
-
-{% block content %}
-<div class="section">
-    <h2>1. Исполнительное резюме</h2>
-    <p>Данный инвестиционный меморандум представляет детальный анализ проекта {{ scenario.name }} 
-    на участке площадью {{ land_plot.area }} га в зоне {{ land_plot.zone_type }}.</p>
-    
-    <div class="highlight">
-        <h3>Ключевые инвестиционные показатели</h3>
-        <div class="info-grid">
-            <div class="info-item">
-                <h3>ROI</h3>
-                <p class="{{ roi_class }}">{{ "%.1f"|format(scenario.unit_economics.roi_percentage) }}%</p>
-            </div>
-            <div class="info-item">
-                <h3>Общие инвестиции</h3>
-                <p>{{ "{:,.0f}".format(scenario.unit_economics.total_investment) }} ₽</p>
-            </div>
-            <div class="info-item">
-                <h3>NPV</h3>
-                <p>{{ "{:,.0f}".format(scenario.unit_economics.npv) }} ₽</p>
-            </div>
-            <div class="info-item">
-                <h3>IRR</h3>
-                <p>{{ "%.1f"|format(scenario.unit_economics.irr) }}%</p>
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="section">
-    <h2>2. Анализ рынка</h2>
-    <p>Рыночный спрос: <strong>{{ scenario.market_demand }}</strong></p>
-    <p>Регуляторная среда: <strong>{{ scenario.regulatory_complexity }}</strong></p>
-</div>
-
-<div class="section">
-    <h2>3. Детальная финансовая модель</h2>
-    <table class="table">
-        <tr>
-            <th>Показатель</th>
-            <th>Значение</th>
-            <th>Комментарий</th>
-        </tr>
-        <tr>
-            <td>Общие инвестиции</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.total_investment) }} ₽</td>
-            <td>Включает строительство и инфраструктуру</td>
-        </tr>
-        <tr>
-            <td>Стоимость строительства</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.construction_cost) }} ₽</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.construction_cost / land_plot.area) }} ₽/га</td>
-        </tr>
-        <tr>
-            <td>Годовой доход</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.revenue_per_year) }} ₽</td>
-            <td>Прогноз на основе рыночных данных</td>
-        </tr>
-        <tr>
-            <td>Операционные расходы</td>
-            <td>{{ "{:,.0f}".format(scenario.unit_economics.operational_cost) }} ₽</td>
-            <td>5% от общих инвестиций</td>
-        </tr>
-    </table>
-</div>
 
-<div class="section">
-    <h2>4. Анализ чувствительности</h2>
-    <p>Проект демонстрирует устойчивость к изменениям ключевых параметров:</p>
-    <ul>
-        <li>При снижении доходов на 10% ROI составит {{ "%.1f"|format(scenario.unit_economics.roi_percentage * 0.9) }}%</li>
-        <li>При росте затрат на 10% ROI составит {{ "%.1f"|format(scenario.unit_economics.roi_percentage * 0.8) }}%</li>
-        <li>Срок окупаемости остается в приемлемых пределах</li>
-    </ul>
-</div>
 
-<div class="section">
-    <h2>5. Рекомендации</h2>
-    {% if scenario.recommendations %}
-    <ul>
-        {% for recommendation in scenario.recommendations %}
-        <li>{{ recommendation }}</li>
-        {% endfor %}
-    </ul>
-    {% else %}
-    <p>Дополнительных рекомендаций не требуется.</p>
-    {% endif %}
-</div>
-{% endblock %}
-            """
-            
-            with open(template_path, 'w', encoding='utf-8') as f:
-                f.write(template_content) 
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_pdf_generator() -> PDFGenerator:
+    """Один генератор на процесс: окружение Jinja2 и его кэш шаблонов общие для всех запросов"""
+    return PDFGenerator()
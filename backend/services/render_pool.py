@@ -0,0 +1,278 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from .pdf_generator import TEMPLATES, PDFGenerator, get_pdf_generator
+
+logger = logging.getLogger(__name__)
+
+# Число процессов рендера PDF; 0 - рендер в потоке процесса API (для разработки и тестов)
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+# Предельное время рендера одного отчета (секунды)
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+# Лимит адресного пространства процесса рендера (МБ); 0 - без лимита. RLIMIT_AS считает
+# виртуальную память вместе с отображенными шрифтами и библиотеками pango/cairo, поэтому
+# значение подбирается по измерениям на своих отчетах; по умолчанию лимита нет
+PDF_RENDER_MEMORY_LIMIT_MB = int(os.getenv("PDF_RENDER_MEMORY_LIMIT_MB", "0"))
+# Через сколько задач процесс рендера заменяется новым (утечки памяти WeasyPrint не копятся); 0 - никогда
+PDF_RENDER_MAX_JOBS = int(os.getenv("PDF_RENDER_MAX_JOBS", "100"))
+
+# Сколько ждать сверх таймаута, прежде чем считать воркер зависшим (например, внутри pango)
+TIMEOUT_GRACE = 5.0
+_POLL_INTERVAL = 0.5
+
+# Очередь воркера для отметок о начале задач (задается при запуске процесса)
+_started_queue = None
+
+
+class RenderTimeout(Exception):
+    """Рендер отчета не уложился в отведенное время"""
+
+
+def _raise_timeout(signum, frame):
+    raise RenderTimeout("Превышено время рендера PDF")
+
+
+def _init_worker(memory_limit_mb: int, started_queue):
+    """Запуск процесса рендера: лимит памяти и прогрев шрифтов, стилей и шаблонов до первой задачи"""
+    global _started_queue
+    _started_queue = started_queue
+    if memory_limit_mb > 0:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    # Ctrl+C приходит всей группе процессов: воркеры останавливает родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    generator = get_pdf_generator()
+    generator.stylesheet()
+    for template in (*TEMPLATES.values(), 'base.html'):
+        generator.env.get_template(template)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _job_started(job_id: int):
+    """Сообщить родителю, что воркер взял задачу: с этого момента идет ее время"""
+    # SimpleQueue пишет в канал сразу, без фонового потока: отметка дойдет, даже если рендер завис
+    _started_queue.put((job_id, os.getpid(), time.time()))
+
+
+def _render_job(job_id: int, report_type: str, scenario_data: Dict[str, Any], land_plot_data: Dict[str, Any],
+                output_path: str, timeout: float) -> float:
+    """Задача воркера: рендер с таймаутом по SIGALRM; возвращает время рендера в мс"""
+    _job_started(job_id)
+    started = time.perf_counter()
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        get_pdf_generator().generate(report_type, scenario_data, land_plot_data, output_path=output_path)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return (time.perf_counter() - started) * 1000
+
+
+class PDFRenderPool:
+    """
+    Рендер PDF в заранее запущенных процессах: event loop API только ждет результат.
+
+    Воркеры стартуют с прогретыми шрифтами и шаблонами, каждая задача ограничена
+    по времени, процесс - по памяти и числу задач. Время задачи отсчитывается от отметки,
+    которую воркер присылает, взяв ее, а не от попадания в очередь пула. Зависший воркер
+    не дает ответа и после запаса ко времени - тогда пул пересоздается, а задачи, которые
+    в нем ждали или выполнялись, отправляются в новый пул.
+    """
+
+    # Функции процесса рендера: уровня модуля, в spawn-процессы передаются по имени
+    initializer = staticmethod(_init_worker)
+    job = staticmethod(_render_job)
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, timeout: float = PDF_RENDER_TIMEOUT,
+                 memory_limit_mb: int = PDF_RENDER_MEMORY_LIMIT_MB, max_jobs: int = PDF_RENDER_MAX_JOBS,
+                 generator: Optional[PDFGenerator] = None):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs = max_jobs
+        self._generator = generator
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started_queue = None
+        self._start_lock = asyncio.Lock()
+        self._job_ids = itertools.count(1)
+        # Задачи, которые воркеры уже взяли: job_id -> (pid, время начала)
+        self._running: Dict[int, Tuple[int, float]] = {}
+        # Пулы, остановленные из-за зависшего воркера: их задачи не виноваты в остановке
+        self._recycled: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self.pending = 0
+        self.renders = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._render_ms_total = 0.0
+        self._render_ms_max = 0.0
+        self._wait_ms_total = 0.0
+
+    @property
+    def generator(self) -> PDFGenerator:
+        """Генератор процесса API: версии шаблонов, а при workers=0 и сам рендер"""
+        return self._generator or get_pdf_generator()
+
+    async def start(self):
+        """Запустить все воркеры и дождаться их прогрева"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        async with self._start_lock:
+            if self._executor is not None:
+                return
+            # max_tasks_per_child несовместим с fork; spawn к тому же не тянет в воркер состояние event loop
+            context = multiprocessing.get_context("spawn")
+            started_queue = context.SimpleQueue()
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=self.initializer,
+                initargs=(self.memory_limit_mb, started_queue),
+                max_tasks_per_child=self.max_jobs or None,
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                # Пока свободных воркеров нет, каждая задача запускает новый процесс: стартуют все сразу
+                pids = await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self.workers)))
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            self._executor = executor
+            self._started_queue = started_queue
+            logger.info("Пул рендера PDF запущен: %d процессов", len(set(pids)))
+
+    def shutdown(self, wait: bool = True):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _restart(self, executor: ProcessPoolExecutor, hung: bool = False):
+        """Выбросить пул с зависшим или упавшим воркером; следующий рендер запустит новый"""
+        if executor is not self._executor:
+            return
+        self._executor = None
+        self.restarts += 1
+        if hung:
+            self._recycled.add(executor)
+        # shutdown не прерывает выполняющуюся задачу: зависшие процессы завершаем сами.
+        # Смерть воркера ломает весь пул: ожидающие задачи получат BrokenProcessPool и уйдут в новый
+        processes = getattr(executor, "_processes", None) or {}
+        for process in list(processes.values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+        logger.warning("Пул рендера PDF перезапущен")
+
+    def _collect_started(self):
+        """Забрать отметки о начале задач, присланные воркерами"""
+        queue = self._started_queue
+        while queue is not None and not queue.empty():
+            job_id, pid, started_at = queue.get()
+            self._running[job_id] = (pid, started_at)
+
+    async def render(self, report_type: str, scenario_data: Dict[str, Any],
+                     land_plot_data: Dict[str, Any], output_path: str) -> float:
+        """Отрендерить отчет в output_path; возвращает время рендера в мс"""
+        submitted = time.perf_counter()
+        self.pending += 1
+        try:
+            if self.workers <= 0:
+                render_ms = await asyncio.to_thread(
+                    self._render_inline, report_type, scenario_data, land_plot_data, output_path
+                )
+            else:
+                render_ms = await self._render_in_pool(report_type, scenario_data, land_plot_data, output_path)
+        except RenderTimeout:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.renders += 1
+        self._render_ms_total += render_ms
+        self._render_ms_max = max(self._render_ms_max, render_ms)
+        self._wait_ms_total += max((time.perf_counter() - submitted) * 1000 - render_ms, 0.0)
+        return render_ms
+
+    def _render_inline(self, report_type: str, scenario_data: Dict[str, Any],
+                       land_plot_data: Dict[str, Any], output_path: str) -> float:
+        started = time.perf_counter()
+        self.generator.generate(report_type, scenario_data, land_plot_data, output_path=output_path)
+        return (time.perf_counter() - started) * 1000
+
+    async def _render_in_pool(self, report_type: str, scenario_data: Dict[str, Any],
+                              land_plot_data: Dict[str, Any], output_path: str) -> float:
+        # Вторая попытка - только для задачи, пострадавшей от остановки пула из-за другой
+        for attempt in range(2):
+            await self.start()
+            executor = self._executor
+            job_id = next(self._job_ids)
+            try:
+                return await self._run_job(executor, job_id, report_type, scenario_data, land_plot_data, output_path)
+            except BrokenProcessPool:
+                self._collect_started()
+                started = job_id in self._running
+                self._restart(executor)
+                # Задачу, которую воркер еще не взял, или пул, остановленный из-за чужого
+                # зависшего рендера, повторяем; взятая задача могла сама убить воркер
+                if attempt or (started and executor not in self._recycled):
+                    raise
+                logger.info("Задача рендера PDF отправлена в новый пул")
+            finally:
+                # Отметка быстрой задачи могла еще не быть прочитана: забираем, чтобы не осталась в _running
+                self._collect_started()
+                self._running.pop(job_id, None)
+
+    async def _run_job(self, executor: ProcessPoolExecutor, job_id: int, report_type: str,
+                       scenario_data: Dict[str, Any], land_plot_data: Dict[str, Any], output_path: str) -> float:
+        future = asyncio.wrap_future(executor.submit(
+            self.job, job_id, report_type, scenario_data, land_plot_data, output_path, self.timeout
+        ))
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=_POLL_INTERVAL)
+            if done:
+                return future.result()
+            # Таймаут считается от отметки воркера: ожидание в очереди пула в него не входит
+            self._collect_started()
+            running = self._running.get(job_id)
+            if running is not None and time.time() - running[1] > self.timeout + TIMEOUT_GRACE:
+                logger.warning("Воркер рендера PDF %d не ответил за %.0f с", running[0], self.timeout)
+                future.cancel()
+                self._restart(executor, hung=True)
+                raise RenderTimeout("Воркер рендера PDF не ответил")
+
+    def stats(self) -> Dict[str, Any]:
+        busy = min(len(self._running), self.pending) if self.workers > 0 else self.pending
+        return {
+            "mode": "process" if self.workers > 0 else "inline",
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "pending": self.pending,
+            "queued": self.pending - busy,
+            "renders": self.renders,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "avg_render_ms": round(self._render_ms_total / self.renders, 1) if self.renders else 0.0,
+            "max_render_ms": round(self._render_ms_max, 1),
+            "avg_wait_ms": round(self._wait_ms_total / self.renders, 1) if self.renders else 0.0,
+        }
+
+
+pdf_pool = PDFRenderPool()
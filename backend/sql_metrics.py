@@ -0,0 +1,133 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Порог медленного запроса (мс) и число одинаковых запросов за HTTP-запрос, после которого это считается N+1
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|\$\d+|:\w+|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+|%\(\w+\)s))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Форма запроса: без лишних пробелов, списки плейсхолдеров IN (...) и VALUES свернуты"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Параметры запроса без значений: остаются только имена или количество"""
+    if isinstance(parameters, dict):
+        return {key: "***" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} наборов параметров>"
+        return ["***"] * len(parameters)
+    return "***"
+
+
+class RequestSQLStats:
+    """SQL-статистика одного HTTP-запроса"""
+
+    __slots__ = ("count", "total_ms", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_statements(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        """Запросы одной формы, выполненные больше threshold раз (признак N+1)"""
+        return [(shape, count) for shape, count in self.shapes.items() if count > threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestSQLStats]:
+    return _current_stats.get()
+
+
+def instrument_engine(engine):
+    """Подключить подсчет запросов и времени к движку (вместо echo=True)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed_ms)
+
+        if elapsed_ms >= SQL_SLOW_QUERY_MS:
+            logger.warning(
+                "Медленный запрос %.1f мс: %s; параметры: %s",
+                elapsed_ms, statement_shape(statement), redact_parameters(parameters)
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        # Не оставляем метку времени от упавшего запроса в стеке соединения
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
+
+
+class SQLMetricsMiddleware:
+    """ASGI middleware: считает SQL-запросы каждого HTTP-запроса и отдает их в Server-Timing"""
+
+    def __init__(self, app, n_plus_one_threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = f"{stats.server_timing()}, app;dur={total_ms:.1f}"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (SERVER_TIMING_HEADER.lower().encode(), timing.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            for shape, count in stats.repeated_statements(self.n_plus_one_threshold):
+                logger.warning(
+                    "Возможный N+1 в %s %s: %d одинаковых запросов: %s",
+                    scope.get("method"), scope.get("path"), count, shape
+                )
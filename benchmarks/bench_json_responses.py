@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Сравнение сериализации списочных ответов: стандартный путь FastAPI
+(валидация response_model + jsonable_encoder + json.dumps) против
+json_response (pydantic-core dump_json сразу в байты).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_json_responses.py
+"""
+
+import asyncio
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from backend.responses import json_response
+from backend.schemas import ContractorResponse, ProjectResponse
+
+ROWS = 100
+NUMBER = 500
+
+def make_contractors() -> List[ContractorResponse]:
+    return [
+        ContractorResponse(
+            id=i, name=f"ООО Строитель-{i}", specialization="Жилое строительство",
+            experience_years=10, rating=4.5, contact_phone="+7 (999) 123-45-67",
+            contact_email=f"builder{i}@test.ru", website="https://builder.ru", location="Москва",
+            projects_completed=25, average_rating=4.4, additional_info={"licenses": ["СРО"]},
+            is_active=True, created_at=datetime(2026, 1, 1, tzinfo=timezone.utc)
+        )
+        for i in range(ROWS)
+    ]
+
+def make_projects() -> List[ProjectResponse]:
+    return [
+        ProjectResponse(
+            id=i, user_id=1, name=f"Жилой комплекс {i}", description="Тестовый проект",
+            project_type="residential", location="Москва, ул. Тестовая, 1", budget=100000000,
+            area=5000, status="draft", created_at=datetime(2026, 1, 1, tzinfo=timezone.utc)
+        )
+        for i in range(ROWS)
+    ]
+
+def bench(name: str, response_type, items):
+    field = create_response_field(name="Response_bench", type_=response_type)
+    loop = asyncio.new_event_loop()
+
+    def old_path():
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=items, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    def new_path():
+        return json_response(response_type, items).body
+
+    old = min(timeit.repeat(old_path, number=NUMBER, repeat=3)) / NUMBER * 1e6
+    new = min(timeit.repeat(new_path, number=NUMBER, repeat=3)) / NUMBER * 1e6
+    loop.close()
+    print(f"{name:<28} jsonable_encoder+json: {old:8.1f} мкс   dump_json: {new:8.1f} мкс   x{old / new:.1f}")
+
+if __name__ == "__main__":
+    print(f"Страница из {ROWS} записей, {NUMBER} повторов")
+    bench("GET /contractors/", List[ContractorResponse], make_contractors())
+    bench("GET /projects/", List[ProjectResponse], make_projects())
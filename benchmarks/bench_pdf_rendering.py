@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Время рендера одного PDF-отчета: прежний путь (новая FontConfiguration
+и разбор встроенного <style> на каждый отчет) против PDFGenerator
+с общей конфигурацией шрифтов и заранее разобранной таблицей стилей.
+
+Нужен WeasyPrint с системными библиотеками pango/cairo (как в Dockerfile.backend).
+Запуск из корня репозитория:
+    python benchmarks/bench_pdf_rendering.py
+или в образе backend (каталог benchmarks в образ не копируется, подключается томом):
+    docker build -f Dockerfile.backend -t trendpulse-backend .
+    docker run --rm -v "$PWD/benchmarks:/app/benchmarks" trendpulse-backend \
+        python benchmarks/bench_pdf_rendering.py
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import weasyprint
+from weasyprint import HTML
+from weasyprint.text.ffi import pango
+from weasyprint.text.fonts import FontConfiguration
+
+from backend.reports import unit_economics
+from backend.services.pdf_generator import STYLESHEET, TEMPLATES, PDFGenerator
+
+NUMBER = 20
+
+SCENARIO = {
+    "id": 1, "name": "Жилой комплекс", "description": "Сценарий для бенчмарка",
+    "construction_time": "24 месяцев", "risk_level": "medium", "market_demand": "high",
+    "regulatory_complexity": "low", "recommendations": ["Получить ТУ на электроснабжение"],
+    "unit_economics": unit_economics(18.5, 120000000),
+}
+LAND_PLOT = {
+    "id": 1, "area": 5.0, "zone_type": "residential", "location": "Москва",
+    "infrastructure": ["electricity", "road"], "electricity_power": None,
+    "road_access": True, "internet_available": False,
+}
+
+class InlineStyleGenerator(PDFGenerator):
+    """Прежний рендер: стили внутри HTML и новая конфигурация шрифтов на каждый отчет"""
+
+    def _write_pdf(self, html_content, output_path):
+        source, _, _ = self.env.loader.get_source(self.env, STYLESHEET)
+        html_content = html_content.replace("</head>", f"<style>{source}</style></head>", 1)
+        HTML(string=html_content).write_pdf(output_path, font_config=FontConfiguration())
+        return output_path
+
+def bench(report_type: str, output_path: str):
+    old = InlineStyleGenerator()
+    new = PDFGenerator()
+    # Первый рендер (загрузка шрифтов и разбор стилей) в замер не входит
+    for generator in (old, new):
+        generator.generate(report_type, SCENARIO, LAND_PLOT, output_path=output_path)
+
+    def run(generator):
+        return lambda: generator.generate(report_type, SCENARIO, LAND_PLOT, output_path=output_path)
+
+    before = min(timeit.repeat(run(old), number=NUMBER, repeat=3)) / NUMBER * 1e3
+    after = min(timeit.repeat(run(new), number=NUMBER, repeat=3)) / NUMBER * 1e3
+    print(f"{report_type:<18} до: {before:8.1f} мс   после: {after:8.1f} мс   x{before / after:.1f}")
+
+if __name__ == "__main__":
+    # Версии в выводе: цифры до/после сравнимы только на одном окружении
+    version = pango.pango_version()
+    print(f"WeasyPrint {weasyprint.__version__}, pango {version // 10000}.{version // 100 % 100}.{version % 100}")
+    print(f"{NUMBER} отчетов подряд, лучший из 3 прогонов")
+    with tempfile.TemporaryDirectory() as tmp:
+        for report_type in TEMPLATES:
+            bench(report_type, os.path.join(tmp, f"{report_type}.pdf"))
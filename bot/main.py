@@ -201,13 +201,19 @@ async def show_projects(message: types.Message):
     
     await message.answer(projects_text, reply_markup=get_main_keyboard())
 
+# Последний список подрядчиков и его ETag: если справочник не менялся, API отвечает 304 без тела
+_contractors_cache = {"etag": None, "data": None}
+
 @dp.message(lambda message: message.text == "👷 Подрядчики")
 async def show_contractors(message: types.Message):
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.get(f"{API_URL}/contractors/")
+            headers = {"If-None-Match": _contractors_cache["etag"]} if _contractors_cache["etag"] else {}
+            response = await client.get(f"{API_URL}/contractors/", headers=headers)
             if response.status_code == 200:
-                contractors = response.json()
+                _contractors_cache.update(etag=response.headers.get("etag"), data=response.json())
+            if response.status_code in (200, 304):
+                contractors = _contractors_cache["data"]
                 if contractors:
                     # Дедупликация по ID подрядчика
                     unique_contractors = {}
@@ -1,5 +1,7 @@
 import pytest
+import pytest_asyncio
 import asyncio
+import time
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
@@ -11,7 +13,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from backend.main import app
-from backend.database import get_db
+from backend.database import get_db, get_read_db
 from backend.models import Base
 
 # Тестовая база данных
@@ -53,12 +55,62 @@ async def client(db_session):
         yield db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
     
     app.dependency_overrides.clear()
 
+@pytest_asyncio.fixture
+async def sqlite_db(tmp_path):
+    """Сессия к временной SQLite-базе со схемой приложения (для тестов без PostgreSQL)."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def sqlite_client(sqlite_db):
+    """Тестовый клиент FastAPI поверх временной SQLite-базы."""
+    async def override_get_db():
+        yield sqlite_db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+
+    app.dependency_overrides.clear()
+
+@pytest_asyncio.fixture
+async def stale_replica(tmp_path):
+    """Чтения с репликой, которая отстает от primary: пустая база со схемой приложения."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    replica = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_read_db():
+        async with replica() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield replica
+    await engine.dispose()
+
+@pytest.fixture
+def reports_dir(tmp_path, monkeypatch):
+    """Каталог отчетов во временной директории."""
+    monkeypatch.setattr("backend.reports.REPORTS_DIR", str(tmp_path / "reports"))
+    return tmp_path / "reports"
+
 @pytest.fixture
 def sample_project_data():
     """Возвращает тестовые данные для проекта."""
@@ -93,4 +145,44 @@ def sample_user_data():
         "first_name": "Тест",
         "last_name": "Пользователь",
         "role": "investor"
-    } 
\ No newline at end of file
+    } 
+
+class FakeRedis:
+    """Подмножество команд redis.asyncio в памяти: для тестов RedisBackend без сервера Redis."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def mget(self, keys):
+        return [self._get(key) for key in keys]
+
+    async def set(self, key, value, px=None, nx=False):
+        if nx and self._get(key) is not None:
+            return None
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def eval(self, script, numkeys, *args):
+        """Из скриптов поддерживается только DELETE_IF_EQUAL"""
+        from backend.cache import DELETE_IF_EQUAL
+
+        assert script == DELETE_IF_EQUAL and numkeys == 1
+        key, value = args
+        if self._get(key) != value:
+            return 0
+        return await self.delete(key)
+
+@pytest.fixture
+def fake_redis():
+    """Общее хранилище FakeRedis: несколько RedisBackend поверх него ведут себя как разные воркеры."""
+    return FakeRedis()
@@ -237,4 +237,33 @@ class TestAPIEndpoints:
         assert response.status_code == 200
         
         contractors = response.json()
-        assert len(contractors) <= 3 
\ No newline at end of file
+        assert len(contractors) <= 3 
+
+class TestStaticResponses:
+    """Тесты заранее сериализованных статических ответов."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("path", ["/", "/api-info", "/health", "/scenarios"])
+    async def test_etag_and_cache_control(self, path):
+        """Тест: ответ отдается с ETag и Cache-Control, повтор с If-None-Match дает 304."""
+        from backend.main import app
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get(path)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            assert "cache-control" in response.headers
+
+            cached = await client.get(path, headers={"If-None-Match": response.headers["etag"]})
+            assert cached.status_code == 304
+            assert cached.content == b""
+
+    @pytest.mark.asyncio
+    async def test_api_info_content(self):
+        """Тест: предвычисленное тело совпадает с перечислениями моделей."""
+        from backend.main import app
+        from backend.models import ProjectType
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            data = (await client.get("/api-info")).json()
+        assert data["supported_project_types"] == [pt.value for pt in ProjectType]
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from backend.cache import CACHES, RedisBackend, SharedCache
+
+@pytest.fixture
+def workers(fake_redis):
+    """Два воркера API с общим Redis."""
+    caches = [SharedCache("test-workers", ttl=60, backend=RedisBackend(fake_redis)) for _ in range(2)]
+    yield caches
+    CACHES.pop("test-workers", None)
+
+class TestSharedCache:
+    """Тесты общего кэша между воркерами."""
+
+    @pytest.mark.asyncio
+    async def test_cold_key_loaded_once(self, workers):
+        """Тест: одновременные промахи в двух воркерах приводят к одной загрузке из базы."""
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return b"payload"
+
+        results = await asyncio.gather(*(
+            workers[i % 2].get_or_load("contractors", loader) for i in range(20)
+        ))
+
+        assert results == [b"payload"] * 20
+        assert len(calls) == 1
+        assert workers[1].lock_waits == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_worker(self, workers):
+        """Тест: сброс пространства в одном воркере виден в другом."""
+        async def load_v1():
+            return b"v1"
+
+        async def load_v2():
+            return b"v2"
+
+        assert await workers[0].get_or_load("key", load_v1) == b"v1"
+        assert await workers[1].get_or_load("key", load_v2) == b"v1"
+
+        await workers[1].invalidate()
+        assert await workers[0].get_or_load("key", load_v2) == b"v2"
+
+    @pytest.mark.asyncio
+    async def test_backend_failure_falls_back_to_loader(self):
+        """Тест: недоступный Redis не ломает запрос, данные берутся из загрузчика."""
+        class BrokenRedis:
+            async def mget(self, keys):
+                raise ConnectionError("redis down")
+
+        cache = SharedCache("test-broken", ttl=60, backend=RedisBackend(BrokenRedis()))
+        CACHES.pop("test-broken")
+
+        async def loader():
+            return b"from-db"
+
+        assert await cache.get_or_load("key", loader) == b"from-db"
+        assert cache.errors == 1
+
+    @pytest.mark.asyncio
+    async def test_user_card_filled_from_primary(self, sqlite_client, stale_replica):
+        """Тест: карточка нового пользователя не кэшируется как отсутствующая с отстающей реплики."""
+        from backend.cache import user_cache
+
+        await user_cache.invalidate()
+        assert (await sqlite_client.get("/users/7001")).status_code == 404
+
+        response = await sqlite_client.post("/users", json={"telegram_id": 7001, "username": "new_user"})
+        assert response.status_code == 200
+
+        response = await sqlite_client.get("/users/7001")
+        assert response.status_code == 200
+        assert response.json()["username"] == "new_user"
@@ -229,4 +229,92 @@ class TestContractors:
         }
         
         response = await client.post("/contractors/", json=invalid_phone_data)
-        assert response.status_code == 422  # Validation error 
\ No newline at end of file
+        assert response.status_code == 422  # Validation error 
+
+class TestContractorListReader:
+    """Тесты чтения списка подрядчиков без ORM."""
+
+    @pytest.mark.asyncio
+    async def test_core_read_matches_orm(self, sqlite_db):
+        """Тест: Core-чтение дает те же модели ответа, что и ORM."""
+        from sqlalchemy import select
+        from backend.models import Contractor
+        from backend.schemas import ContractorResponse
+        from backend.services import CONTRACTOR_LIST
+
+        sqlite_db.add_all([
+            Contractor(name=f"ООО Строитель-{i}", specialization="Жилое строительство", rating=4.5,
+                       is_active=True, additional_info={"licenses": [i]})
+            for i in range(3)
+        ])
+        await sqlite_db.commit()
+
+        core = await CONTRACTOR_LIST.fetch(sqlite_db, CONTRACTOR_LIST.select().order_by(Contractor.id))
+        orm = (await sqlite_db.execute(select(Contractor).order_by(Contractor.id))).scalars().all()
+
+        assert core == [ContractorResponse.model_validate(contractor) for contractor in orm]
+        assert [column.name for column in CONTRACTOR_LIST.columns] == list(ContractorResponse.model_fields)
+
+class TestContractorCache:
+    """Тесты кэша справочника подрядчиков."""
+
+    @pytest.mark.asyncio
+    async def test_cached_until_write(self, sqlite_db):
+        """Тест: повторный запрос берется из кэша, запись в contractors сбрасывает кэш."""
+        import json
+        from sqlalchemy import event
+        from backend.cache import contractor_cache
+        from backend.schemas import ContractorCreate
+        from backend.services import ContractorService
+
+        await contractor_cache.invalidate()
+        service = ContractorService(sqlite_db)
+        await service.create_contractor(ContractorCreate(name="ООО Первый", specialization="Дороги", rating=4.0))
+
+        statements = []
+        engine = sqlite_db.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            first = await service.get_contractors_rendered(limit=10)
+            hits = contractor_cache.hits
+            assert await service.get_contractors_rendered(limit=10) == first
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert contractor_cache.hits == hits + 1
+        assert len(statements) == 1
+
+        await service.create_contractor(ContractorCreate(name="ООО Второй", specialization="Дороги", rating=4.2))
+        page = await service.get_contractors_rendered(limit=10)
+        assert len(json.loads(page.body)) == 2
+        assert page.etag != first.etag
+
+    def test_lru_and_ttl(self, monkeypatch):
+        """Тест: лишние записи вытесняются, просроченные не отдаются."""
+        from backend import cache
+
+        lru = cache.TTLCache("test", maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        assert lru.get("b") is None and lru.get("a") == 1 and lru.evictions == 1
+
+        now = cache.time.monotonic()
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now + 61)
+        assert lru.get("a") is None
+        assert lru.stats()["size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_filled_from_primary(self, sqlite_client, stale_replica):
+        """Тест: после добавления подрядчика кэш заполняется с primary, а не с отстающей реплики."""
+        from backend.cache import contractor_cache
+
+        await contractor_cache.invalidate()
+        response = await sqlite_client.post(
+            "/contractors/", json={"name": "ООО Новый", "specialization": "Дороги", "rating": 4.5}
+        )
+        assert response.status_code == 200
+
+        response = await sqlite_client.get("/contractors/")
+        assert [contractor["name"] for contractor in response.json()] == ["ООО Новый"]
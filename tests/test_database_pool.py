@@ -0,0 +1,73 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.db_pool import InstrumentedQueuePool, WaitHistogram
+
+class TestWaitHistogram:
+    """Тесты гистограммы ожидания соединения из пула."""
+
+    def test_observe_distributes_by_buckets(self):
+        """Тест распределения значений по корзинам."""
+        histogram = WaitHistogram(buckets_ms=(1, 10, 100))
+        for elapsed in (0.5, 1, 7, 150):
+            histogram.observe(elapsed)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 4
+        assert snapshot["max_ms"] == 150
+        assert snapshot["buckets"] == {"le_1ms": 2, "le_10ms": 1, "le_100ms": 0, "le_inf": 1}
+
+    def test_timeouts_counted_separately(self):
+        """Тест учета таймаутов ожидания."""
+        histogram = WaitHistogram()
+        histogram.observe_timeout()
+
+        snapshot = histogram.snapshot()
+        assert snapshot["timeouts"] == 1
+        assert snapshot["count"] == 0
+        assert snapshot["avg_ms"] == 0.0
+
+class TestInstrumentedQueuePool:
+    """Тесты учета ожидания в пуле соединений."""
+
+    @pytest.mark.asyncio
+    async def test_only_pool_timeouts_counted(self, tmp_path):
+        """Тест: таймаут ожидания пула учитывается, ошибка подключения к базе - нет."""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool,
+            pool_size=1, max_overflow=0, pool_timeout=0.05
+        )
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                with pytest.raises(exc.TimeoutError):
+                    await engine.connect()
+            stats = engine.pool.wait_stats.snapshot()
+            assert (stats["timeouts"], stats["count"]) == (1, 1)
+        finally:
+            await engine.dispose()
+
+        broken = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path}/missing/pool.db", poolclass=InstrumentedQueuePool
+        )
+        try:
+            with pytest.raises(exc.OperationalError):
+                await broken.connect()
+            assert broken.pool.wait_stats.snapshot()["timeouts"] == 0
+        finally:
+            await broken.dispose()
+
+class TestPoolStatsEndpoint:
+    """Тесты эндпоинта статистики пула."""
+
+    @pytest.mark.asyncio
+    async def test_db_pool_stats(self, sqlite_client: AsyncClient):
+        """Тест получения статистики пула соединений."""
+        response = await sqlite_client.get("/stats/db-pool")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert "primary" in data["pools"]
+        assert "pool_class" in data["pools"]["primary"]
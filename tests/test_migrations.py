@@ -0,0 +1,63 @@
+import asyncio
+
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.database import Base
+from backend.migrate import head_revision, upgrade
+from backend import models  # noqa: F401
+
+def _run(url, fn):
+    async def run():
+        engine = create_async_engine(url)
+        try:
+            async with engine.connect() as conn:
+                return await conn.run_sync(fn)
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+class TestMigrations:
+    """Тесты миграций схемы базы данных."""
+
+    def test_upgrade_creates_hot_query_indexes(self, tmp_path):
+        """Тест: миграции создают индексы для частых фильтров."""
+        url = f"sqlite+aiosqlite:///{tmp_path}/schema.db"
+        upgrade(url)
+
+        def indexes(conn):
+            inspector = inspect(conn)
+            return {
+                index["name"]: index["column_names"]
+                for table in inspector.get_table_names()
+                for index in inspector.get_indexes(table)
+            }
+
+        found = _run(url, indexes)
+        assert found["ix_scenarios_project_id"] == ["project_id"]
+        assert found["ix_projects_user_id"] == ["user_id"]
+        assert found["ix_contractors_is_active_specialization"] == ["is_active", "specialization"]
+        assert found["ix_market_data_region_project_type"] == ["region", "project_type"]
+        assert found["ix_reports_scenario_id"] == ["scenario_id"]
+
+    def test_migrations_match_models(self, tmp_path):
+        """Тест: схема после миграций совпадает с моделями."""
+        url = f"sqlite+aiosqlite:///{tmp_path}/schema.db"
+        upgrade(url)
+
+        def diff(conn):
+            return compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+        assert _run(url, diff) == []
+        assert _run(url, lambda conn: MigrationContext.configure(conn).get_current_revision()) == head_revision()
+
+    def test_legacy_schema_is_stamped(self, tmp_path):
+        """Тест: база, созданная create_all, помечается исходной ревизией и обновляется."""
+        url = f"sqlite+aiosqlite:///{tmp_path}/legacy.db"
+        _run(url, Base.metadata.create_all)
+
+        upgrade(url)
+
+        assert _run(url, lambda conn: MigrationContext.configure(conn).get_current_revision()) == head_revision()
@@ -0,0 +1,104 @@
+import pytest
+from datetime import datetime, timezone
+
+from backend.models import Contractor
+from backend.pagination import InvalidCursor, decode_cursor, encode_cursor
+from backend.services import ContractorService
+
+class TestCursor:
+    """Тесты кодирования курсора пагинации."""
+
+    def test_roundtrip(self):
+        """Тест: курсор декодируется в исходный ключ."""
+        created_at = datetime(2026, 10, 17, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "W10", "WyJ4Iiwx"])
+    def test_invalid_cursor(self, cursor):
+        """Тест: поврежденный курсор отклоняется."""
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor)
+
+class TestKeysetPagination:
+    """Тесты keyset-пагинации подрядчиков."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_all_rows_without_duplicates(self, sqlite_db):
+        """Тест: обход по курсорам возвращает все записи ровно один раз."""
+        created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i in range(7):
+            # Одинаковое время создания: порядок внутри него задает id
+            sqlite_db.add(Contractor(name=f"Подрядчик {i}", specialization="Жилое строительство",
+                                     is_active=True, created_at=created_at))
+        sqlite_db.add(Contractor(name="Неактивный", specialization="Жилое строительство", is_active=False))
+        await sqlite_db.commit()
+
+        service = ContractorService(sqlite_db)
+        seen, cursor = [], None
+        while True:
+            page = await service.get_contractors(limit=3, cursor=cursor)
+            seen.extend(contractor.id for contractor in page)
+            if len(page) < 3:
+                break
+            cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+        assert len(seen) == 7
+        assert seen == sorted(seen, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_pages_end_for_rows_created_in_same_second(self, sqlite_client, sqlite_db):
+        """Тест: обход через API заканчивается, когда created_at проставлен базой (CURRENT_TIMESTAMP)."""
+        for i in range(5):
+            sqlite_db.add(Contractor(name=f"Подрядчик {i}", specialization="Дороги", is_active=True))
+        await sqlite_db.commit()
+
+        seen, params = [], {"limit": 2}
+        for _ in range(5):
+            response = await sqlite_client.get("/contractors/", params=params)
+            seen.extend(contractor["id"] for contractor in response.json())
+            if "x-next-cursor" not in response.headers:
+                break
+            params = {"limit": 2, "cursor": response.headers["x-next-cursor"]}
+
+        assert "x-next-cursor" not in response.headers
+        assert seen == sorted(seen, reverse=True) and len(seen) == 5
+
+    @pytest.mark.asyncio
+    async def test_legacy_offset_mode(self, sqlite_db):
+        """Тест: skip без курсора работает как прежде."""
+        for i in range(4):
+            sqlite_db.add(Contractor(name=f"Подрядчик {i}", specialization="Коммерческое строительство",
+                                     is_active=True))
+        await sqlite_db.commit()
+
+        service = ContractorService(sqlite_db)
+        first = await service.get_contractors(limit=2)
+        second = await service.get_contractors(skip=2, limit=2)
+
+        assert {c.id for c in first}.isdisjoint({c.id for c in second})
+        assert len(first) + len(second) == 4
+
+    @pytest.mark.asyncio
+    async def test_user_scenarios_unbounded_without_paging(self, sqlite_client, sqlite_db):
+        """Тест: без cursor и limit отдаются все сценарии пользователя, с limit - страница и курсор."""
+        from backend.models import Project, Scenario, User
+
+        user = User(telegram_id=4242, is_active=True)
+        project = Project(name="Участок", project_type="residential", user=user)
+        sqlite_db.add_all([
+            Scenario(project=project, name=f"Сценарий {i}", roi=10.0, estimated_cost=1000000,
+                     construction_time="12 месяцев", risk_level="low")
+            for i in range(101)
+        ])
+        await sqlite_db.commit()
+
+        response = await sqlite_client.get("/users/4242/scenarios")
+        assert len(response.json()) == 101
+        assert "x-next-cursor" not in response.headers
+
+        response = await sqlite_client.get("/users/4242/scenarios", params={"limit": 50})
+        assert len(response.json()) == 50
+        cursor = response.headers["x-next-cursor"]
+
+        response = await sqlite_client.get("/users/4242/scenarios", params={"cursor": cursor})
+        assert len(response.json()) == 51
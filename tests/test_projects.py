@@ -212,4 +212,35 @@ class TestProjects:
         response_all = await client.get("/projects/")
         assert response_all.status_code == 200
         all_projects = response_all.json()
-        assert len(all_projects) >= 2 
\ No newline at end of file
+        assert len(all_projects) >= 2 
+
+class TestProjectETag:
+    """Тесты условных GET-запросов к проекту."""
+
+    @pytest.mark.asyncio
+    async def test_not_modified_until_changed(self, sqlite_client: AsyncClient, sqlite_db):
+        """Тест: совпавший If-None-Match дает 304, изменение проекта меняет ETag."""
+        from backend.models import Project
+
+        created = await sqlite_client.post(
+            "/projects/", json={"name": "ЖК Тестовый", "project_type": "residential", "user_id": 1}
+        )
+        project_id = created.json()["id"]
+
+        response = await sqlite_client.get(f"/projects/{project_id}")
+        etag = response.headers["etag"]
+        assert response.status_code == 200
+
+        cached = await sqlite_client.get(f"/projects/{project_id}", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+        project = await sqlite_db.get(Project, project_id)
+        project.status = "completed"
+        await sqlite_db.commit()
+
+        changed = await sqlite_client.get(f"/projects/{project_id}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["status"] == "completed"
+        assert changed.headers["etag"] != etag
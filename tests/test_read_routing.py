@@ -0,0 +1,138 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.cache import MemoryBackend, RedisBackend
+from backend.db_routing import ReadRouter, consistency_key, make_read_only
+
+async def _make_factory(path, marker, read_only=False):
+    """Создает SQLite-базу с таблицей-маркером, имитирующую отдельный сервер."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE origin (name TEXT)"))
+        await conn.execute(text("INSERT INTO origin VALUES (:name)"), {"name": marker})
+    await engine.dispose()
+    if read_only:
+        make_read_only(engine)
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+async def _origin(session):
+    result = await session.execute(text("SELECT name FROM origin"))
+    return result.scalar_one()
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    """Primary и реплика как две отдельные SQLite-базы."""
+    primary_engine, primary = await _make_factory(tmp_path / "primary.db", "primary")
+    replica_engine, replica = await _make_factory(tmp_path / "replica.db", "replica", read_only=True)
+    yield primary, replica
+    await primary_engine.dispose()
+    await replica_engine.dispose()
+
+class TestReadRouter:
+    """Тесты маршрутизации чтения между primary и репликой."""
+
+    @pytest.mark.asyncio
+    async def test_reads_go_to_replica(self, databases):
+        """Тест: чтение без свежих записей идет на реплику."""
+        primary, replica = databases
+        router = ReadRouter(primary, replica)
+
+        session = await router.open_session([consistency_key("telegram_id", 1)])
+        async with session:
+            assert await _origin(session) == "replica"
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes_window(self, databases):
+        """Тест: после записи пользователя его чтения идут на primary."""
+        primary, replica = databases
+        router = ReadRouter(primary, replica, consistency_window=60, backend=MemoryBackend())
+        await router.mark_write(consistency_key("telegram_id", 1))
+
+        own = await router.open_session([consistency_key("telegram_id", 1)])
+        async with own:
+            assert await _origin(own) == "primary"
+
+        other = await router.open_session([consistency_key("telegram_id", 2)])
+        async with other:
+            assert await _origin(other) == "replica"
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes_across_workers(self, databases, fake_redis):
+        """Тест: запись в одном воркере направляет чтения этого пользователя на primary в другом."""
+        primary, replica = databases
+        writer, reader = (
+            ReadRouter(primary, replica, consistency_window=60, backend=RedisBackend(fake_redis)) for _ in range(2)
+        )
+        await writer.mark_write(consistency_key("project_id", 7))
+
+        session = await reader.open_session([consistency_key("project_id", 7)])
+        async with session:
+            assert await _origin(session) == "primary"
+
+    @pytest.mark.asyncio
+    async def test_fallback_to_primary_when_replica_down(self, databases, tmp_path):
+        """Тест: при недоступной реплике чтение уходит на primary."""
+        primary, _ = databases
+        broken_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+        broken = async_sessionmaker(broken_engine, class_=AsyncSession)
+        router = ReadRouter(primary, broken, retry_interval=60)
+
+        session = await router.open_session()
+        async with session:
+            assert await _origin(session) == "primary"
+        assert not router.replica_available
+        await broken_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_replica_is_read_only(self, databases):
+        """Тест: запись через реплику запрещена."""
+        _, replica = databases
+        async with replica() as session:
+            with pytest.raises(OperationalError):
+                await session.execute(text("INSERT INTO origin VALUES ('x')"))
+
+@pytest_asyncio.fixture
+async def routed_client(sqlite_db, tmp_path, monkeypatch):
+    """Клиент API с настоящей маршрутизацией чтения: primary - sqlite_db, реплика отстает (пустая)."""
+    from httpx import AsyncClient
+    from backend import database
+    from backend.database import get_db
+    from backend.main import app
+    from backend.models import Base
+
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/lagging.db")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    primary = async_sessionmaker(sqlite_db.bind, class_=AsyncSession, expire_on_commit=False)
+    replica = async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "read_router", ReadRouter(primary, replica, backend=MemoryBackend()))
+
+    async def override_get_db():
+        yield sqlite_db
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+    await replica_engine.dispose()
+
+class TestReadYourWritesRoutes:
+    """Тесты чтения своих записей через API при отстающей реплике."""
+
+    @pytest.mark.asyncio
+    async def test_created_resources_read_back(self, routed_client):
+        """Тест: только что созданные проект и сценарии читаются сразу, без 404 с реплики."""
+        response = await routed_client.post(
+            "/projects/", json={"name": "Участок", "project_type": "residential", "user_id": 1}
+        )
+        project_id = response.json()["id"]
+        assert (await routed_client.get(f"/projects/{project_id}")).status_code == 200
+
+        response = await routed_client.post(f"/projects/{project_id}/scenarios/", json={"name": "Склад"})
+        assert (await routed_client.get(f"/scenarios/{response.json()['id']}")).status_code == 200
+
+        response = await routed_client.post(f"/projects/{project_id}/scenarios/generate/", params={"count": 1})
+        assert (await routed_client.get(f"/scenarios/{response.json()[0]['id']}")).status_code == 200
@@ -0,0 +1,637 @@
+import asyncio
+import os
+import time
+
+import pytest
+import pytest_asyncio
+
+from backend.services.pdf_generator import PDFGenerator
+from backend.services.render_pool import PDFRenderPool
+
+class CountingGenerator(PDFGenerator):
+    """Генератор без WeasyPrint: пишет HTML вместо PDF и считает рендеры."""
+
+    def __init__(self, gate=None):
+        super().__init__()
+        self.renders = 0
+        self.gate = gate
+
+    def _write_pdf(self, html_content, output_path):
+        self.renders += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(html_content)
+        return output_path
+
+def _init_test_worker(memory_limit_mb, started_queue):
+    """Запуск процесса рендера без WeasyPrint"""
+    from backend.services import render_pool
+    render_pool._started_queue = started_queue
+
+def _sleep_job(job_id, report_type, scenario_data, land_plot_data, output_path, timeout):
+    """Задача воркера, которая спит scenario_data["sleep"] секунд вместо рендера"""
+    from backend.services.render_pool import _job_started
+    _job_started(job_id)
+    time.sleep(scenario_data["sleep"])
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(report_type)
+    return scenario_data["sleep"] * 1000
+
+class SleepingRenderPool(PDFRenderPool):
+    initializer = staticmethod(_init_test_worker)
+    job = staticmethod(_sleep_job)
+
+async def _create_scenario(db):
+    from backend.models import Project, Scenario
+    project = Project(
+        name="Участок 5 га", description="Инфраструктура: electricity, road",
+        project_type="residential", area=5.0
+    )
+    scenario = Scenario(
+        project=project, name="Жилой комплекс", roi=18.5, estimated_cost=120000000,
+        construction_time="24 месяцев", risk_level="medium", market_demand="high",
+        regulatory_complexity="low"
+    )
+    db.add(scenario)
+    await db.commit()
+    return scenario.id
+
+@pytest.fixture
+def render_pool(sqlite_db, reports_dir, monkeypatch):
+    """Рендер в потоке и фоновые задачи на временной SQLite-базе."""
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    pool = PDFRenderPool(workers=0, generator=CountingGenerator())
+    monkeypatch.setattr("backend.services.pdf_pool", pool)
+    monkeypatch.setattr("backend.main.pdf_pool", pool)
+    monkeypatch.setattr(
+        "backend.services.AsyncSessionLocal",
+        async_sessionmaker(sqlite_db.bind, class_=AsyncSession, expire_on_commit=False)
+    )
+    return pool
+
+class TestReportReuse:
+    """Тесты повторного использования PDF по хэшу содержимого."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_request_returns_existing_report(self, sqlite_db, reports_dir):
+        """Тест: повторный запрос отдает тот же отчет без рендера."""
+        from backend.services import ReportService
+
+        scenario_id = await _create_scenario(sqlite_db)
+        generator = CountingGenerator()
+        service = ReportService(sqlite_db, PDFRenderPool(workers=0, generator=generator))
+
+        report, cached = await service.get_or_create_pdf(scenario_id, "pre_feasibility")
+        again, cached_again = await service.get_or_create_pdf(scenario_id, "pre_feasibility")
+
+        assert (cached, cached_again) == (False, True)
+        assert again.id == report.id
+        assert generator.renders == 1
+        path = reports_dir / report.content_hash[:2] / f"{report.content_hash}.pdf"
+        assert report.file_path == str(path)
+        assert report.file_size == path.stat().st_size
+        # Временный файл рендера переименован, в tmp ничего не осталось
+        assert list((reports_dir / "tmp").iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_hash_covers_report_type_and_data(self, sqlite_db, reports_dir):
+        """Тест: другой тип отчета или измененный сценарий дают новый отчет."""
+        from backend.models import Scenario
+        from backend.services import ReportService
+
+        scenario_id = await _create_scenario(sqlite_db)
+        service = ReportService(sqlite_db, PDFRenderPool(workers=0, generator=CountingGenerator()))
+
+        memo, _ = await service.get_or_create_pdf(scenario_id, "investment_memo")
+        feasibility, _ = await service.get_or_create_pdf(scenario_id, "pre_feasibility")
+        assert memo.content_hash != feasibility.content_hash
+
+        scenario = await sqlite_db.get(Scenario, scenario_id)
+        scenario.roi = 21.0
+        await sqlite_db.commit()
+        updated, cached = await service.get_or_create_pdf(scenario_id, "pre_feasibility")
+        assert not cached
+        assert updated.content_hash != feasibility.content_hash
+
+    @pytest.mark.asyncio
+    async def test_missing_file_is_rendered_again(self, sqlite_db, reports_dir):
+        """Тест: если файл удален, отчет перерисовывается в ту же запись."""
+        import os
+        from backend.services import ReportService
+
+        scenario_id = await _create_scenario(sqlite_db)
+        generator = CountingGenerator()
+        service = ReportService(sqlite_db, PDFRenderPool(workers=0, generator=generator))
+
+        report, _ = await service.get_or_create_pdf(scenario_id, "pre_feasibility")
+        os.remove(report.file_path)
+        again, cached = await service.get_or_create_pdf(scenario_id, "pre_feasibility")
+
+        assert not cached
+        assert again.id == report.id
+        assert os.path.exists(again.file_path)
+        assert generator.renders == 2
+
+class TestReportStore:
+    """Тесты хранилища и очистки каталога отчетов."""
+
+    @staticmethod
+    async def _reports(db, *ages_and_sizes):
+        """Отчеты с файлами заданного размера, не скачанные заданное число часов."""
+        from datetime import datetime, timedelta, timezone
+        from backend import crud
+        from backend.report_store import report_store
+
+        scenario_id = await _create_scenario(db)
+        created = []
+        for index, (hours, size) in enumerate(ages_and_sizes):
+            content_hash = f"{index:02d}" + "f" * 62
+            path = report_store.path(content_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+            report = await crud.ReportCRUD.create_report(
+                db, scenario_id, "pre_feasibility", path, size, content_hash=content_hash
+            )
+            report.last_accessed_at = datetime.now(timezone.utc) - timedelta(hours=hours)
+            created.append(report)
+        await db.commit()
+        return created
+
+    @staticmethod
+    async def _remaining(db):
+        from sqlalchemy import select
+        from backend.models import Report
+
+        return sorted((await db.execute(select(Report.id))).scalars().all())
+
+    @pytest.mark.asyncio
+    async def test_sweep_by_age_and_size(self, sqlite_db, reports_dir):
+        """Тест: удаляются отчеты старше max_age, затем давно не скачанные сверх лимита объема."""
+        from backend.report_store import ReportStore
+
+        old, stale, recent, fresh = await self._reports(sqlite_db, (24 * 40, 100), (48, 100), (2, 100), (0, 100))
+        store = ReportStore(max_bytes=250, max_age=30 * 86400)
+
+        stats = await store.sweep(sqlite_db)
+
+        assert await self._remaining(sqlite_db) == [recent.id, fresh.id]
+        assert not os.path.exists(old.file_path) and not os.path.exists(stale.file_path)
+        assert os.path.exists(recent.file_path) and os.path.exists(fresh.file_path)
+        assert (stats["evicted"], stats["freed_bytes"], stats["bytes"]) == (2, 200, 200)
+
+    @pytest.mark.asyncio
+    async def test_sweep_reconciles_files_and_rows(self, sqlite_db, reports_dir):
+        """Тест: записи без файлов удаляются, размер сверяется, ничьи и недописанные файлы удаляются."""
+        import time
+        from backend.report_store import ReportStore
+
+        lost, resized = await self._reports(sqlite_db, (1, 10), (1, 10))
+        os.remove(lost.file_path)
+        with open(resized.file_path, "ab") as f:
+            f.write(b"y" * 5)
+
+        store = ReportStore(max_bytes=0, max_age=0)
+        orphan = reports_dir / "ab" / ("ab" * 32 + ".pdf")
+        orphan.parent.mkdir(parents=True, exist_ok=True)
+        orphan.write_bytes(b"orphan")
+        stale_tmp = store.staging_path()
+        open(stale_tmp, "wb").close()
+        long_ago = time.time() - 2 * 3600
+        os.utime(orphan, (long_ago, long_ago))
+        os.utime(stale_tmp, (long_ago, long_ago))
+        # Свежий файл без записи может быть только что дописанным рендером: его не трогаем
+        fresh_tmp = store.staging_path()
+        open(fresh_tmp, "wb").close()
+
+        stats = await store.sweep(sqlite_db)
+
+        assert await self._remaining(sqlite_db) == [resized.id]
+        assert resized.file_size == 15
+        assert not orphan.exists() and not os.path.exists(stale_tmp)
+        assert os.path.exists(fresh_tmp) and os.path.exists(resized.file_path)
+        assert (stats["missing"], stats["orphans"], stats["evicted"]) == (1, 2, 0)
+
+    @pytest.mark.asyncio
+    async def test_download_marks_last_access(self, sqlite_client, sqlite_db, reports_dir):
+        """Тест: скачивание обновляет время последнего доступа, но не чаще раза в час."""
+        from datetime import datetime, timedelta, timezone
+        from backend.report_store import last_used
+
+        stale, recent = await self._reports(sqlite_db, (5, 10), (0, 10))
+        recent_access = last_used(recent)
+
+        for report in (stale, recent):
+            response = await sqlite_client.get(f"/downloads/{report.id}")
+            assert response.status_code == 200
+
+        await sqlite_db.refresh(stale)
+        await sqlite_db.refresh(recent)
+        assert datetime.now(timezone.utc) - last_used(stale) < timedelta(minutes=1)
+        assert last_used(recent) == recent_access
+
+class TestReportJobs:
+    """Тесты API задач генерации отчетов."""
+
+    @pytest.mark.asyncio
+    async def test_job_lifecycle(self, sqlite_client, sqlite_db, render_pool):
+        """Тест: POST сразу отдает задачу, после рендера отчет скачивается, повтор берет готовый."""
+        from backend.services import ReportJobService
+
+        scenario_id = await _create_scenario(sqlite_db)
+        response = await sqlite_client.post(f"/scenarios/{scenario_id}/generate-pdf")
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert response.headers["location"] == f"/reports/jobs/{job['job_id']}"
+
+        await ReportJobService.drain(5)
+        job = (await sqlite_client.get(f"/reports/jobs/{job['job_id']}")).json()
+        assert (job["status"], job["progress"], job["cached"]) == ("done", 1.0, False)
+
+        download = await sqlite_client.get(job["download_url"])
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/pdf"
+        assert download.content.startswith(b"<!DOCTYPE html>")
+
+        again = (await sqlite_client.post(f"/scenarios/{scenario_id}/generate-pdf")).json()
+        assert (again["status"], again["cached"], again["report_id"]) == ("done", True, job["report_id"])
+        assert render_pool.stats()["renders"] == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicate_request_joins_running_job(self, sqlite_client, sqlite_db, render_pool):
+        """Тест: повторное нажатие во время рендера возвращает ту же задачу."""
+        from backend.services import ReportJobService
+
+        import threading
+
+        gate = threading.Event()
+        render_pool._generator.gate = gate
+        scenario_id = await _create_scenario(sqlite_db)
+        first = (await sqlite_client.post(f"/scenarios/{scenario_id}/generate-pdf")).json()
+        second = (await sqlite_client.post(f"/scenarios/{scenario_id}/generate-pdf")).json()
+        gate.set()
+        await ReportJobService.drain(5)
+
+        assert second["job_id"] == first["job_id"]
+        assert render_pool.stats()["renders"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_submits_render_once(self, sqlite_db, render_pool):
+        """Тест: запрос, пришедший сразу после привязки хэша другим воркером, получает его задачу."""
+        import threading
+        from backend import services
+        from backend.cache import MemoryBackend
+        from backend.report_jobs import ReportJobStore
+
+        class RacingBackend(MemoryBackend):
+            """Второй запрос выполняется сразу после того, как первый закрепил хэш."""
+
+            race = None
+
+            async def add(self, key, value, ttl=None):
+                added = await super().add(key, value, ttl)
+                if added and self.race is not None:
+                    race, self.race = self.race, None
+                    self.raced = await race
+                return added
+
+        gate = threading.Event()
+        render_pool._generator.gate = gate
+        scenario_id = await _create_scenario(sqlite_db)
+        backend = RacingBackend()
+        store = ReportJobStore(backend=backend)
+        async with services.AsyncSessionLocal() as first, services.AsyncSessionLocal() as second:
+            backend.race = services.ReportJobService(second, store=store).submit(scenario_id, "pre_feasibility")
+            job = await services.ReportJobService(first, store=store).submit(scenario_id, "pre_feasibility")
+        gate.set()
+        await services.ReportJobService.drain(5)
+
+        assert backend.raced.job_id == job.job_id
+        assert render_pool.stats()["renders"] == 1
+
+    @pytest.mark.asyncio
+    async def test_late_release_keeps_newer_claim(self, fake_redis):
+        """Тест: завершившаяся задача снимает только свою привязку хэша, а не перехватившей его новой задачи."""
+        from backend.cache import MemoryBackend, RedisBackend
+        from backend.report_jobs import DONE, ReportJobStore, new_job
+
+        for backend in (MemoryBackend(), RedisBackend(fake_redis)):
+            store = ReportJobStore(backend=backend)
+            old = await store.save(new_job("old", 1, "pre_feasibility"))
+            assert await store.claim("hash", old.job_id) is None
+            await store.save(old, status=DONE)
+
+            new = await store.save(new_job("new", 1, "pre_feasibility"))
+            assert await store.claim("hash", new.job_id) is None
+            await store.release("hash", old.job_id)
+
+            assert (await store.claim("hash", "third")).job_id == new.job_id
+            await store.release("hash", new.job_id)
+            assert await store.claim("hash", "third") is None
+
+    @pytest.mark.asyncio
+    async def test_errors(self, sqlite_client, sqlite_db, render_pool):
+        """Тест: неизвестные тип отчета, сценарий, задача и отчет."""
+        scenario_id = await _create_scenario(sqlite_db)
+        response = await sqlite_client.post(f"/scenarios/{scenario_id}/generate-pdf", params={"report_type": "unknown"})
+        assert response.status_code == 400
+        assert (await sqlite_client.post("/scenarios/999/generate-pdf")).status_code == 404
+        assert (await sqlite_client.get("/reports/jobs/unknown")).status_code == 404
+        assert (await sqlite_client.get("/downloads/999")).status_code == 404
+
+class TestReportDownloads:
+    """Тесты скачивания отчетов."""
+
+    @pytest_asyncio.fixture
+    async def report(self, sqlite_db, reports_dir):
+        """Отчет с файлом из 1000 байт."""
+        from backend import crud
+
+        scenario_id = await _create_scenario(sqlite_db)
+        reports_dir.mkdir()
+        path = reports_dir / ("a" * 64 + ".pdf")
+        path.write_bytes(bytes(range(250)) * 4)
+        return await crud.ReportCRUD.create_report(
+            sqlite_db, scenario_id, "pre_feasibility", str(path), 1000, content_hash="a" * 64
+        )
+
+    @pytest.mark.asyncio
+    async def test_full_and_conditional(self, sqlite_client, report):
+        """Тест: полный ответ с ETag и длиной, 304 по If-None-Match, HEAD без тела."""
+        response = await sqlite_client.get(f"/downloads/{report.id}")
+        assert response.status_code == 200
+        assert response.content == bytes(range(250)) * 4
+        assert response.headers["content-length"] == "1000"
+        assert response.headers["accept-ranges"] == "bytes"
+        etag = response.headers["etag"]
+
+        response = await sqlite_client.get(f"/downloads/{report.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = await sqlite_client.head(f"/downloads/{report.id}")
+        assert response.status_code == 200
+        assert response.headers["content-length"] == "1000"
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_ranges(self, sqlite_client, report):
+        """Тест: 206 для диапазона, 416 за концом файла, If-Range со старым ETag отдает файл целиком."""
+        url = f"/downloads/{report.id}"
+        data = bytes(range(250)) * 4
+
+        response = await sqlite_client.get(url, headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.content == data[10:20]
+        assert response.headers["content-range"] == "bytes 10-19/1000"
+        assert response.headers["content-length"] == "10"
+
+        response = await sqlite_client.get(url, headers={"Range": "bytes=-5"})
+        assert (response.status_code, response.content) == (206, data[-5:])
+
+        response = await sqlite_client.get(url, headers={"Range": "bytes=990-"})
+        assert (response.status_code, response.content) == (206, data[990:])
+
+        response = await sqlite_client.get(url, headers={"Range": "bytes=1000-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */1000"
+
+        etag = response.headers["etag"]
+        response = await sqlite_client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert response.status_code == 206
+        response = await sqlite_client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert (response.status_code, len(response.content)) == (200, 1000)
+
+    @pytest.mark.asyncio
+    async def test_accel_redirect(self, sqlite_client, report, monkeypatch):
+        """Тест: в режиме X-Accel-Redirect API не отдает байты файла."""
+        monkeypatch.setattr("backend.downloads.REPORTS_ACCEL_REDIRECT", "/internal/reports/")
+
+        response = await sqlite_client.get(f"/downloads/{report.id}")
+        assert response.status_code == 200
+        assert response.headers["x-accel-redirect"] == "/internal/reports/" + "a" * 64 + ".pdf"
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content == b""
+
+    @pytest.mark.parametrize("header, expected", [
+        ("bytes=0-0", (0, 0)),
+        ("bytes=5-2000", (5, 999)),
+        ("bytes=-2000", (0, 999)),
+        ("bytes=0-1,5-6", None),
+        ("bytes=abc", None),
+        ("items=0-1", None),
+        ("bytes=9-2", None),
+    ])
+    def test_parse_range(self, header, expected):
+        """Тест: разбор заголовка Range."""
+        from backend.downloads import parse_range
+
+        assert parse_range(header, 1000) == expected
+
+class TestReportBatch:
+    """Тесты архива отчетов по сценариям участка."""
+
+    @staticmethod
+    async def _project(db, *names):
+        from backend.models import Project, Scenario
+
+        project = Project(name="Участок 5 га", project_type="residential", area=5.0)
+        scenarios = [
+            Scenario(
+                project=project, name=name, roi=18.5, estimated_cost=120000000,
+                construction_time="24 месяцев", risk_level="medium"
+            )
+            for name in names
+        ]
+        db.add_all(scenarios)
+        await db.commit()
+        return project.id, [scenario.id for scenario in scenarios]
+
+    @pytest.mark.asyncio
+    async def test_archive_streams_all_scenarios(self, sqlite_client, sqlite_db, render_pool):
+        """Тест: архив содержит отчеты всех сценариев, готовые отчеты не рендерятся повторно."""
+        import io
+        import zipfile
+        from backend.services import ReportService
+
+        project_id, scenario_ids = await self._project(sqlite_db, "Жилой комплекс", "Склад", "Офисы")
+        ready, _ = await ReportService(sqlite_db, render_pool).get_or_create_pdf(scenario_ids[0], "pre_feasibility")
+        assert render_pool.generator.renders == 1
+
+        response = await sqlite_client.post(f"/projects/{project_id}/reports.zip")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert "content-length" not in response.headers
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == [f"pre_feasibility_{scenario_id}.pdf" for scenario_id in scenario_ids]
+        with open(ready.file_path, "rb") as f:
+            assert archive.read(f"pre_feasibility_{scenario_ids[0]}.pdf") == f.read()
+        assert "Склад" in archive.read(f"pre_feasibility_{scenario_ids[1]}.pdf").decode()
+        assert render_pool.generator.renders == 3
+
+        response = await sqlite_client.post(
+            f"/projects/{project_id}/reports.zip", params={"scenario_ids": [scenario_ids[2]]}
+        )
+        assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == [f"pre_feasibility_{scenario_ids[2]}.pdf"]
+        assert render_pool.generator.renders == 3
+
+    @pytest.mark.asyncio
+    async def test_local_renders_awaited_without_polling(self, sqlite_client, sqlite_db, render_pool, monkeypatch):
+        """Тест: рендеры этого процесса архив ждет напрямую, а не опросом хранилища задач."""
+        import io
+        import threading
+        import zipfile
+
+        project_id, scenario_ids = await self._project(sqlite_db, "Жилой комплекс", "Склад")
+        monkeypatch.setattr("backend.report_jobs.WAIT_POLL_INTERVAL", 60)
+        gate = threading.Event()
+        render_pool._generator.gate = gate
+        asyncio.get_running_loop().call_later(0.2, gate.set)
+
+        response = await asyncio.wait_for(sqlite_client.post(f"/projects/{project_id}/reports.zip"), 5)
+
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert sorted(archive.namelist()) == [f"pre_feasibility_{scenario_id}.pdf" for scenario_id in scenario_ids]
+
+    @pytest.mark.asyncio
+    async def test_failed_report_listed_in_errors(self, sqlite_client, sqlite_db, render_pool, monkeypatch):
+        """Тест: отчет, который не удалось построить, не прерывает архив и попадает в errors.txt."""
+        import io
+        import zipfile
+
+        project_id, (good_id, broken_id) = await self._project(sqlite_db, "Жилой комплекс", "Сломанный")
+        write_pdf = render_pool.generator._write_pdf
+
+        def failing_write_pdf(html_content, output_path):
+            if "Сломанный" in html_content:
+                raise RuntimeError("шаблон не отрисован")
+            return write_pdf(html_content, output_path)
+
+        monkeypatch.setattr(render_pool.generator, "_write_pdf", failing_write_pdf)
+
+        response = await sqlite_client.post(f"/projects/{project_id}/reports.zip")
+
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert sorted(archive.namelist()) == ["errors.txt", f"pre_feasibility_{good_id}.pdf"]
+        assert archive.read("errors.txt").decode() == f"pre_feasibility_{broken_id}.pdf: шаблон не отрисован\n"
+
+    @pytest.mark.asyncio
+    async def test_errors(self, sqlite_client, sqlite_db, render_pool):
+        """Тест: неизвестный участок, участок без сценариев и неизвестный тип отчета."""
+        from backend.models import Project
+
+        empty = Project(name="Пустой участок", project_type="residential")
+        sqlite_db.add(empty)
+        await sqlite_db.commit()
+
+        assert (await sqlite_client.post("/projects/999/reports.zip")).status_code == 404
+        assert (await sqlite_client.post(f"/projects/{empty.id}/reports.zip")).status_code == 404
+        response = await sqlite_client.post(f"/projects/{empty.id}/reports.zip", params={"report_type": "unknown"})
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_foreign_and_excess_scenarios_rejected(self, sqlite_client, sqlite_db, render_pool, monkeypatch):
+        """Тест: чужие сценарии и сценарии сверх лимита отклоняются до рендера, а не пропускаются молча."""
+        project_id, scenario_ids = await self._project(sqlite_db, "Жилой комплекс", "Склад")
+        _, foreign_ids = await self._project(sqlite_db, "Офисы")
+
+        response = await sqlite_client.post(
+            f"/projects/{project_id}/reports.zip", params={"scenario_ids": [scenario_ids[0], foreign_ids[0]]}
+        )
+        assert response.status_code == 422
+        assert str(foreign_ids[0]) in response.json()["detail"]
+
+        monkeypatch.setattr("backend.services.REPORT_BATCH_MAX_SCENARIOS", 1)
+        assert (await sqlite_client.post(f"/projects/{project_id}/reports.zip")).status_code == 422
+        response = await sqlite_client.post(
+            f"/projects/{project_id}/reports.zip", params={"scenario_ids": [scenario_ids[1]]}
+        )
+        assert response.status_code == 200
+        assert render_pool.generator.renders == 1
+
+class TestPDFTemplates:
+    """Тесты окружения шаблонов PDF."""
+
+    def test_generator_is_shared(self):
+        """Тест: генератор один на процесс, шаблоны компилируются один раз."""
+        from backend.services.pdf_generator import get_pdf_generator
+
+        generator = get_pdf_generator()
+        assert get_pdf_generator() is generator
+        assert generator.env.get_template("pre_feasibility.html") is generator.env.get_template("pre_feasibility.html")
+
+    def test_templates_are_read_only(self, tmp_path):
+        """Тест: шаблоны читаются из пакета, на диск пишется только байткод."""
+        import os
+        import backend
+        from backend.services.pdf_generator import TEMPLATES
+
+        templates_dir = os.path.join(os.path.dirname(backend.__file__), "templates")
+        before = {name: os.stat(os.path.join(templates_dir, name)).st_mtime_ns for name in os.listdir(templates_dir)}
+
+        generator = PDFGenerator(auto_reload=False, bytecode_cache_dir=str(tmp_path / "bytecode"))
+        for template in TEMPLATES.values():
+            generator.env.get_template(template)
+
+        assert {name: os.stat(os.path.join(templates_dir, name)).st_mtime_ns for name in os.listdir(templates_dir)} == before
+        assert len(os.listdir(tmp_path / "bytecode")) == len(TEMPLATES)
+
+    def test_stylesheet_changes_template_version(self):
+        """Тест: правка общей таблицы стилей меняет версию шаблонов и, значит, хэш отчетов."""
+        from jinja2 import DictLoader
+
+        sources = {"pre_feasibility.html": "{% extends 'base.html' %}", "base.html": "<html></html>", "report.css": "body {}"}
+        generator = PDFGenerator(auto_reload=True)
+        generator.env.loader = DictLoader(sources)
+
+        version = generator.template_version("pre_feasibility")
+        sources["report.css"] = "body { color: #333; }"
+        assert generator.template_version("pre_feasibility") != version
+
+class TestPDFRenderPool:
+    """Тесты пула рендера PDF."""
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, tmp_path):
+        """Тест: пул считает рендеры, ошибки и время рендера."""
+        from backend.reports import unit_economics
+
+        pool = PDFRenderPool(workers=0, generator=CountingGenerator())
+        scenario = {"name": "Жилой комплекс", "unit_economics": unit_economics(18.5, 120000000)}
+        land_plot = {"area": 5.0, "zone_type": "residential", "infrastructure": []}
+
+        await pool.render("pre_feasibility", scenario, land_plot, str(tmp_path / "report.pdf"))
+        with pytest.raises(ValueError):
+            await pool.render("unknown", scenario, land_plot, str(tmp_path / "unknown.pdf"))
+
+        stats = pool.stats()
+        assert stats["mode"] == "inline"
+        assert (stats["renders"], stats["failures"], stats["pending"]) == (1, 1, 0)
+        assert stats["max_render_ms"] >= stats["avg_render_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_hung_worker_does_not_fail_queued_jobs(self, tmp_path, monkeypatch):
+        """Тест: время считается от начала рендера, задача из очереди после перезапуска пула выполняется."""
+        monkeypatch.setattr("backend.services.render_pool.TIMEOUT_GRACE", 0.0)
+        pool = SleepingRenderPool(workers=1, timeout=1.0)
+        try:
+            await pool.start()
+            hung = asyncio.create_task(pool.render("hung", {"sleep": 30}, {}, str(tmp_path / "hung.pdf")))
+            await asyncio.sleep(0.2)
+            # Задача ждет в очереди пула (и даже в его call queue), пока воркер занят зависшей
+            queued = asyncio.create_task(pool.render("queued", {"sleep": 0}, {}, str(tmp_path / "queued.pdf")))
+
+            from backend.services.render_pool import RenderTimeout
+            with pytest.raises(RenderTimeout):
+                await hung
+            await queued
+
+            assert (tmp_path / "queued.pdf").read_text(encoding="utf-8") == "queued"
+            stats = pool.stats()
+            assert (stats["renders"], stats["timeouts"], stats["failures"], stats["restarts"]) == (1, 1, 0, 1)
+        finally:
+            pool.shutdown(wait=False)
@@ -169,4 +169,231 @@ class TestScenarios:
             assert isinstance(construction_time, str)
             assert len(construction_time) > 0
             # Проверяем, что содержит "месяц" или "год"
-            assert any(word in construction_time.lower() for word in ["месяц", "год", "мес", "г"]) 
\ No newline at end of file
+            assert any(word in construction_time.lower() for word in ["месяц", "год", "мес", "г"]) 
+
+
+class TestScenarioBatchGeneration:
+    """Тесты пакетной генерации сценариев."""
+
+    @pytest.mark.asyncio
+    async def test_generate_for_many_projects(self, sqlite_db):
+        """Тест: сценарии для нескольких проектов создаются одним INSERT ... RETURNING."""
+        from sqlalchemy import event
+        from backend.models import Project
+        from backend.services import ScenarioService
+
+        projects = [Project(name=f"Проект {i}", project_type="residential", budget=1000000) for i in range(3)]
+        sqlite_db.add_all(projects)
+        await sqlite_db.commit()
+
+        statements = []
+        engine = sqlite_db.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            generated = await ScenarioService(sqlite_db).generate_scenarios_batch(
+                [project.id for project in projects] + [99999], count=2
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert set(generated) == {project.id for project in projects}
+        for project in projects:
+            scenarios = generated[project.id]
+            assert [scenario.name for scenario in scenarios] == ScenarioService.SCENARIO_NAMES[:2]
+            assert all(scenario.id and scenario.created_at for scenario in scenarios)
+        assert sum(statement.lstrip().upper().startswith("INSERT") for statement in statements) == 1
+
+class TestGenerateForRequest:
+    """Тесты транзакционной генерации персонализированных сценариев."""
+
+    @staticmethod
+    def _request(**land_plot):
+        from backend.schemas import UserRequestCreate
+        plot = {"area": 5, "zone_type": "residential", "infrastructure": ["electricity", "water"]}
+        plot.update(land_plot)
+        return UserRequestCreate(telegram_id=777, land_plot=plot, investment_budget=100000000)
+
+    @pytest.mark.asyncio
+    async def test_single_commit(self, sqlite_db):
+        """Тест: пользователь, участок и сценарии сохраняются одним commit."""
+        from sqlalchemy import event, func, select
+        from backend.models import Project, Scenario, User
+        from backend.services import ScenarioService
+
+        commits = []
+        listener = lambda session: commits.append(session)
+        event.listen(sqlite_db.sync_session, "after_commit", listener)
+        try:
+            user_id, scenarios = await ScenarioService(sqlite_db).generate_for_request(777, self._request())
+        finally:
+            event.remove(sqlite_db.sync_session, "after_commit", listener)
+
+        assert len(commits) == 1
+        assert len(scenarios) == 3
+        assert all(scenario.id and scenario.created_at for scenario in scenarios)
+        project = (await sqlite_db.execute(select(Project))).scalar_one()
+        assert project.user_id == user_id
+        assert (await sqlite_db.execute(select(User.telegram_id))).scalar_one() == 777
+        assert (await sqlite_db.execute(select(func.count(Scenario.id)))).scalar_one() == 3
+
+    @pytest.mark.asyncio
+    async def test_failure_leaves_no_partial_state(self, sqlite_db):
+        """Тест: при ошибке не остается ни пользователя, ни участка."""
+        from pydantic import ValidationError
+        from sqlalchemy import func, select
+        from backend.models import Project, User
+        from backend.services import ScenarioService
+
+        with pytest.raises(ValidationError):
+            await ScenarioService(sqlite_db).generate_for_request(777, self._request(zone_type="unknown"))
+
+        assert (await sqlite_db.execute(select(func.count(User.id)))).scalar_one() == 0
+        assert (await sqlite_db.execute(select(func.count(Project.id)))).scalar_one() == 0
+
+class TestMarketDataIndex:
+    """Тесты индекса рыночных данных в памяти."""
+
+    @pytest.mark.asyncio
+    async def test_generation_reads_market_data_from_memory(self, sqlite_db):
+        """Тест: генерация берет рыночные данные из индекса, запись в market_data его обновляет."""
+        from sqlalchemy import event
+        from backend import crud
+        from backend.market_index import market_index
+        from backend.models import Project
+        from backend.services import ScenarioService
+
+        await crud.MarketDataCRUD.create_market_data(
+            sqlite_db, "Москва", "residential", construction_cost=100000,
+            rental_rate=2000, vacancy_rate=0.05, demand_score=0.9
+        )
+        project = Project(name="ЖК Центр", project_type="residential", location="Москва", area=100)
+        sqlite_db.add(project)
+        await sqlite_db.commit()
+        await market_index.refresh(sqlite_db)
+        version = market_index.version
+
+        statements = []
+        engine = sqlite_db.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            scenarios = await ScenarioService(sqlite_db).generate_scenarios(project.id, count=2)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert not any("market_data" in statement for statement in statements)
+        assert all(scenario.market_demand == "high" for scenario in scenarios)
+        assert all(9000000 <= scenario.estimated_cost <= 11000000 for scenario in scenarios)
+
+        await crud.MarketDataCRUD.create_market_data(
+            sqlite_db, "Казань", "residential", construction_cost=80000,
+            rental_rate=1500, vacancy_rate=0.1, demand_score=0.3
+        )
+        assert market_index.needs_refresh()
+        await market_index.ensure_fresh(sqlite_db)
+        assert market_index.version != version
+        assert market_index.get("Казань", "residential").demand_score == 0.3
+
+class TestUserUpsert:
+    """Тесты получения пользователя одним upsert."""
+
+    @pytest.mark.asyncio
+    async def test_upsert_and_cache(self, sqlite_db):
+        """Тест: повторный вызов не создает дубль, теплый кэш обходится без запросов."""
+        from sqlalchemy import event, func, select
+        from backend import crud
+        from backend.cache import user_id_cache
+        from backend.models import User
+
+        user_id_cache.clear()
+        existing = await crud.UserCRUD.create_user(sqlite_db, telegram_id=4242)
+        user_id_cache.clear()
+
+        statements = []
+        engine = sqlite_db.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert await crud.UserCRUD.get_or_create_user_id(sqlite_db, 4242) == existing.id
+            queries = len(statements)
+            assert await crud.UserCRUD.get_or_create_user_id(sqlite_db, 4242) == existing.id
+            assert await crud.UserCRUD.get_user_id(sqlite_db, 4242) == existing.id
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert queries == 1
+        assert len(statements) == queries
+        assert (await sqlite_db.execute(select(func.count(User.id)))).scalar_one() == 1
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_user_not_cached(self, sqlite_db):
+        """Тест: ID пользователя из откатившейся транзакции не попадает в кэш."""
+        from backend import crud
+        from backend.cache import user_id_cache
+
+        user_id_cache.clear()
+        await crud.UserCRUD.get_or_create_user_id(sqlite_db, 5151, commit=False)
+        await sqlite_db.rollback()
+
+        assert user_id_cache.get(5151) is None
+        assert await crud.UserCRUD.get_user_id(sqlite_db, 5151) is None
+
+class TestScenarioMemo:
+    """Тесты повторного использования рассчитанных сценариев."""
+
+    @pytest.mark.asyncio
+    async def test_similar_plots_share_economics(self, sqlite_db):
+        """Тест: похожие участки получают тот же расчет, смена рыночных данных его сбрасывает."""
+        from backend import crud
+        from backend.scenario_memo import scenario_cache
+        from backend.schemas import UserRequestCreate
+        from backend.services import ScenarioService
+
+        await scenario_cache.invalidate()
+        service = ScenarioService(sqlite_db)
+
+        def request(telegram_id, area, infrastructure):
+            return UserRequestCreate(
+                telegram_id=telegram_id, investment_budget=50000000,
+                land_plot={"area": area, "zone_type": "commercial", "infrastructure": infrastructure}
+            )
+
+        economics = lambda scenarios: [(s.name, s.roi, s.estimated_cost, s.construction_time) for s in scenarios]
+
+        loads = scenario_cache.loads
+        _, first = await service.generate_for_request(1, request(1, 5.0, ["gas", "water"]))
+        _, second = await service.generate_for_request(2, request(2, 5.04, ["water", "gas"]))
+        assert economics(first) == economics(second)
+        assert first[0].project_id != second[0].project_id
+        assert scenario_cache.loads == loads + 1
+
+        await crud.MarketDataCRUD.create_market_data(
+            sqlite_db, "Тула", "commercial", construction_cost=90000,
+            rental_rate=1500, vacancy_rate=0.1, demand_score=0.5
+        )
+        await service.generate_for_request(3, request(3, 5.0, ["gas", "water"]))
+        assert scenario_cache.loads == loads + 2
+
+    @pytest.mark.asyncio
+    async def test_location_case_does_not_change_market(self, sqlite_db):
+        """Тест: регион в разном регистре и с пробелами находит те же рыночные данные, что и в отпечатке."""
+        from backend import crud
+        from backend.scenario_memo import scenario_cache
+        from backend.schemas import UserRequestCreate
+        from backend.services import ScenarioService
+
+        await scenario_cache.invalidate()
+        await crud.MarketDataCRUD.create_market_data(
+            sqlite_db, "Москва", "commercial", construction_cost=100000,
+            rental_rate=3000, vacancy_rate=0.05, demand_score=0.9
+        )
+        service = ScenarioService(sqlite_db)
+
+        for telegram_id, location in ((1, "  москва"), (2, "МОСКВА"), (3, "Москва")):
+            _, scenarios = await service.generate_for_request(telegram_id, UserRequestCreate(
+                telegram_id=telegram_id,
+                land_plot={"area": 2.0, "zone_type": "commercial", "infrastructure": [], "location": location}
+            ))
+            assert all(scenario.market_demand == "high" for scenario in scenarios)
+            assert all(180000 <= scenario.estimated_cost <= 220000 for scenario in scenarios)
@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.sql_metrics import (
+    RequestSQLStats, SQLMetricsMiddleware, current_stats, instrument_engine,
+    redact_parameters, statement_shape
+)
+
+class TestStatementShape:
+    """Тесты нормализации SQL-запросов."""
+
+    def test_in_lists_collapsed(self):
+        """Тест: списки плейсхолдеров разной длины дают одну форму."""
+        assert statement_shape("SELECT * FROM t WHERE id IN ($1, $2)") == \
+            statement_shape("SELECT *  FROM t\n WHERE id IN ($1, $2, $3, $4)")
+
+    def test_parameters_redacted(self):
+        """Тест: значения параметров не попадают в лог."""
+        assert redact_parameters({"telegram_id": 12345}) == {"telegram_id": "***"}
+        assert "12345" not in str(redact_parameters((12345, "secret")))
+
+class TestSQLMetricsMiddleware:
+    """Тесты подсчета SQL-запросов на HTTP-запрос."""
+
+    @pytest.mark.asyncio
+    async def test_server_timing_and_n_plus_one(self, caplog):
+        """Тест: запросы считаются в Server-Timing, повторяющиеся помечаются как N+1."""
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+
+        async def app(scope, receive, send):
+            async with engine.connect() as conn:
+                for i in range(4):
+                    await conn.execute(text("SELECT :value"), {"value": i})
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        messages = []
+        async def send(message):
+            messages.append(message)
+
+        middleware = SQLMetricsMiddleware(app, n_plus_one_threshold=3)
+        with caplog.at_level(logging.WARNING, logger="backend.sql_metrics"):
+            await middleware({"type": "http", "method": "GET", "path": "/items"}, None, send)
+        await engine.dispose()
+
+        headers = dict(messages[0]["headers"])
+        assert b'desc="4 queries"' in headers[b"server-timing"]
+        assert "N+1" in caplog.text
+        assert current_stats() is None